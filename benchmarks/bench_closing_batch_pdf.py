@@ -0,0 +1,92 @@
+"""
+Benchmark de reports.pdf_closing_report.generate_closing_batch_pdf
+con 1k, 10k y 100k líneas: tiempo, RSS pico y tamaño del PDF.
+Cada tamaño corre en un proceso aparte para medir su RSS pico.
+
+Uso:
+    python benchmarks/bench_closing_batch_pdf.py [n1 n2 ...]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reports.pdf_closing_report import generate_closing_batch_pdf  # noqa: E402
+
+
+HEADER = {
+    "title": "Estados Financieros Finales",
+    "company": "EMPRESA DE PRUEBA S.A.",
+    "fiscal_year": 2025,
+    "period": 12,
+    "ledger": "0L",
+    "batch_code": "FS-2025-12-000001",
+    "posted_by": "benchmark",
+    "posted_at": "31/12/2025 23:59",
+}
+
+
+def synthetic_lines(n: int):
+    """
+    Generador: no materializa las líneas.
+    """
+    for i in range(n):
+        debit = Decimal(i % 997) * Decimal("13.37")
+        credit = Decimal(i % 991) * Decimal("12.11")
+        yield {
+            "account_code": f"{1 + i % 5}{i:07d}",
+            "account_name": f"Cuenta auxiliar detallada número {i}",
+            "debit": debit,
+            "credit": credit,
+            "balance": debit - credit,
+        }
+
+
+def totals_for(n: int) -> dict:
+    t = {"debit": Decimal(0), "credit": Decimal(0), "balance": Decimal(0)}
+    for r in synthetic_lines(n):
+        t["debit"] += r["debit"]
+        t["credit"] += r["credit"]
+        t["balance"] += r["balance"]
+    return t
+
+
+def run(n: int):
+    totals = totals_for(n)
+    path = os.path.join(tempfile.gettempdir(), f"bench_closing_{n}.pdf")
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    generate_closing_batch_pdf(path, HEADER, synthetic_lines(n), totals)
+    dt = time.perf_counter() - t0
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    size = os.path.getsize(path)
+    os.remove(path)
+
+    print(
+        f"{n:>8,} líneas  {dt:8.2f} s  "
+        f"{n / dt:10,.0f} líneas/s  "
+        f"RSS pico +{(rss_peak - rss_before) / 1024:8.1f} MiB  "
+        f"PDF {size / 1024:10,.0f} KiB",
+        flush=True
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--one":
+        run(int(sys.argv[2]))
+        sys.exit(0)
+
+    sizes = [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    for n in sizes:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--one", str(n)],
+            check=True
+        )
@@ -0,0 +1,87 @@
+"""
+Memoria y tamaño de payload: filas RealDictCursor vs tuplas
+(services/columnar.py), para una página grande de accounting_lines.
+
+Compara, sobre N filas:
+  RealDictRow  → lo que materializa RealDictCursor
+  tuplas       → fetch_columnar (cursor normal)
+y el JSON resultante en forma records vs columnar.
+
+Uso:
+    python benchmarks/bench_columnar.py [filas]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from psycopg2.extras import RealDictRow
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.columnar import shaped  # noqa: E402
+
+
+COLUMNS = [
+    "line_id", "entry_id", "account_code", "account_name",
+    "debit", "credit", "line_description", "created_at",
+]
+
+
+def tuplas(n: int) -> list:
+    base = datetime(2025, 1, 1, 8, 30)
+    return [
+        (
+            i,
+            i // 3,
+            f"{1101 + i % 40}",
+            "Cuentas por cobrar clientes",
+            Decimal(f"{(i * 37) % 100000}.{i % 100:02d}"),
+            Decimal("0.00"),
+            f"Factura FE-{i:08d}",
+            base + timedelta(minutes=i),
+        )
+        for i in range(n)
+    ]
+
+
+def _medir(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t0
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, actual, dt
+
+
+def run(n: int):
+    print(f"{n:,} filas\n")
+
+    rows, mem_tuplas, _ = _medir(lambda: tuplas(n))
+    dicts, mem_dicts, _ = _medir(
+        lambda: [RealDictRow(zip(COLUMNS, r)) for r in tuplas(n)]
+    )
+    del dicts
+
+    print(f"{'en memoria':14} {'MiB':>8}")
+    print(f"{'RealDictRow':14} {mem_dicts / 2**20:8.1f}")
+    print(f"{'tuplas':14} {mem_tuplas / 2**20:8.1f}"
+          f"   ({mem_tuplas / mem_dicts:.0%})\n")
+
+    print(f"{'payload':14} {'KiB':>8} {'ms':>8}")
+    base = None
+    for shape in ("records", "columnar"):
+        t0 = time.perf_counter()
+        body = shaped(COLUMNS, rows, shape).body
+        dt = time.perf_counter() - t0
+        base = base or len(body)
+        print(f"{shape:14} {len(body) / 1024:8.0f} {dt * 1000:8.1f}"
+              f"   ({len(body) / base:.0%})")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
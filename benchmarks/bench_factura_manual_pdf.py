@@ -0,0 +1,59 @@
+"""
+Micro-benchmark de generar_factura_manual_pdf: PDFs/segundo y
+bytes por PDF.
+
+Uso:
+    python benchmarks/bench_factura_manual_pdf.py [n] [repeticiones]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.pdf.factura_manual_pdf as factura_manual_pdf  # noqa: E402
+
+
+def run(n: int, repeticiones: int):
+    out_dir = tempfile.mkdtemp(prefix="bench_factura_")
+    factura_manual_pdf.BASE_DIR = out_dir
+
+    data = {
+        "numero_factura": 0,
+        "fecha_factura": datetime(2025, 1, 31),
+        "cliente": "CLIENTE DE PRUEBA S.A.",
+        "buque": "MV BENCHMARK",
+        "operacion": "Descarga",
+        "num_informe": "2200-3101-2025",
+        "periodo": "2025-01-01 a 2025-01-31",
+        "descripcion": "Inspección de carga y reporte de daños",
+        "moneda": "USD",
+        "termino_pago": 30,
+        "total": 12345.67,
+    }
+
+    mejor = None
+    total_bytes = 0
+
+    for _ in range(repeticiones):
+        total_bytes = 0
+        t0 = time.perf_counter()
+        for i in range(n):
+            data["numero_factura"] = i
+            path = factura_manual_pdf.generar_factura_manual_pdf(data)
+            total_bytes += os.path.getsize(path)
+        dt = time.perf_counter() - t0
+        mejor = dt if mejor is None else min(mejor, dt)
+
+    print(f"PDFs:          {n} x {repeticiones}")
+    print(f"PDFs/segundo:  {n / mejor:,.0f}")
+    print(f"bytes/PDF:     {total_bytes / n:,.0f}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    run(n, repeticiones)
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark de serialización de respuestas: ms por 10k filas
+tipo RealDictCursor (Decimal, date, datetime, texto, enteros).
+
+Compara:
+  jsonable_encoder  → lo que hace FastAPI al devolver un dict
+  float() + encoder → patrón manual de ledger / previews de cierre
+  FastJSONResponse  → services/json_response.py (orjson)
+  FastJSONResponse  → respaldo stdlib json (sin orjson)
+
+Uso:
+    python benchmarks/bench_json_response.py [filas] [repeticiones]
+"""
+
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from services import json_response  # noqa: E402
+from services.json_response import FastJSONResponse  # noqa: E402
+
+
+def filas(n: int) -> list:
+    base = datetime(2025, 1, 1, 8, 30)
+    return [
+        {
+            "id": i,
+            "entry_date": date(2025, 1, 1) + timedelta(days=i % 365),
+            "created_at": base + timedelta(minutes=i),
+            "account_code": f"{1101 + i % 40}",
+            "account_name": "Cuentas por cobrar clientes",
+            "debit": Decimal(f"{(i * 37) % 100000}.{i % 100:02d}"),
+            "credit": Decimal("0.00"),
+            "balance": Decimal(f"-{(i * 11) % 5000}.50"),
+            "line_description": f"Factura FE-{i:08d} servicio de inspección",
+            "origin": "COLLECTIONS",
+        }
+        for i in range(n)
+    ]
+
+
+def _manual_float(rows):
+    return [
+        {
+            **r,
+            "debit": float(r["debit"] or 0),
+            "credit": float(r["credit"] or 0),
+            "balance": float(r["balance"] or 0),
+        }
+        for r in rows
+    ]
+
+
+def _stdlib(rows):
+    orjson, json_response.orjson = json_response.orjson, None
+    try:
+        return FastJSONResponse({"data": rows}).body
+    finally:
+        json_response.orjson = orjson
+
+
+CASOS = [
+    ("jsonable_encoder",
+     lambda rows: JSONResponse(jsonable_encoder({"data": rows})).body),
+    ("float() + encoder",
+     lambda rows: JSONResponse(
+         jsonable_encoder({"data": _manual_float(rows)})).body),
+    ("FastJSONResponse",
+     lambda rows: FastJSONResponse({"data": rows}).body),
+    ("FastJSONResponse stdlib", _stdlib),
+]
+
+
+def run(n: int, repeticiones: int):
+    rows = filas(n)
+    escala = 10_000 / n
+
+    print(f"{n:,} filas, mejor de {repeticiones}\n")
+    print(f"{'método':26} {'ms/10k filas':>13} {'KiB':>8}")
+
+    base = None
+    for nombre, fn in CASOS:
+        if nombre.endswith("stdlib") and json_response.orjson is None:
+            continue
+
+        mejor = None
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            body = fn(rows)
+            dt = time.perf_counter() - t0
+            mejor = dt if mejor is None else min(mejor, dt)
+
+        ms = mejor * 1000 * escala
+        base = base or ms
+        print(f"{nombre:26} {ms:13.1f} {len(body) / 1024:8.0f}"
+              f"   x{base / ms:.1f}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    run(n, repeticiones)
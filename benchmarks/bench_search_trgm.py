@@ -0,0 +1,139 @@
+"""
+Benchmark de búsqueda "contiene": ILIKE '%x%' (scan) vs columna
+*_search + índice GIN trigram (migrations/005_search_trgm.sql).
+
+Crea un schema temporal con las 5 tablas buscables, N filas por
+tabla, mide cada búsqueda con ambos métodos y borra el schema.
+Necesita una BD de PRUEBA con permisos para CREATE EXTENSION:
+
+    BENCH_DATABASE_URL=postgresql://... \\
+        python benchmarks/bench_search_trgm.py [filas] [repeticiones]
+"""
+
+import os
+import sys
+import time
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.search import contains_clause, contains_pattern  # noqa: E402
+
+
+SCHEMA = "bench_search"
+
+# (tabla, columna, términos buscados)
+CASOS = [
+    ("invoicing", "nombre_cliente", ["naviera", "logística", "sa 12345"]),
+    ("collections", "nombre_cliente", ["naviera", "logistica", "4242"]),
+    ("payment_obligations", "payee_name", ["proveedor", "peñas", "77777"]),
+    ("cash_app", "referencia", ["ref-00123", "transf"]),
+    ("incoming_payments", "numero_referencia", ["ref-00123", "999"]),
+]
+
+NOMBRES = [
+    "Naviera del Pacífico", "Logística Centroamericana", "Agencia Marítima",
+    "Proveedor Peñas Blancas", "Transportes Caldera", "Inspecciones Limón",
+]
+
+
+def _setup(cur, filas: int):
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    cur.execute(f"SET search_path = {SCHEMA}, public")
+    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public")
+    cur.execute("CREATE EXTENSION IF NOT EXISTS unaccent SCHEMA public")
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text)
+        RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+
+    nombres = "ARRAY[" + ",".join(
+        "'" + n.replace("'", "''") + "'" for n in NOMBRES
+    ) + "]"
+
+    for tabla, columna, _ in CASOS:
+        if columna in ("nombre_cliente", "payee_name"):
+            expr = (
+                f"({nombres})[1 + mod(g, {len(NOMBRES)})] "
+                f"|| ' S.A. ' || g"
+            )
+        else:
+            expr = "'REF-' || lpad(g::text, 8, '0') || '-TRANSF'"
+
+        cur.execute(f"""
+            CREATE TABLE {tabla} AS
+            SELECT g AS id, {expr} AS {columna}
+            FROM generate_series(1, %s) g
+        """, (filas,))
+        cur.execute(f"""
+            ALTER TABLE {tabla}
+            ADD COLUMN {columna}_search TEXT
+            GENERATED ALWAYS AS (lower(f_unaccent({columna}))) STORED
+        """)
+        cur.execute(f"""
+            CREATE INDEX ON {tabla}
+            USING gin ({columna}_search gin_trgm_ops)
+        """)
+        cur.execute(f"ANALYZE {tabla}")
+
+
+def _medir(cur, sql: str, params, repeticiones: int) -> tuple:
+    mejor = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        cur.execute(sql, params)
+        n = len(cur.fetchall())
+        dt = time.perf_counter() - t0
+        mejor = dt if mejor is None else min(mejor, dt)
+    return mejor, n
+
+
+def run(filas: int, repeticiones: int):
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Definir BENCH_DATABASE_URL (BD de prueba)")
+
+    conn = psycopg2.connect(url)
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    try:
+        t0 = time.perf_counter()
+        _setup(cur, filas)
+        print(f"setup: {filas:,} filas x {len(CASOS)} tablas "
+              f"en {time.perf_counter() - t0:.1f}s\n")
+
+        print(f"{'tabla':22} {'término':12} {'ILIKE ms':>10} "
+              f"{'trgm ms':>10} {'filas':>8}")
+
+        for tabla, columna, terminos in CASOS:
+            for termino in terminos:
+                viejo, n_viejo = _medir(
+                    cur,
+                    f"SELECT id FROM {tabla} WHERE {columna} ILIKE %s",
+                    (f"%{termino}%",),
+                    repeticiones
+                )
+                nuevo, n_nuevo = _medir(
+                    cur,
+                    f"SELECT id FROM {tabla} "
+                    f"WHERE {contains_clause(columna, '%s')}",
+                    (contains_pattern(termino),),
+                    repeticiones
+                )
+                # Sin acentos el índice encuentra también "logistica"
+                print(f"{tabla:22} {termino:12} {viejo * 1000:10.1f} "
+                      f"{nuevo * 1000:10.1f} {n_nuevo:8} "
+                      f"{'' if n_viejo == n_nuevo else f'(ILIKE: {n_viejo})'}")
+    finally:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.close()
+
+
+if __name__ == "__main__":
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    run(filas, repeticiones)
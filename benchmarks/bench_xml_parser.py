@@ -0,0 +1,119 @@
+"""
+Micro-benchmark del parser de comprobantes electrónicos: documentos/
+segundo y líneas/segundo sobre un corpus sintético (FE, FEE, NC) con
+distinta cantidad de LineaDetalle.
+
+Uso:
+    python benchmarks/bench_xml_parser.py [documentos] [repeticiones]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.xml.electronic_documents_parser import (  # noqa: E402
+    parse_electronic_document_from_bytes
+)
+
+
+NAMESPACES = {
+    "FacturaElectronica":
+        "https://cdn.comprobanteselectronicos.go.cr/xml-schemas/v4.3/facturaElectronica",
+    "FacturaElectronicaExportacion":
+        "https://cdn.comprobanteselectronicos.go.cr/xml-schemas/v4.3/facturaElectronicaExportacion",
+    "NotaCreditoElectronica":
+        "https://cdn.comprobanteselectronicos.go.cr/xml-schemas/v4.3/notaCreditoElectronica",
+}
+
+LINEAS_POR_DOC = (1, 5, 20, 100)
+
+
+def _linea(i: int) -> str:
+    precio = 100 + i
+    return f"""
+      <LineaDetalle>
+        <NumeroLinea>{i}</NumeroLinea>
+        <Codigo>{80000 + i}</Codigo>
+        <Cantidad>1.000</Cantidad>
+        <UnidadMedida>Sp</UnidadMedida>
+        <Detalle>Servicio de inspección número {i}</Detalle>
+        <PrecioUnitario>{precio:.5f}</PrecioUnitario>
+        <MontoTotal>{precio:.5f}</MontoTotal>
+        <SubTotal>{precio:.5f}</SubTotal>
+        <Impuesto>
+          <Codigo>01</Codigo>
+          <CodigoTarifa>08</CodigoTarifa>
+          <Tarifa>13.00</Tarifa>
+          <Monto>{precio * 0.13:.5f}</Monto>
+        </Impuesto>
+        <MontoTotalLinea>{precio * 1.13:.5f}</MontoTotalLinea>
+      </LineaDetalle>"""
+
+
+def documento(raiz: str, n_lineas: int, seq: int) -> bytes:
+    lineas = "".join(_linea(i) for i in range(1, n_lineas + 1))
+    total = sum((100 + i) * 1.13 for i in range(1, n_lineas + 1))
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<{raiz} xmlns="{NAMESPACES[raiz]}">
+  <Clave>5060101250031010000000100001010000{seq:06d}1{seq:08d}</Clave>
+  <CodigoActividad>749003</CodigoActividad>
+  <NumeroConsecutivo>00100001010{seq:09d}</NumeroConsecutivo>
+  <FechaEmision>2025-01-31T10:15:00-06:00</FechaEmision>
+  <Emisor>
+    <Nombre>PROVEEDOR DE PRUEBA S.A.</Nombre>
+    <Identificacion><Tipo>02</Tipo><Numero>3101000000</Numero></Identificacion>
+    <CorreoElectronico>facturacion@example.com</CorreoElectronico>
+  </Emisor>
+  <Receptor>
+    <Nombre>CLIENTE DE PRUEBA S.A.</Nombre>
+    <Identificacion><Tipo>02</Tipo><Numero>3101999999</Numero></Identificacion>
+  </Receptor>
+  <CondicionVenta>02</CondicionVenta>
+  <PlazoCredito>30</PlazoCredito>
+  <MedioPago>04</MedioPago>
+  <DetalleServicio>{lineas}
+  </DetalleServicio>
+  <ResumenFactura>
+    <CodigoTipoMoneda><CodigoMoneda>USD</CodigoMoneda><TipoCambio>510.00</TipoCambio></CodigoTipoMoneda>
+    <TotalServGravados>{total:.5f}</TotalServGravados>
+    <TotalComprobante>{total:.5f}</TotalComprobante>
+  </ResumenFactura>
+</{raiz}>""".encode("utf-8")
+
+
+def corpus(n: int):
+    rnd = random.Random(42)
+    raices = list(NAMESPACES)
+    docs = []
+    for seq in range(n):
+        n_lineas = rnd.choice(LINEAS_POR_DOC)
+        docs.append((documento(rnd.choice(raices), n_lineas, seq), n_lineas))
+    return docs
+
+
+def run(n: int, repeticiones: int):
+    docs = corpus(n)
+    total_lineas = sum(k for _, k in docs)
+    total_bytes = sum(len(d) for d, _ in docs)
+
+    mejor = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        for xml_bytes, n_lineas in docs:
+            data = parse_electronic_document_from_bytes(xml_bytes)
+            assert len(data["detalles"]) == n_lineas
+        dt = time.perf_counter() - t0
+        mejor = dt if mejor is None else min(mejor, dt)
+
+    print(f"documentos:        {n} x {repeticiones} ({total_bytes / 1e6:.1f} MB)")
+    print(f"documentos/seg:    {n / mejor:,.0f}")
+    print(f"líneas/seg:        {total_lineas / mejor:,.0f}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    run(n, repeticiones)
@@ -2,11 +2,16 @@
 # main.py — API backend ERP-SOM (FASTAPI)
 # ============================================================
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-# Conexión SQL
-import database
+from services import geography
+from services.geography import GEOGRAPHY_CACHE_CONTROL
+from services.http_cache import conditional_json_response
+from services.metrics import MetricsMiddleware
+
+from services.pdf import render_pool
+from services.xml import parse_pool
 
 # ============================================================
 # Routers
@@ -21,7 +26,7 @@ from routers.servicios_op import router as servicios_router
 from routers.continentes_paises_puertos import router as cpp_router
 from routers.version import router as version_router
 from routers.cliente_credito import router as cliente_credito_router
-from routers.factura import router as factura_router
+from routers.factura import router as factura_router, reencolar_pdfs_pendientes
 from routers.invoicing import router as invoicing_router
 from routers.billing import router as billing_router
 from routers.collections import router as collections_router
@@ -31,6 +36,10 @@ from routers.dispute_management import router as dispute_management_router
 from routers.dispute_notes import router as dispute_notes_router
 from routers.disputa import router as disputa_router
 from routers.invoice_to_pay import router as invoice_to_pay_router
+from routers.attachments import router as attachments_router
+from routers.sync import router as sync_router
+from routers.changes import router as changes_router
+from routers.metrics import router as metrics_router
 
 # Accounting
 from routers.accounting import router as accounting_router
@@ -64,6 +73,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ============================================================
+# MÉTRICAS — latencia / status / tamaño por ruta (GET /metrics)
+# ============================================================
+app.add_middleware(MetricsMiddleware)
+
 # ============================================================
 # DEBUG: IMPRIMIR RUTAS REGISTRADAS EN STARTUP (SOLO /collections)
 # ============================================================
@@ -92,6 +106,31 @@ def _debug_routes_collections():
         print("=== FIN ERROR ===\n")
 
 
+# ============================================================
+# STARTUP: RE-ENCOLAR PDFs DE FACTURA QUE QUEDARON PENDIENTES
+# (reinicio / deploy con renders en curso)
+# ============================================================
+@app.on_event("startup")
+def _recuperar_pdfs_factura():
+    try:
+        ids = reencolar_pdfs_pendientes()
+        if ids:
+            print(f"PDFs de factura re-encolados: {len(ids)}")
+    except Exception as e:
+        print("\n=== ERROR RECUPERANDO PDFs PENDIENTES ===")
+        print(str(e))
+        print("=== FIN ERROR ===\n")
+
+
+# ============================================================
+# SHUTDOWN: CERRAR POOLS DE PROCESOS (RENDER PDF / PARSEO XML)
+# ============================================================
+@app.on_event("shutdown")
+def _shutdown_render_pool():
+    render_pool.shutdown()
+    parse_pool.shutdown()
+
+
 # ============================================================
 # HEALTH CHECK
 # ============================================================
@@ -100,44 +139,32 @@ def home():
     return {"status": "API Online ✔"}
 
 # ============================================================
-# ENDPOINT: Continentes
+# ENDPOINTS: Continentes / Países / Puertos
+# Servidos desde el cache en memoria (services/geography.py),
+# con ETag / 304 y Cache-Control
 # ============================================================
 @app.get("/continentes")
-def get_continentes():
-    data = database.sql("""
-        SELECT nombre
-        FROM continente
-        ORDER BY nombre;
-    """, fetch=True)
-    return [row[0] for row in data]
+def get_continentes(request: Request):
+    geo = geography.normalized.get()
+    return conditional_json_response(
+        request, geo.continentes, geo.etag, GEOGRAPHY_CACHE_CONTROL
+    )
+
 
-# ============================================================
-# ENDPOINT: Países por continente
-# ============================================================
 @app.get("/paises")
-def get_paises(continente: str):
-    data = database.sql("""
-        SELECT p.nombre
-        FROM pais p
-        JOIN continente c ON c.id = p.continente_id
-        WHERE unaccent(c.nombre) ILIKE unaccent(%s)
-        ORDER BY p.nombre;
-    """, (continente,), fetch=True)
-    return [row[0] for row in data]
+def get_paises(continente: str, request: Request):
+    geo = geography.normalized.get()
+    return conditional_json_response(
+        request, geo.paises_de(continente), geo.etag, GEOGRAPHY_CACHE_CONTROL
+    )
+
 
-# ============================================================
-# ENDPOINT: Puertos por país
-# ============================================================
 @app.get("/puertos")
-def get_puertos(pais: str):
-    data = database.sql("""
-        SELECT pu.nombre
-        FROM puerto pu
-        JOIN pais pa ON pa.id = pu.pais_id
-        WHERE unaccent(pa.nombre) ILIKE unaccent(%s)
-        ORDER BY pu.nombre;
-    """, (pais,), fetch=True)
-    return [row[0] for row in data]
+def get_puertos(pais: str, request: Request):
+    geo = geography.normalized.get()
+    return conditional_json_response(
+        request, geo.puertos_de(pais), geo.etag, GEOGRAPHY_CACHE_CONTROL
+    )
 
 # ============================================================
 # Include Routers
@@ -162,6 +189,10 @@ app.include_router(dispute_management_router)
 app.include_router(dispute_notes_router)
 app.include_router(disputa_router)
 app.include_router(invoice_to_pay_router)
+app.include_router(attachments_router)
+app.include_router(sync_router)
+app.include_router(changes_router)
+app.include_router(metrics_router)
 
 app.include_router(accounting_router)
 app.include_router(accounting_adjustments_router)
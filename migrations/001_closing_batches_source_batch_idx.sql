@@ -0,0 +1,8 @@
+-- ============================================================
+-- Reversa de batches de cierre: la cadena source_batch_id se
+-- resuelve con un CTE recursivo que necesita este índice.
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_closing_batches_source_batch_id
+    ON closing_batches (source_batch_id)
+    WHERE source_batch_id IS NOT NULL;
@@ -0,0 +1,44 @@
+-- ============================================================
+-- Numeración de documentos (services/numbering.py)
+-- Una fila por serie gapless; la siembra continúa la numeración
+-- existente para no repetir números ya emitidos.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS document_counters (
+    series      TEXT PRIMARY KEY,
+    next_value  BIGINT NOT NULL,
+    updated_at  TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO document_counters (series, next_value)
+SELECT 'FACTURA_MANUAL', GREATEST(
+    (SELECT COALESCE(MAX(numero_factura::int), 2199)
+       FROM factura
+      WHERE tipo_factura = 'MANUAL'),
+    (SELECT COALESCE(MAX(numero_documento::int), 2200)
+       FROM invoicing
+      WHERE tipo_documento = 'FACTURA'
+        AND tipo_factura = 'MANUAL'
+        AND numero_documento ~ '^[0-9]+$')
+) + 1
+ON CONFLICT (series) DO NOTHING;
+
+INSERT INTO document_counters (series, next_value)
+SELECT 'NOTA_CREDITO', COALESCE(MAX(numero_documento::int), 9000) + 1
+  FROM invoicing
+ WHERE tipo_documento = 'NOTA_CREDITO'
+   AND numero_documento ~ '^[0-9]+$'
+ON CONFLICT (series) DO NOTHING;
+
+INSERT INTO document_counters (series, next_value)
+SELECT 'INFORME', COALESCE(
+    MAX(NULLIF(split_part(num_informe, '-', 1), '')::int),
+    2128
+) + 1
+  FROM servicios
+ WHERE num_informe IS NOT NULL
+   AND num_informe <> ''
+ON CONFLICT (series) DO NOTHING;
+
+-- Códigos de batch de cierre: no fiscales, basta una secuencia
+CREATE SEQUENCE IF NOT EXISTS closing_batch_code_seq;
@@ -0,0 +1,12 @@
+-- ============================================================
+-- Estado del PDF de factura (render fuera del request)
+-- PENDING → READY | ERROR
+-- ============================================================
+
+ALTER TABLE factura ADD COLUMN IF NOT EXISTS pdf_status TEXT;
+ALTER TABLE factura ADD COLUMN IF NOT EXISTS pdf_error  TEXT;
+
+UPDATE factura
+   SET pdf_status = 'READY'
+ WHERE pdf_status IS NULL
+   AND pdf_path IS NOT NULL;
@@ -0,0 +1,20 @@
+-- ============================================================
+-- Almacén de adjuntos content-addressed (services/attachments.py)
+-- Un registro por contenido (SHA-256); las rutas de
+-- payment_obligations.file_xml / file_pdf y factura.pdf_path
+-- apuntan a storage_path.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS attachments (
+    id            BIGSERIAL PRIMARY KEY,
+    sha256        CHAR(64)    NOT NULL UNIQUE,
+    size_bytes    BIGINT      NOT NULL,
+    mime_type     TEXT        NOT NULL,
+    original_name TEXT,
+    storage_path  TEXT        NOT NULL,
+    created_at    TIMESTAMP   NOT NULL DEFAULT NOW(),
+    last_used_at  TIMESTAMP   NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS attachments_storage_path_idx
+    ON attachments (storage_path);
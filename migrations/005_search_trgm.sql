@@ -0,0 +1,79 @@
+-- ============================================================
+-- Búsqueda por "contiene" con índices trigram (pg_trgm)
+--
+-- Cada columna buscable tiene una columna *_search generada
+-- (lower + sin acentos), que Postgres mantiene sincronizada en cada
+-- INSERT/UPDATE, y un índice GIN gin_trgm_ops sobre ella. Los
+-- endpoints filtran con  <col>_search LIKE lower(f_unaccent('%x%'))
+-- (ver services/search.py).
+-- ============================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() es STABLE; el wrapper con diccionario explícito es
+-- IMMUTABLE y se puede usar en columnas generadas / índices.
+CREATE OR REPLACE FUNCTION f_unaccent(text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE STRICT
+AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+$$;
+
+-- ------------------------------------------------------------
+-- invoicing.nombre_cliente  (/billing/search, /billing/pdf/export)
+-- ------------------------------------------------------------
+ALTER TABLE invoicing
+    ADD COLUMN IF NOT EXISTS nombre_cliente_search TEXT
+    GENERATED ALWAYS AS (lower(f_unaccent(nombre_cliente))) STORED;
+
+CREATE INDEX IF NOT EXISTS invoicing_nombre_cliente_trgm_idx
+    ON invoicing USING gin (nombre_cliente_search gin_trgm_ops);
+
+-- ------------------------------------------------------------
+-- collections.nombre_cliente  (/collections/search)
+-- ------------------------------------------------------------
+ALTER TABLE collections
+    ADD COLUMN IF NOT EXISTS nombre_cliente_search TEXT
+    GENERATED ALWAYS AS (lower(f_unaccent(nombre_cliente))) STORED;
+
+CREATE INDEX IF NOT EXISTS collections_nombre_cliente_trgm_idx
+    ON collections USING gin (nombre_cliente_search gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS collections_codigo_cliente_idx
+    ON collections (codigo_cliente);
+
+-- ------------------------------------------------------------
+-- payment_obligations.payee_name  (/invoice-to-pay/search)
+-- ------------------------------------------------------------
+ALTER TABLE payment_obligations
+    ADD COLUMN IF NOT EXISTS payee_name_search TEXT
+    GENERATED ALWAYS AS (lower(f_unaccent(payee_name))) STORED;
+
+CREATE INDEX IF NOT EXISTS payment_obligations_payee_name_trgm_idx
+    ON payment_obligations USING gin (payee_name_search gin_trgm_ops);
+
+-- ------------------------------------------------------------
+-- cash_app.referencia / incoming_payments.numero_referencia
+-- (/bank-reconciliation)
+-- ------------------------------------------------------------
+ALTER TABLE cash_app
+    ADD COLUMN IF NOT EXISTS referencia_search TEXT
+    GENERATED ALWAYS AS (lower(f_unaccent(referencia))) STORED;
+
+CREATE INDEX IF NOT EXISTS cash_app_referencia_trgm_idx
+    ON cash_app USING gin (referencia_search gin_trgm_ops);
+
+ALTER TABLE incoming_payments
+    ADD COLUMN IF NOT EXISTS numero_referencia_search TEXT
+    GENERATED ALWAYS AS (lower(f_unaccent(numero_referencia))) STORED;
+
+CREATE INDEX IF NOT EXISTS incoming_payments_referencia_trgm_idx
+    ON incoming_payments USING gin (numero_referencia_search gin_trgm_ops);
+
+ANALYZE invoicing;
+ANALYZE collections;
+ANALYZE payment_obligations;
+ANALYZE cash_app;
+ANALYZE incoming_payments;
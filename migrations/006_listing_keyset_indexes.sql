@@ -0,0 +1,48 @@
+-- ============================================================
+-- Paginación keyset de listados (services/pagination.keyset_page)
+--
+-- /servicios ordena por consec DESC y filtra por estado, cliente,
+-- surveyor y rango de fecha_inicio: cada filtro de igualdad lleva
+-- un índice compuesto (filtro, consec DESC) para que
+--   WHERE estado = %s AND consec < %s ORDER BY consec DESC LIMIT n
+-- sea un range scan que lee solo n filas en cualquier página.
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_servicios_estado_consec
+    ON servicios (estado, consec DESC);
+
+CREATE INDEX IF NOT EXISTS idx_servicios_cliente_consec
+    ON servicios (cliente, consec DESC);
+
+CREATE INDEX IF NOT EXISTS idx_servicios_surveyor_consec
+    ON servicios (surveyor, consec DESC);
+
+CREATE INDEX IF NOT EXISTS idx_servicios_fecha_inicio_consec
+    ON servicios (fecha_inicio, consec DESC);
+
+-- ------------------------------------------------------------
+-- Maestros (cliente, proveedor, surveyor, empleados) ordenan por
+-- codigo. Si codigo ya es PK / UNIQUE ese índice sirve; solo se
+-- crea uno cuando la tabla no tiene ningún índice que empiece
+-- por codigo.
+-- ------------------------------------------------------------
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['cliente', 'proveedor', 'surveyor', 'empleados']
+    LOOP
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_index i
+            JOIN pg_attribute a
+              ON a.attrelid = i.indrelid
+             AND a.attnum = i.indkey[0]
+            WHERE i.indrelid = t::regclass
+              AND a.attname = 'codigo'
+        ) THEN
+            EXECUTE format('CREATE INDEX idx_%s_codigo ON %I (codigo)', t, t);
+        END IF;
+    END LOOP;
+END
+$$;
@@ -0,0 +1,21 @@
+-- ============================================================
+-- Feed de conciliación bancaria (GET /bank-reconciliation)
+--
+-- Cada rama del UNION ALL (cash_app / incoming_payments) se lee
+-- ordenada por fecha_pago DESC, id DESC con LIMIT, y la página
+-- siguiente arranca en (fecha_pago, id) < cursor. Con estos
+-- índices cada rama es un index scan que se detiene en page_size
+-- filas, filtrando o no por cliente.
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_cash_app_cliente_fecha_pago
+    ON cash_app (codigo_cliente, fecha_pago DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_cash_app_fecha_pago
+    ON cash_app (fecha_pago DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_incoming_payments_cliente_fecha_pago
+    ON incoming_payments (codigo_cliente, fecha_pago DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_incoming_payments_fecha_pago
+    ON incoming_payments (fecha_pago DESC, id DESC);
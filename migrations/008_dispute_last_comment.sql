@@ -0,0 +1,68 @@
+-- ============================================================
+-- Último comentario de cada gestión de disputa
+--
+-- GET /dispute-management mostraba el último comentario con una
+-- subconsulta correlacionada sobre dispute_history por cada fila.
+-- Ahora dispute_management guarda last_comment / _by / _at y un
+-- trigger AFTER INSERT en dispute_history los actualiza en la
+-- misma transacción del INSERT (cambio de estatus, notas NC/ND,
+-- creación de la gestión: cualquier camino que escriba historial).
+-- ============================================================
+
+ALTER TABLE dispute_management
+    ADD COLUMN IF NOT EXISTS last_comment    TEXT,
+    ADD COLUMN IF NOT EXISTS last_comment_by TEXT,
+    ADD COLUMN IF NOT EXISTS last_comment_at TIMESTAMP;
+
+CREATE OR REPLACE FUNCTION dispute_history_set_last_comment()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE dispute_management
+    SET last_comment    = NEW.comentario,
+        last_comment_by = NEW.created_by,
+        last_comment_at = NEW.created_at
+    WHERE id = NEW.dispute_management_id
+      AND (last_comment_at IS NULL OR last_comment_at <= NEW.created_at);
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_dispute_history_last_comment ON dispute_history;
+
+CREATE TRIGGER trg_dispute_history_last_comment
+    AFTER INSERT ON dispute_history
+    FOR EACH ROW
+    EXECUTE FUNCTION dispute_history_set_last_comment();
+
+-- Historial por gestión, más reciente primero
+-- (GET /{management_id}/history y el backfill de abajo)
+CREATE INDEX IF NOT EXISTS idx_dispute_history_management_created
+    ON dispute_history (dispute_management_id, created_at DESC);
+
+-- Backfill de gestiones existentes
+UPDATE dispute_management dm
+SET last_comment    = h.comentario,
+    last_comment_by = h.created_by,
+    last_comment_at = h.created_at
+FROM (
+    SELECT DISTINCT ON (dispute_management_id)
+        dispute_management_id, comentario, created_by, created_at
+    FROM dispute_history
+    ORDER BY dispute_management_id, created_at DESC
+) h
+WHERE h.dispute_management_id = dm.id;
+
+-- ------------------------------------------------------------
+-- Paginación keyset del listado: (d.created_at, d.id) DESC,
+-- con o sin filtro por cliente
+-- ------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_disputa_created_id
+    ON disputa (created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_disputa_cliente_created_id
+    ON disputa (codigo_cliente, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_dispute_management_dispute_id
+    ON dispute_management (dispute_id);
@@ -0,0 +1,151 @@
+-- ============================================================
+-- Contadores de KPI de disputas por estatus
+--
+-- GET /dispute-management/kpis/summary (sin filtros) lee esta
+-- tabla: una fila por estatus, así que el panel es O(estatus) y no
+-- recorre dispute_management / disputa.
+--
+-- Un trigger en dispute_management aplica cada INSERT / UPDATE /
+-- DELETE en la misma transacción (cambio de estatus, notas NC/ND
+-- que bajan disputed_amount, creación de la gestión): resta la
+-- contribución de la fila vieja y suma la de la nueva.
+--
+-- Por fila se acumula:
+--   dispute_count     gestiones en el estatus
+--   disputed_amount   SUM(disputed_amount)
+--   created_count     filas con disputa.created_at
+--   created_days_sum  SUM(created_at::date - 2000-01-01)
+--                     → ADO = hoy - created_days_sum / created_count
+--   closed_count      filas con dispute_closed_at
+--   close_days_sum    SUM(dispute_closed_at::date - created_at::date)
+--                     → DDO = close_days_sum / closed_count
+--
+-- SELECT dispute_kpi_counters_rebuild(); recalcula todo desde cero.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS dispute_kpi_counters (
+    status            TEXT PRIMARY KEY,
+    dispute_count     BIGINT        NOT NULL DEFAULT 0,
+    disputed_amount   NUMERIC(18,2) NOT NULL DEFAULT 0,
+    created_count     BIGINT        NOT NULL DEFAULT 0,
+    created_days_sum  BIGINT        NOT NULL DEFAULT 0,
+    closed_count      BIGINT        NOT NULL DEFAULT 0,
+    close_days_sum    BIGINT        NOT NULL DEFAULT 0,
+    updated_at        TIMESTAMP     NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION dispute_kpi_apply(
+    p_status     TEXT,
+    p_dispute_id INTEGER,
+    p_amount     NUMERIC,
+    p_closed_at  TIMESTAMP,
+    p_sign       INTEGER
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_created DATE;
+BEGIN
+    IF p_status IS NULL THEN
+        RETURN;
+    END IF;
+
+    SELECT created_at::date INTO v_created
+    FROM disputa
+    WHERE id = p_dispute_id;
+
+    INSERT INTO dispute_kpi_counters AS c (
+        status,
+        dispute_count,
+        disputed_amount,
+        created_count,
+        created_days_sum,
+        closed_count,
+        close_days_sum
+    )
+    VALUES (
+        p_status,
+        p_sign,
+        p_sign * COALESCE(p_amount, 0),
+        p_sign * (v_created IS NOT NULL)::int,
+        p_sign * COALESCE(v_created - DATE '2000-01-01', 0),
+        p_sign * (v_created IS NOT NULL AND p_closed_at IS NOT NULL)::int,
+        p_sign * COALESCE(p_closed_at::date - v_created, 0)
+    )
+    ON CONFLICT (status) DO UPDATE
+    SET dispute_count    = c.dispute_count    + EXCLUDED.dispute_count,
+        disputed_amount  = c.disputed_amount  + EXCLUDED.disputed_amount,
+        created_count    = c.created_count    + EXCLUDED.created_count,
+        created_days_sum = c.created_days_sum + EXCLUDED.created_days_sum,
+        closed_count     = c.closed_count     + EXCLUDED.closed_count,
+        close_days_sum   = c.close_days_sum   + EXCLUDED.close_days_sum,
+        updated_at       = NOW();
+END
+$$;
+
+CREATE OR REPLACE FUNCTION dispute_management_kpi_trigger()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM dispute_kpi_apply(
+            OLD.status, OLD.dispute_id, OLD.disputed_amount,
+            OLD.dispute_closed_at, -1
+        );
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM dispute_kpi_apply(
+            NEW.status, NEW.dispute_id, NEW.disputed_amount,
+            NEW.dispute_closed_at, 1
+        );
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_dispute_management_kpi ON dispute_management;
+
+CREATE TRIGGER trg_dispute_management_kpi
+    AFTER INSERT OR DELETE
+       OR UPDATE OF status, dispute_id, disputed_amount, dispute_closed_at
+    ON dispute_management
+    FOR EACH ROW
+    EXECUTE FUNCTION dispute_management_kpi_trigger();
+
+CREATE OR REPLACE FUNCTION dispute_kpi_counters_rebuild()
+RETURNS void
+LANGUAGE sql
+AS $$
+    DELETE FROM dispute_kpi_counters;
+
+    INSERT INTO dispute_kpi_counters (
+        status,
+        dispute_count,
+        disputed_amount,
+        created_count,
+        created_days_sum,
+        closed_count,
+        close_days_sum
+    )
+    SELECT
+        dm.status,
+        COUNT(*),
+        COALESCE(SUM(dm.disputed_amount), 0),
+        COUNT(d.created_at),
+        COALESCE(SUM(d.created_at::date - DATE '2000-01-01'), 0),
+        COUNT(*) FILTER (
+            WHERE d.created_at IS NOT NULL
+              AND dm.dispute_closed_at IS NOT NULL
+        ),
+        COALESCE(SUM(dm.dispute_closed_at::date - d.created_at::date), 0)
+    FROM dispute_management dm
+    LEFT JOIN disputa d ON d.id = dm.dispute_id
+    WHERE dm.status IS NOT NULL
+    GROUP BY dm.status;
+$$;
+
+SELECT dispute_kpi_counters_rebuild();
@@ -0,0 +1,59 @@
+-- ============================================================
+-- Versiones de datos de referencia
+--
+-- data_versions guarda un contador por conjunto de datos. Un
+-- trigger por sentencia lo incrementa en cualquier INSERT /
+-- UPDATE / DELETE / TRUNCATE de las tablas del conjunto. Los
+-- caches en memoria (services/geography.py) consultan esta fila
+-- (lookup por PK) y recargan solo cuando la versión cambió.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    name        TEXT PRIMARY KEY,
+    version     BIGINT    NOT NULL DEFAULT 1,
+    updated_at  TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO data_versions AS v (name)
+    VALUES (TG_ARGV[0])
+    ON CONFLICT (name) DO UPDATE
+    SET version    = v.version + 1,
+        updated_at = NOW();
+    RETURN NULL;
+END
+$$;
+
+INSERT INTO data_versions (name)
+VALUES ('geography')
+ON CONFLICT (name) DO NOTHING;
+
+-- ------------------------------------------------------------
+-- geography: continente / pais / puerto (/continentes, /paises,
+-- /puertos) y continentes_paises_puertos (/cpp/*)
+-- ------------------------------------------------------------
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'continente', 'pais', 'puerto', 'continentes_paises_puertos'
+    ]
+    LOOP
+        EXECUTE format(
+            'DROP TRIGGER IF EXISTS trg_%s_data_version ON %I', t, t
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_data_version
+                 AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                 FOR EACH STATEMENT
+                 EXECUTE FUNCTION bump_data_version(%L)',
+            t, t, 'geography'
+        );
+    END LOOP;
+END
+$$;
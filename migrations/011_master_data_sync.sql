@@ -0,0 +1,102 @@
+-- ============================================================
+-- Delta sync de maestros (GET /sync/master-data?since=)
+--
+-- Cada tabla maestra lleva updated_at y change_version. Un trigger
+-- BEFORE INSERT/UPDATE los asigna; change_version es el id de la
+-- transacción que escribió la fila (pg_current_xact_id, 64 bits,
+-- monótono). Los DELETE dejan una marca en master_data_deletions
+-- con la misma versión.
+--
+-- El endpoint lee en REPEATABLE READ y devuelve como nueva versión
+-- el xmin de su snapshot: toda transacción anterior ya terminó y
+-- sus filas están incluidas; las que seguían abiertas tienen
+-- versión >= xmin y salen en el próximo sync. Ningún cambio se
+-- pierde aunque las transacciones confirmen fuera de orden.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS master_data_deletions (
+    id              BIGSERIAL PRIMARY KEY,
+    table_name      TEXT      NOT NULL,
+    codigo          TEXT      NOT NULL,
+    change_version  BIGINT    NOT NULL,
+    deleted_at      TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_master_data_deletions_version
+    ON master_data_deletions (table_name, change_version);
+
+CREATE OR REPLACE FUNCTION master_data_set_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    NEW.change_version := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION master_data_log_deletion()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO master_data_deletions (table_name, codigo, change_version)
+    VALUES (TG_TABLE_NAME, OLD.codigo, pg_current_xact_id()::text::bigint);
+    RETURN NULL;
+END
+$$;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'cliente', 'proveedor', 'surveyor', 'empleados', 'serviciosmd'
+    ]
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %I
+                 ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT NOW(),
+                 ADD COLUMN IF NOT EXISTS change_version BIGINT',
+            t
+        );
+
+        -- Filas existentes: versión inicial (la de esta migración)
+        EXECUTE format(
+            'UPDATE %I
+             SET change_version = pg_current_xact_id()::text::bigint
+             WHERE change_version IS NULL',
+            t
+        );
+
+        EXECUTE format(
+            'CREATE INDEX IF NOT EXISTS idx_%s_change_version
+                 ON %I (change_version)',
+            t, t
+        );
+
+        EXECUTE format(
+            'DROP TRIGGER IF EXISTS trg_%s_set_version ON %I', t, t
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_set_version
+                 BEFORE INSERT OR UPDATE ON %I
+                 FOR EACH ROW
+                 EXECUTE FUNCTION master_data_set_version()',
+            t, t
+        );
+
+        EXECUTE format(
+            'DROP TRIGGER IF EXISTS trg_%s_log_deletion ON %I', t, t
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_log_deletion
+                 AFTER DELETE ON %I
+                 FOR EACH ROW
+                 EXECUTE FUNCTION master_data_log_deletion()',
+            t, t
+        );
+    END LOOP;
+END
+$$;
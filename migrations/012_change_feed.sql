@@ -0,0 +1,134 @@
+-- ============================================================
+-- Change feed (outbox) de las grillas transaccionales
+--
+-- Triggers por fila escriben en change_feed cada INSERT / UPDATE
+-- (solo si algo cambió) / DELETE de:
+--   collections        → dominio collections  (clave numero_documento)
+--   invoicing          → dominio billing      (clave id)
+--   payment_obligations→ dominio itp          (clave id)
+--   dispute_management → dominio disputes     (clave id)
+--   disputa            → dominio disputes     (clave id)
+--
+-- seq ordena los cambios; txid (pg_current_xact_id) es la versión
+-- que usa GET /changes?since= con el mismo criterio que
+-- /sync/master-data (migrations/011): la nueva versión es el xmin
+-- del snapshot, así que un cambio puede llegar dos veces (el
+-- cliente descarta seq ya vistos) pero nunca se pierde.
+--
+-- Retención: SELECT change_feed_prune(INTERVAL '7 days');
+-- guarda en data_versions('change_feed_pruned') desde qué versión
+-- hay historial completo; un since anterior pide recarga completa.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS change_feed (
+    seq         BIGSERIAL PRIMARY KEY,
+    txid        BIGINT    NOT NULL DEFAULT pg_current_xact_id()::text::bigint,
+    domain      TEXT      NOT NULL,
+    table_name  TEXT      NOT NULL,
+    row_key     TEXT      NOT NULL,
+    op          CHAR(1)   NOT NULL,            -- I / U / D
+    row_data    JSONB,                         -- NULL en D
+    changed_at  TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_feed_domain_txid
+    ON change_feed (domain, txid);
+
+CREATE INDEX IF NOT EXISTS idx_change_feed_changed_at
+    ON change_feed (changed_at);
+
+-- TG_ARGV[0] = dominio, TG_ARGV[1] = columna clave
+CREATE OR REPLACE FUNCTION change_feed_capture()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_row JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_row := to_jsonb(OLD);
+    ELSE
+        v_row := to_jsonb(NEW);
+    END IF;
+
+    INSERT INTO change_feed (domain, table_name, row_key, op, row_data)
+    VALUES (
+        TG_ARGV[0],
+        TG_TABLE_NAME,
+        v_row ->> TG_ARGV[1],
+        left(TG_OP, 1),
+        CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE v_row END
+    );
+
+    RETURN NULL;
+END
+$$;
+
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT * FROM (VALUES
+            ('collections',         'collections', 'numero_documento'),
+            ('invoicing',           'billing',     'id'),
+            ('payment_obligations', 'itp',         'id'),
+            ('dispute_management',  'disputes',    'id'),
+            ('disputa',             'disputes',    'id')
+        ) AS t(table_name, domain, key_column)
+    LOOP
+        EXECUTE format(
+            'DROP TRIGGER IF EXISTS trg_%s_change_feed ON %I',
+            r.table_name, r.table_name
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_change_feed
+                 AFTER INSERT OR DELETE ON %I
+                 FOR EACH ROW
+                 EXECUTE FUNCTION change_feed_capture(%L, %L)',
+            r.table_name, r.table_name, r.domain, r.key_column
+        );
+
+        EXECUTE format(
+            'DROP TRIGGER IF EXISTS trg_%s_change_feed_upd ON %I',
+            r.table_name, r.table_name
+        );
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_change_feed_upd
+                 AFTER UPDATE ON %I
+                 FOR EACH ROW
+                 WHEN (OLD.* IS DISTINCT FROM NEW.*)
+                 EXECUTE FUNCTION change_feed_capture(%L, %L)',
+            r.table_name, r.table_name, r.domain, r.key_column
+        );
+    END LOOP;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION change_feed_prune(keep INTERVAL)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_watermark BIGINT;
+    v_deleted   BIGINT;
+BEGIN
+    WITH borrados AS (
+        DELETE FROM change_feed
+        WHERE changed_at < NOW() - keep
+        RETURNING txid
+    )
+    SELECT MAX(txid) + 1, COUNT(*) INTO v_watermark, v_deleted
+    FROM borrados;
+
+    IF v_watermark IS NOT NULL THEN
+        INSERT INTO data_versions AS v (name, version)
+        VALUES ('change_feed_pruned', v_watermark)
+        ON CONFLICT (name) DO UPDATE
+        SET version    = GREATEST(v.version, EXCLUDED.version),
+            updated_at = NOW();
+    END IF;
+
+    RETURN v_deleted;
+END
+$$;
@@ -0,0 +1,16 @@
+-- ============================================================
+-- Recuperación de PDFs de factura pendientes
+--
+-- pdf_requested_at = cuándo se encoló el último render. Una factura
+-- PENDING con pdf_requested_at más viejo que
+-- FACTURA_PDF_STALE_MINUTES (routers/factura.py) se vuelve a encolar
+-- al arrancar la API, al pedir la descarga o con
+-- POST /factura/pdf/{id}/render (que también reintenta ERROR).
+-- ============================================================
+
+ALTER TABLE factura
+    ADD COLUMN IF NOT EXISTS pdf_requested_at TIMESTAMP DEFAULT NOW();
+
+CREATE INDEX IF NOT EXISTS idx_factura_pdf_pending
+    ON factura (pdf_requested_at)
+    WHERE pdf_status = 'PENDING';
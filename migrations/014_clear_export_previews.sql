@@ -0,0 +1,16 @@
+-- ============================================================
+-- Limpia previews NO fiscales registradas como PDF del documento
+--
+-- POST /billing/pdf/export guardaba en invoicing.pdf_path la
+-- preview (Documento_<tipo>_<n>.pdf) que genera para documentos
+-- no MANUAL, y GET /billing/pdf/{numero_documento} la servía como
+-- la factura. Ahora la preview solo va al ZIP; aquí se desvinculan
+-- las que ya quedaron registradas.
+-- ============================================================
+
+UPDATE invoicing i
+   SET pdf_path = NULL
+  FROM attachments a
+ WHERE a.storage_path = i.pdf_path
+   AND a.original_name LIKE 'Documento\_%'
+   AND UPPER(COALESCE(i.tipo_factura, '')) <> 'MANUAL';
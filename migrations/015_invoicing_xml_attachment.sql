@@ -0,0 +1,12 @@
+-- ============================================================
+-- XML original de los documentos electrónicos
+--
+-- POST /factura/electronica y POST /invoicing/anticipada/xml
+-- guardan el XML subido en el almacén de adjuntos
+-- (services/attachments.py); esta columna enlaza el documento con
+-- ese adjunto (descarga vía GET /attachments/{sha256}).
+-- ============================================================
+
+ALTER TABLE invoicing
+    ADD COLUMN IF NOT EXISTS xml_attachment_id BIGINT
+        REFERENCES attachments (id);
@@ -0,0 +1,40 @@
+-- ============================================================
+-- Feed de conciliación bancaria: pagos sin fecha_pago
+--
+-- El feed ordena y pagina por COALESCE(fecha_pago, '0001-01-01')
+-- (routers/bank_reconciliation.py, FECHA_ORDEN_SQL) para que una
+-- fila con fecha_pago NULL no rompa el cursor ni quede fuera de las
+-- comparaciones del keyset. Reemplaza los índices de
+-- migrations/007 por los equivalentes sobre esa expresión.
+-- ============================================================
+
+DROP INDEX IF EXISTS idx_cash_app_cliente_fecha_pago;
+DROP INDEX IF EXISTS idx_cash_app_fecha_pago;
+DROP INDEX IF EXISTS idx_incoming_payments_cliente_fecha_pago;
+DROP INDEX IF EXISTS idx_incoming_payments_fecha_pago;
+
+CREATE INDEX IF NOT EXISTS idx_cash_app_cliente_fecha_orden
+    ON cash_app (
+        codigo_cliente,
+        (COALESCE(fecha_pago, DATE '0001-01-01')) DESC,
+        id DESC
+    );
+
+CREATE INDEX IF NOT EXISTS idx_cash_app_fecha_orden
+    ON cash_app (
+        (COALESCE(fecha_pago, DATE '0001-01-01')) DESC,
+        id DESC
+    );
+
+CREATE INDEX IF NOT EXISTS idx_incoming_payments_cliente_fecha_orden
+    ON incoming_payments (
+        codigo_cliente,
+        (COALESCE(fecha_pago, DATE '0001-01-01')) DESC,
+        id DESC
+    );
+
+CREATE INDEX IF NOT EXISTS idx_incoming_payments_fecha_orden
+    ON incoming_payments (
+        (COALESCE(fecha_pago, DATE '0001-01-01')) DESC,
+        id DESC
+    );
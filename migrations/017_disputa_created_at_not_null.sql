@@ -0,0 +1,21 @@
+-- ============================================================
+-- disputa.created_at obligatorio
+--
+-- El listado de GET /dispute-management pagina por
+-- (d.created_at, d.id) y arma el cursor con created_at
+-- (migrations/008); los contadores de KPIs (migrations/009) también
+-- lo usan. Una disputa sin created_at rompía el cursor (500) y
+-- quedaba fuera del keyset. Las filas existentes sin fecha toman la
+-- fecha de factura (o NOW() si tampoco la tienen).
+-- ============================================================
+
+UPDATE disputa
+   SET created_at = COALESCE(fecha_factura::timestamp, NOW())
+ WHERE created_at IS NULL;
+
+ALTER TABLE disputa
+    ALTER COLUMN created_at SET DEFAULT NOW(),
+    ALTER COLUMN created_at SET NOT NULL;
+
+-- Los contadores copiaron created_at al insertar: recalcular
+SELECT dispute_kpi_counters_rebuild();
@@ -0,0 +1,153 @@
+-- ============================================================
+-- Contadores de KPI de disputas (migrations/009): orden de locks y
+-- cambios en disputa.created_at
+--
+-- 1. Un cambio de estatus resta en la fila del estatus viejo y suma
+--    en la del nuevo. Aplicado siempre viejo → nuevo, dos
+--    transiciones opuestas concurrentes (A→B y B→A) tomaban las dos
+--    filas en orden inverso y podían hacer deadlock. Ahora se
+--    aplican en orden de status.
+-- 2. Los contadores copian disputa.created_at al escribir la
+--    gestión. Un trigger en disputa mueve esa contribución cuando
+--    created_at cambia. Borrar una disputa (con sus gestiones en
+--    cascada) no puede restar su created_at: después de borrados
+--    masivos correr SELECT dispute_kpi_counters_rebuild();
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION dispute_kpi_apply_created(
+    p_status     TEXT,
+    p_created    DATE,
+    p_amount     NUMERIC,
+    p_closed_at  TIMESTAMP,
+    p_sign       INTEGER
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF p_status IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO dispute_kpi_counters AS c (
+        status,
+        dispute_count,
+        disputed_amount,
+        created_count,
+        created_days_sum,
+        closed_count,
+        close_days_sum
+    )
+    VALUES (
+        p_status,
+        p_sign,
+        p_sign * COALESCE(p_amount, 0),
+        p_sign * (p_created IS NOT NULL)::int,
+        p_sign * COALESCE(p_created - DATE '2000-01-01', 0),
+        p_sign * (p_created IS NOT NULL AND p_closed_at IS NOT NULL)::int,
+        p_sign * COALESCE(p_closed_at::date - p_created, 0)
+    )
+    ON CONFLICT (status) DO UPDATE
+    SET dispute_count    = c.dispute_count    + EXCLUDED.dispute_count,
+        disputed_amount  = c.disputed_amount  + EXCLUDED.disputed_amount,
+        created_count    = c.created_count    + EXCLUDED.created_count,
+        created_days_sum = c.created_days_sum + EXCLUDED.created_days_sum,
+        closed_count     = c.closed_count     + EXCLUDED.closed_count,
+        close_days_sum   = c.close_days_sum   + EXCLUDED.close_days_sum,
+        updated_at       = NOW();
+END
+$$;
+
+CREATE OR REPLACE FUNCTION dispute_kpi_apply(
+    p_status     TEXT,
+    p_dispute_id INTEGER,
+    p_amount     NUMERIC,
+    p_closed_at  TIMESTAMP,
+    p_sign       INTEGER
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM dispute_kpi_apply_created(
+        p_status,
+        (SELECT created_at::date FROM disputa WHERE id = p_dispute_id),
+        p_amount,
+        p_closed_at,
+        p_sign
+    );
+END
+$$;
+
+CREATE OR REPLACE FUNCTION dispute_management_kpi_trigger()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- UPDATE: primero la fila de menor status (orden de locks fijo)
+    IF TG_OP = 'UPDATE' AND NEW.status IS NOT NULL
+       AND (OLD.status IS NULL OR NEW.status < OLD.status) THEN
+        PERFORM dispute_kpi_apply(
+            NEW.status, NEW.dispute_id, NEW.disputed_amount,
+            NEW.dispute_closed_at, 1
+        );
+        PERFORM dispute_kpi_apply(
+            OLD.status, OLD.dispute_id, OLD.disputed_amount,
+            OLD.dispute_closed_at, -1
+        );
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM dispute_kpi_apply(
+            OLD.status, OLD.dispute_id, OLD.disputed_amount,
+            OLD.dispute_closed_at, -1
+        );
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM dispute_kpi_apply(
+            NEW.status, NEW.dispute_id, NEW.disputed_amount,
+            NEW.dispute_closed_at, 1
+        );
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION disputa_kpi_created_trigger()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT status, disputed_amount, dispute_closed_at
+        FROM dispute_management
+        WHERE dispute_id = NEW.id
+          AND status IS NOT NULL
+        ORDER BY status
+    LOOP
+        PERFORM dispute_kpi_apply_created(
+            r.status, OLD.created_at::date, r.disputed_amount,
+            r.dispute_closed_at, -1
+        );
+        PERFORM dispute_kpi_apply_created(
+            r.status, NEW.created_at::date, r.disputed_amount,
+            r.dispute_closed_at, 1
+        );
+    END LOOP;
+
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_disputa_kpi_created ON disputa;
+
+CREATE TRIGGER trg_disputa_kpi_created
+    AFTER UPDATE OF created_at ON disputa
+    FOR EACH ROW
+    WHEN (OLD.created_at IS DISTINCT FROM NEW.created_at)
+    EXECUTE FUNCTION disputa_kpi_created_trigger();
@@ -0,0 +1,54 @@
+-- ============================================================
+-- Change feed sin las columnas generadas *_search
+--
+-- to_jsonb(NEW) en el trigger AFTER incluye las columnas STORED de
+-- migrations/005 (nombre_cliente_search, payee_name_search, ...),
+-- que los endpoints de búsqueda no devuelven
+-- (services/search.without_search_columns). Una grilla que reemplaza
+-- la fila con row_data no debe recibirlas: se quitan al capturar y
+-- se limpian del historial ya guardado.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION change_feed_capture()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_row JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_row := to_jsonb(OLD);
+    ELSE
+        v_row := to_jsonb(NEW);
+        v_row := v_row - ARRAY(
+            SELECT k
+            FROM jsonb_object_keys(v_row) k
+            WHERE k LIKE '%\_search'
+        );
+    END IF;
+
+    INSERT INTO change_feed (domain, table_name, row_key, op, row_data)
+    VALUES (
+        TG_ARGV[0],
+        TG_TABLE_NAME,
+        v_row ->> TG_ARGV[1],
+        left(TG_OP, 1),
+        CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE v_row END
+    );
+
+    RETURN NULL;
+END
+$$;
+
+UPDATE change_feed
+SET row_data = row_data - ARRAY(
+    SELECT k
+    FROM jsonb_object_keys(row_data) k
+    WHERE k LIKE '%\_search'
+)
+WHERE row_data IS NOT NULL
+  AND EXISTS (
+      SELECT 1
+      FROM jsonb_object_keys(row_data) k
+      WHERE k LIKE '%\_search'
+  );
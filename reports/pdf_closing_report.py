@@ -1,103 +1,249 @@
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.enums import TA_CENTER
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-)
 from reportlab.lib import colors
-from datetime import datetime
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+
+# Streams binarios (sin ASCII85), igual que las facturas
+rl_config.useA85 = 0
+
+# ============================================================
+# LAYOUT
+# ============================================================
+# El reporte se dibuja fila a fila directamente sobre el canvas
+# (sin layout de platypus): cada página se cierra en cuanto se llena,
+# las líneas se consumen de un iterable y el costo es lineal. Por
+# fila solo se emite el texto y una línea horizontal; la grilla
+# vertical se traza una vez por página. El encabezado de la tabla se
+# repite en cada página y cada página cierra con su subtotal.
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 30
+
+COL_WIDTHS = [70, 180, 70, 70, 70]
+COL_TITLES = ["Cuenta", "Nombre", "Debe", "Haber", "Saldo"]
+TABLE_WIDTH = sum(COL_WIDTHS)
+TABLE_X = (PAGE_WIDTH - TABLE_WIDTH) / 2
+COL_X = [TABLE_X + sum(COL_WIDTHS[:i]) for i in range(len(COL_WIDTHS) + 1)]
+
+ROW_HEIGHT = 14
+CELL_PADDING = 4
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+FONT_SIZE = 8
+
+FOOTER_LEGAL = (
+    "Este documento fue generado automáticamente por el sistema ERP-SOM. "
+    "Constituye evidencia contable del cierre correspondiente."
+)
+
+
+def _money(value) -> str:
+    return f"{(value or 0):,.2f}"
+
+
+def _fit(text, width, font=FONT, size=FONT_SIZE) -> str:
+    """
+    Recorta el texto para que quepa en la celda.
+    """
+    text = "" if text is None else str(text)
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(text + "…", font, size) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+class _ClosingReportWriter:
+
+    def __init__(self, file_path: str, header: dict):
+        self.header = header
+        self.c = canvas.Canvas(file_path, pagesize=A4)
+        self.c.setTitle(header["title"])
+        self.page = 0
+        self.y = 0
+        self.page_totals = [0, 0, 0]
+        self.font = None
+        self.table_top = 0
+
+    # ----------------------------------------------------------
+    # Página
+    # ----------------------------------------------------------
+    def _start_page(self):
+        self.page += 1
+        c = self.c
+        top = PAGE_HEIGHT - MARGIN
+
+        if self.page == 1:
+            c.setFont(FONT_BOLD, 18)
+            c.drawCentredString(PAGE_WIDTH / 2, top - 18, self.header["title"])
+
+            info = [
+                ("Empresa", self.header["company"]),
+                ("Ejercicio", self.header["fiscal_year"]),
+                ("Período", self.header["period"]),
+                ("Ledger", self.header["ledger"]),
+                ("Batch", self.header["batch_code"]),
+                ("Usuario", self.header["posted_by"]),
+                ("Fecha", self.header["posted_at"]),
+            ]
+
+            y = top - 48
+            for label, value in info:
+                c.setFont(FONT_BOLD, 10)
+                c.drawString(MARGIN, y, f"{label}:")
+                c.setFont(FONT, 10)
+                c.drawString(MARGIN + 60, y, str(value))
+                y -= 12
+
+            self.y = y - 12
+        else:
+            c.setFont(FONT_BOLD, 9)
+            c.drawString(
+                MARGIN,
+                top - 10,
+                f"{self.header['title']} — {self.header['batch_code']}"
+            )
+            self.y = top - 24
+
+        c.setStrokeColor(colors.grey)
+        c.setLineWidth(0.5)
+        self.font = None
+        self.table_top = self.y
+        c.line(TABLE_X, self.y, TABLE_X + TABLE_WIDTH, self.y)
+
+        self._draw_row(COL_TITLES, bold=True, fill=colors.lightgrey)
+
+        self.page_totals = [0, 0, 0]
+
+    def _end_page(self, final_totals=None):
+        self._draw_row(
+            ["Subtotal página", ""] + [_money(v) for v in self.page_totals],
+            bold=True
+        )
+
+        if final_totals is not None:
+            self._draw_row(
+                ["TOTAL", ""] + [_money(v) for v in final_totals],
+                bold=True
+            )
+
+        self._draw_grid()
+
+        if final_totals is not None:
+            self.c.setFont("Helvetica-Oblique", 8)
+            self.c.drawString(MARGIN, self.y - 16, FOOTER_LEGAL)
+
+        self.c.setFont(FONT, 7)
+        self.c.drawRightString(
+            PAGE_WIDTH - MARGIN, MARGIN / 2, f"Página {self.page}"
+        )
+        self.c.showPage()
+
+    def _room_left(self) -> float:
+        # Espacio reservado para subtotal, total y footer legal
+        return self.y - MARGIN - 3 * ROW_HEIGHT - 20
+
+    # ----------------------------------------------------------
+    # Filas
+    # ----------------------------------------------------------
+    def _draw_row(self, cells, bold=False, fill=None):
+        c = self.c
+        y = self.y - ROW_HEIGHT
+
+        if fill is not None:
+            c.setFillColor(fill)
+            c.rect(TABLE_X, y, TABLE_WIDTH, ROW_HEIGHT, fill=1, stroke=0)
+            c.setFillColor(colors.black)
+
+        font = FONT_BOLD if bold else FONT
+        if font != self.font:
+            c.setFont(font, FONT_SIZE)
+            self.font = font
+
+        text_y = y + (ROW_HEIGHT - FONT_SIZE) / 2 + 1
+
+        c.drawString(
+            COL_X[0] + CELL_PADDING, text_y,
+            _fit(cells[0], COL_WIDTHS[0] - 2 * CELL_PADDING, font)
+        )
+        c.drawString(
+            COL_X[1] + CELL_PADDING, text_y,
+            _fit(cells[1], COL_WIDTHS[1] - 2 * CELL_PADDING, font)
+        )
+        for i in (2, 3, 4):
+            if bold and cells[i] == COL_TITLES[i]:
+                c.drawString(COL_X[i] + CELL_PADDING, text_y, cells[i])
+            else:
+                c.drawRightString(COL_X[i + 1] - CELL_PADDING, text_y, cells[i])
+
+        c.line(TABLE_X, y, TABLE_X + TABLE_WIDTH, y)
+        self.y = y
+
+    def _draw_grid(self):
+        """
+        Marco y columnas del tramo de tabla de la página actual.
+        """
+        c = self.c
+        c.rect(
+            TABLE_X, self.y,
+            TABLE_WIDTH, self.table_top - self.y,
+            fill=0, stroke=1
+        )
+        for x in COL_X[1:-1]:
+            c.line(x, self.y, x, self.table_top)
+
+    def add_line(self, r):
+        if self.page == 0:
+            self._start_page()
+        elif self._room_left() < ROW_HEIGHT:
+            self._end_page()
+            self._start_page()
+
+        debit = r["debit"] or 0
+        credit = r["credit"] or 0
+        balance = r["balance"] or 0
+
+        self._draw_row([
+            r["account_code"],
+            r["account_name"],
+            _money(debit),
+            _money(credit),
+            _money(balance)
+        ])
+
+        self.page_totals[0] += debit
+        self.page_totals[1] += credit
+        self.page_totals[2] += balance
+
+    def finish(self, totals: dict):
+        if self.page == 0:
+            self._start_page()
+        self._end_page(final_totals=[
+            totals["debit"],
+            totals["credit"],
+            totals["balance"]
+        ])
+        self.c.save()
 
 
 def generate_closing_batch_pdf(
     file_path: str,
     header: dict,
-    lines: list,
+    lines,
     totals: dict
 ):
     """
     Genera PDF oficial de cierre contable por batch.
-    """
 
-    doc = SimpleDocTemplate(
-        file_path,
-        pagesize=A4,
-        rightMargin=30,
-        leftMargin=30,
-        topMargin=30,
-        bottomMargin=30
-    )
-
-    styles = getSampleStyleSheet()
-    styles["Title"].alignment = TA_CENTER
-
-    elements = []
-
-    # --------------------------------------------------
-    # Título
-    # --------------------------------------------------
-    elements.append(Paragraph(
-        f"<b>{header['title']}</b>",
-        styles["Title"]
-    ))
-    elements.append(Spacer(1, 12))
-
-    # --------------------------------------------------
-    # Info general
-    # --------------------------------------------------
-    info = f"""
-    <b>Empresa:</b> {header['company']}<br/>
-    <b>Ejercicio:</b> {header['fiscal_year']}<br/>
-    <b>Período:</b> {header['period']}<br/>
-    <b>Ledger:</b> {header['ledger']}<br/>
-    <b>Batch:</b> {header['batch_code']}<br/>
-    <b>Usuario:</b> {header['posted_by']}<br/>
-    <b>Fecha:</b> {header['posted_at']}
+    `lines` puede ser cualquier iterable (p.ej. un cursor con nombre):
+    se consume una sola vez y nunca se materializa completo.
     """
-    elements.append(Paragraph(info, styles["Normal"]))
-    elements.append(Spacer(1, 15))
 
-    # --------------------------------------------------
-    # Tabla contable
-    # --------------------------------------------------
-    table_data = [
-        ["Cuenta", "Nombre", "Debe", "Haber", "Saldo"]
-    ]
+    writer = _ClosingReportWriter(file_path, header)
 
     for r in lines:
-        table_data.append([
-            r["account_code"],
-            r["account_name"],
-            f"{r['debit']:,.2f}",
-            f"{r['credit']:,.2f}",
-            f"{r['balance']:,.2f}"
-        ])
+        writer.add_line(r)
 
-    table_data.append([
-        "TOTAL", "",
-        f"{totals['debit']:,.2f}",
-        f"{totals['credit']:,.2f}",
-        f"{totals['balance']:,.2f}"
-    ])
-
-    table = Table(table_data, colWidths=[70, 180, 70, 70, 70])
-    table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-        ("ALIGN", (2, 1), (-1, -1), "RIGHT"),
-        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONT", (0, -1), (-1, -1), "Helvetica-Bold"),
-    ]))
-
-    elements.append(table)
-    elements.append(Spacer(1, 15))
-
-    # --------------------------------------------------
-    # Footer legal
-    # --------------------------------------------------
-    footer = (
-        "Este documento fue generado automáticamente por el sistema ERP-SOM. "
-        "Constituye evidencia contable del cierre correspondiente."
-    )
-    elements.append(Paragraph(footer, styles["Italic"]))
-
-    doc.build(elements)
+    writer.finish(totals)
@@ -9,6 +9,13 @@ from datetime import date
 
 from database import get_db
 from rbac_service import has_permission
+from services.columnar import (
+    DEFAULT_ROW_SHAPE,
+    RowShape,
+    fetch_columnar,
+    shaped
+)
+from services.json_response import FastJSONResponse
 
 
 router = APIRouter(
@@ -459,6 +466,7 @@ def get_accounting_ledger(
     period: str | None = None,
     origin: str | None = None,
     account_code: str | None = None,   # ✅ NUEVO FILTRO
+    shape: RowShape = DEFAULT_ROW_SHAPE,
     conn=Depends(get_db)
 ):
     """
@@ -469,9 +477,10 @@ def get_accounting_ledger(
     - period (YYYY-MM)
     - origin (COLLECTIONS, ITP, CASH_APP, MANUAL, etc.)
     - account_code (1101, 2101, 5101, etc.)
-    """
 
-    cur = conn.cursor(cursor_factory=RealDictCursor)
+    shape=columnar devuelve las líneas planas ({columns, rows}),
+    en el mismo orden, sin agrupar.
+    """
 
     conditions = []
     params = []
@@ -519,8 +528,8 @@ def get_accounting_ledger(
             l.id AS line_id,
             l.account_code,
             l.account_name,
-            l.debit,
-            l.credit,
+            COALESCE(l.debit, 0)  AS debit,
+            COALESCE(l.credit, 0) AS credit,
             l.line_description
 
         FROM accounting_entries e
@@ -532,40 +541,46 @@ def get_accounting_ledger(
             l.id ASC
     """
 
-    cur.execute(query, params)
-    rows = cur.fetchall()
+    columns, rows = fetch_columnar(conn, query, params)
+
+    if shape == "columnar":
+        return shaped(columns, rows, shape)
 
     # -----------------------------
     # AGRUPAR POR entry_id
+    # (tuplas en el orden del SELECT)
     # -----------------------------
     entries = {}
 
-    for row in rows:
-        entry_id = row["entry_id"]
+    for (
+        entry_id, entry_date, period_, entry_description, origin_,
+        origin_id, line_id, code, name, debit, credit, line_description
+    ) in rows:
 
-        if entry_id not in entries:
-            entries[entry_id] = {
+        entry = entries.get(entry_id)
+        if entry is None:
+            entry = entries[entry_id] = {
                 "entry_id": entry_id,
-                "entry_date": row["entry_date"],
-                "period": row["period"],
-                "description": row["entry_description"],
-                "origin": row["origin"],
-                "origin_id": row["origin_id"],
+                "entry_date": entry_date,
+                "period": period_,
+                "description": entry_description,
+                "origin": origin_,
+                "origin_id": origin_id,
                 "lines": []
             }
 
-        entries[entry_id]["lines"].append({
-            "line_id": row["line_id"],
-            "account_code": row["account_code"],
-            "account_name": row["account_name"],
-            "debit": float(row["debit"] or 0),
-            "credit": float(row["credit"] or 0),
-            "line_description": row["line_description"]
+        entry["lines"].append({
+            "line_id": line_id,
+            "account_code": code,
+            "account_name": name,
+            "debit": debit,
+            "credit": credit,
+            "line_description": line_description
         })
 
-    return {
+    return FastJSONResponse({
         "data": list(entries.values())
-    }
+    })
 
 
 
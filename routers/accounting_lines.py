@@ -4,10 +4,15 @@ from fastapi import (
     HTTPException,
     Header
 )
-from psycopg2.extras import RealDictCursor
 
 from database import get_db
 from rbac_service import has_permission
+from services.columnar import (
+    DEFAULT_ROW_SHAPE,
+    RowShape,
+    fetch_columnar,
+    shaped
+)
 
 
 router = APIRouter(
@@ -35,21 +40,24 @@ def require_permission(module: str, action: str):
 # Libro Diario – líneas contables REALES
 # ============================================================
 @router.get("")
-def get_accounting_lines(conn=Depends(get_db)):
+def get_accounting_lines(
+    shape: RowShape = DEFAULT_ROW_SHAPE,
+    conn=Depends(get_db)
+):
     """
     Retorna líneas contables DIRECTAMENTE desde accounting_lines.
     NO agrupa
     NO calcula
     NO inventa
+
+    shape: records (lista de objetos) | columnar ({columns, rows})
     """
 
     if not conn:
         raise HTTPException(status_code=500, detail="No DB connection")
 
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-
     try:
-        cur.execute("""
+        columns, rows = fetch_columnar(conn, """
             SELECT
                 al.id              AS line_id,
                 al.entry_id,
@@ -66,7 +74,7 @@ def get_accounting_lines(conn=Depends(get_db)):
                 al.id
         """)
 
-        return cur.fetchall()
+        return shaped(columns, rows, shape, key=None)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
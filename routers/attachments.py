@@ -0,0 +1,63 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from psycopg2.extras import RealDictCursor
+
+from database import get_db
+from services.attachments import get_attachment
+from services.http_cache import conditional_file_response, strong_etag
+
+
+router = APIRouter(
+    prefix="/attachments",
+    tags=["Attachments"]
+)
+
+# El contenido de un hash nunca cambia
+ATTACHMENT_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def _get_or_404(cur, sha256: str) -> dict:
+    row = get_attachment(cur, sha256.lower())
+    if not row:
+        raise HTTPException(404, "Adjunto no encontrado")
+    if not os.path.exists(row["storage_path"]):
+        raise HTTPException(404, "El archivo no existe en el servidor")
+    return row
+
+
+# ============================================================
+# METADATA
+# ============================================================
+@router.get("/{sha256}/meta")
+def attachment_meta(sha256: str, conn=Depends(get_db)):
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    row = _get_or_404(cur, sha256)
+    row.pop("storage_path")
+    return row
+
+
+# ============================================================
+# DESCARGA
+# ============================================================
+@router.get("/{sha256}")
+def download_attachment(
+    sha256: str,
+    request: Request,
+    conn=Depends(get_db)
+):
+    """
+    FileResponse usa http.response.pathsend (zero-copy) cuando el
+    servidor ASGI lo soporta; ETag = hash del contenido.
+    """
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    row = _get_or_404(cur, sha256)
+
+    return conditional_file_response(
+        request,
+        row["storage_path"],
+        media_type=row["mime_type"],
+        filename=row["original_name"] or row["sha256"],
+        etag=strong_etag(row["sha256"]),
+        cache_control=ATTACHMENT_CACHE_CONTROL
+    )
@@ -1,9 +1,24 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, Header
 from psycopg2.extras import RealDictCursor
 from typing import Optional
+from datetime import date
 
 from database import get_db
 from rbac_service import has_permission
+from services.columnar import (
+    DEFAULT_ROW_SHAPE,
+    RowShape,
+    fetch_columnar,
+    shaped
+)
+from services.pagination import (
+    CountStrategy,
+    DEFAULT_COUNT_STRATEGY,
+    count_total,
+    split_page,
+    where_sql
+)
+from services.search import contains_clause, contains_pattern
 
 
 router = APIRouter(
@@ -27,162 +42,237 @@ def require_permission(module: str, action: str):
 
 # ============================================================
 # GET /bank-reconciliation
-# LISTADO PAGINADO cash_app + incoming_payments
+# FEED ÚNICO cash_app + incoming_payments (UNION ALL)
 # ============================================================
+# Orden: fecha_orden DESC, source DESC, source_id DESC, donde
+# fecha_orden = COALESCE(fecha_pago, 0001-01-01): los pagos sin fecha
+# van al final y el cursor nunca es NULL.
+# Keyset: ?after=<next_cursor>  ("fecha_orden|source|source_id").
+# Cada rama trae como máximo limit filas ya ordenadas por su índice
+# (codigo_cliente, fecha_orden, id) y la unión se corta al final:
+# una consulta por página (más el COUNT según ?count=), nunca más
+# de page_size filas.
+
+SOURCE_CASH_APP = "CASH_APP"
+SOURCE_INCOMING = "INCOMING"
+
+# Misma expresión que los índices de migrations/016
+FECHA_ORDEN_SQL = "COALESCE(fecha_pago, DATE '0001-01-01')"
+
+FEED_COLUMNS = """
+    {numero_documento} AS numero_documento,
+    codigo_cliente,
+    nombre_cliente,
+    banco,
+    fecha_pago,
+    {comision} AS comision,
+    {referencia} AS referencia,
+    {monto} AS monto_pagado,
+    {tipo_aplicacion} AS tipo_aplicacion,
+    created_at,
+
+    -- Calculados solo para UI
+    0::numeric AS monto_aplicado,
+    {monto} AS saldo,
+    {estado} AS estado
+"""
+
+CASH_APP_COLUMNS = FEED_COLUMNS.format(
+    numero_documento="numero_documento",
+    comision="comision",
+    referencia="referencia",
+    monto="monto_pagado",
+    tipo_aplicacion="tipo_aplicacion",
+    estado="CASE WHEN monto_pagado > 0 THEN 'APLICADO' ELSE 'DESAPLICADO' END"
+)
+
+INCOMING_COLUMNS = FEED_COLUMNS.format(
+    numero_documento="documento",
+    comision="NULL::numeric",
+    referencia="numero_referencia",
+    monto="monto",
+    tipo_aplicacion="'PAGO'",
+    estado="estado"
+)
+
+
+FEED_OUTPUT_COLUMNS = [
+    "numero_documento", "codigo_cliente", "nombre_cliente", "banco",
+    "fecha_pago", "comision", "referencia", "monto_pagado",
+    "tipo_aplicacion", "created_at", "monto_aplicado", "saldo", "estado"
+]
+
+
+def _encode_cursor(fecha_pago, source, source_id) -> str:
+    return f"{fecha_pago.isoformat()}|{source}|{source_id}"
+
+
+def _decode_cursor(after: str) -> tuple:
+    try:
+        fecha_pago, source, source_id = after.split("|")
+        return date.fromisoformat(fecha_pago), source, int(source_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def _keyset_condition(source: str, cursor) -> str:
+    """
+    (fecha_orden, source, source_id) < cursor, resuelto por rama:
+    dentro de una rama source es constante, así que queda una
+    condición sobre (fecha_orden, id) que usa el índice.
+    """
+    if cursor is None:
+        return None
+
+    _, after_source, _ = cursor
+    if source < after_source:
+        return f"{FECHA_ORDEN_SQL} <= %(after_fecha)s"
+    if source > after_source:
+        return f"{FECHA_ORDEN_SQL} < %(after_fecha)s"
+    return f"({FECHA_ORDEN_SQL}, id) < (%(after_fecha)s, %(after_id)s)"
+
+
+def _branch_sql(table: str, source: str, columns: str,
+                referencia_col: str, filters: dict, cursor=None,
+                paged: bool = True) -> str:
+    conditions = []
+
+    if filters.get("codigo_cliente"):
+        conditions.append("codigo_cliente = %(codigo_cliente)s")
+    if filters.get("referencia"):
+        conditions.append(contains_clause(referencia_col, "%(referencia)s"))
+
+    keyset = _keyset_condition(source, cursor)
+    if keyset:
+        conditions.append(keyset)
+
+    sql = f"""
+        SELECT
+            '{source}' AS source,
+            id AS source_id,
+            {FECHA_ORDEN_SQL} AS fecha_orden,
+            {columns}
+        FROM {table}
+        {where_sql(conditions)}
+    """
+    if paged:
+        sql += f"""
+        ORDER BY {FECHA_ORDEN_SQL} DESC, id DESC
+        LIMIT %(branch_limit)s
+        """
+    return sql
+
+
+def _count_from(filters: dict) -> str:
+    return f"""(
+        {_branch_sql("cash_app", SOURCE_CASH_APP, "1 AS x",
+                     "referencia", filters, paged=False)}
+        UNION ALL
+        {_branch_sql("incoming_payments", SOURCE_INCOMING, "1 AS x",
+                     "numero_referencia", filters, paged=False)}
+    ) feed"""
+
+
 @router.get("")
 def get_bank_reconciliation(
     codigo_cliente: Optional[str] = Query(None),
     referencia: Optional[str] = Query(None),
     ver_todos: bool = Query(False),
+    after: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
+    count: CountStrategy = Query(DEFAULT_COUNT_STRATEGY),
+    shape: RowShape = Query(DEFAULT_ROW_SHAPE),
     conn=Depends(get_db)
 ):
+    """
+    after: next_cursor de la página anterior (sin after → page/OFFSET).
+    count: exact | estimated | cached | none (ver services/pagination.py)
+    shape: records ({data: [...]}) | columnar ({columns, rows})
+    """
 
     # -----------------------------
     # PROTECCIÓN ANTI-LAG
     # -----------------------------
     if not ver_todos and not codigo_cliente and not referencia:
-        return {
-            "page": page,
-            "page_size": page_size,
-            "total": 0,
-            "data": []
-        }
+        return shaped(
+            ["id", "source", *FEED_OUTPUT_COLUMNS], [], shape,
+            page=page,
+            page_size=page_size,
+            total=0,
+            has_more=False,
+            next_cursor=None,
+            count_strategy=count
+        )
 
-    offset = (page - 1) * page_size
-    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cursor = _decode_cursor(after) if after else None
+    offset = 0 if cursor else (page - 1) * page_size
 
-    # ============================================================
-    # ===================== CASH_APP (NO TOCAR) ==================
-    # ============================================================
-    where_clauses = []
+    filters = {"codigo_cliente": codigo_cliente, "referencia": referencia}
     params = {}
 
     if codigo_cliente:
-        where_clauses.append("ca.codigo_cliente = %(codigo_cliente)s")
         params["codigo_cliente"] = codigo_cliente
-
     if referencia:
-        where_clauses.append("ca.referencia ILIKE %(referencia)s")
-        params["referencia"] = f"%{referencia}%"
-
-    where_sql = ""
-    if where_clauses:
-        where_sql = "WHERE " + " AND ".join(where_clauses)
-
-    cash_sql = f"""
-        SELECT
-            ca.id,
-            ca.numero_documento,
-            ca.codigo_cliente,
-            ca.nombre_cliente,
-            ca.banco,
-            ca.fecha_pago,
-            ca.comision,
-            ca.referencia,
-            ca.monto_pagado,
-            ca.tipo_aplicacion,
-            ca.created_at,
-
-            -- Calculados solo para UI
-            0::numeric AS monto_aplicado,
-            ca.monto_pagado AS saldo,
-
-            CASE
-                WHEN ca.monto_pagado > 0 THEN 'APLICADO'
-                ELSE 'DESAPLICADO'
-            END AS estado
-        FROM cash_app ca
-        {where_sql}
-        ORDER BY ca.fecha_pago DESC
+        params["referencia"] = contains_pattern(referencia)
+
+    feed_sql = f"""
+        ({_branch_sql("cash_app", SOURCE_CASH_APP, CASH_APP_COLUMNS,
+                      "referencia", filters, cursor)})
+        UNION ALL
+        ({_branch_sql("incoming_payments", SOURCE_INCOMING, INCOMING_COLUMNS,
+                      "numero_referencia", filters, cursor)})
+        ORDER BY fecha_orden DESC, source DESC, source_id DESC
         LIMIT %(limit)s OFFSET %(offset)s
     """
 
-    params_cash = params.copy()
-    params_cash["limit"] = page_size
-    params_cash["offset"] = offset
-
-    cur.execute(cash_sql, params_cash)
-    cash_rows = cur.fetchall()
-
-    count_cash_sql = f"""
-        SELECT COUNT(*) AS total
-        FROM cash_app ca
-        {where_sql}
-    """
-    cur.execute(count_cash_sql, params)
-    total_cash = cur.fetchone()["total"]
-
-    # ============================================================
-    # ================= INCOMING_PAYMENTS (AGREGADO) =============
-    # ============================================================
-    where_ip = []
-    params_ip = {}
-
-    if codigo_cliente:
-        where_ip.append("ip.codigo_cliente = %(codigo_cliente)s")
-        params_ip["codigo_cliente"] = codigo_cliente
-
-    if referencia:
-        where_ip.append("ip.numero_referencia ILIKE %(referencia)s")
-        params_ip["referencia"] = f"%{referencia}%"
-
-    where_ip_sql = ""
-    if where_ip:
-        where_ip_sql = "WHERE " + " AND ".join(where_ip)
-
-    incoming_sql = f"""
-        SELECT
-            'incoming_' || ip.id AS id,
-            ip.documento AS numero_documento,
-            ip.codigo_cliente,
-            ip.nombre_cliente,
-            ip.banco,
-            ip.fecha_pago,
-            NULL::numeric AS comision,
-            ip.numero_referencia AS referencia,
-            ip.monto AS monto_pagado,
-            'PAGO' AS tipo_aplicacion,
-            ip.created_at,
-
-            -- Calculados solo para UI
-            0::numeric AS monto_aplicado,
-            ip.monto AS saldo,
-            ip.estado
-        FROM incoming_payments ip
-        {where_ip_sql}
-        ORDER BY ip.fecha_pago DESC
-        LIMIT %(limit)s OFFSET %(offset)s
-    """
-
-    params_ip["limit"] = page_size
-    params_ip["offset"] = offset
-
-    cur.execute(incoming_sql, params_ip)
-    incoming_rows = cur.fetchall()
+    page_params = {
+        **params,
+        "branch_limit": offset + page_size + 1,
+        "limit": page_size + 1,
+        "offset": offset
+    }
+    if cursor:
+        page_params["after_fecha"], _, page_params["after_id"] = cursor
 
-    count_ip_sql = f"""
-        SELECT COUNT(*) AS total
-        FROM incoming_payments ip
-        {where_ip_sql}
-    """
-    cur.execute(count_ip_sql, params_ip)
-    total_ip = cur.fetchone()["total"]
+    columns, rows = fetch_columnar(conn, feed_sql, page_params)
+    rows, has_more = split_page(rows, page_size)
 
-    cur.close()
-
-    # ============================================================
-    # ======================= RESULTADO ==========================
-    # ============================================================
-    data = cash_rows + incoming_rows
+    cur = conn.cursor()
+    try:
+        total = count_total(cur, count, _count_from(filters), params=params)
+    finally:
+        cur.close()
 
-    return {
-        "page": page,
-        "page_size": page_size,
-        "total": total_cash + total_ip,
-        "data": data
-    }
+    # -----------------------------
+    # id visible: cash_app → id, incoming → 'incoming_<id>'
+    # (igual que antes; source queda como columna extra)
+    # -----------------------------
+    # (source, source_id, fecha_orden, ...): fecha_orden solo es clave
+    # de orden / cursor, no se devuelve
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = _encode_cursor(last[2], last[0], last[1])
+
+    data = [
+        (
+            r[1] if r[0] == SOURCE_CASH_APP else f"incoming_{r[1]}",
+            r[0],
+            *r[3:]
+        )
+        for r in rows
+    ]
+
+    return shaped(
+        ["id", "source", *columns[3:]], data, shape,
+        page=page,
+        page_size=page_size,
+        total=total,
+        has_more=has_more,
+        next_cursor=next_cursor,
+        count_strategy=count
+    )
 
 
 # ============================================================
@@ -1,10 +1,31 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, Header
+from fastapi import APIRouter, Depends, Query, HTTPException, Header, Request
+from fastapi.responses import StreamingResponse
 from psycopg2.extras import RealDictCursor
 from typing import Optional
 from datetime import date
+from concurrent.futures import as_completed
+import os
+import zipfile
 
-from database import get_db
+from database import get_db, get_conn
 from rbac_service import has_permission
+from services.json_response import FastJSONResponse
+from services.search import (
+    contains_clause,
+    contains_pattern,
+    without_search_columns
+)
+from services.pagination import (
+    CountStrategy,
+    DEFAULT_COUNT_STRATEGY,
+    count_total,
+    split_page
+)
+from services.attachments import store_file
+from services.http_cache import conditional_file_response, strong_etag
+from services.lookup_cache import TTLCache
+from services.pdf import render_pool
+from services.pdf.documento_pdf import generar_pdf_documento
 
 
 router = APIRouter(
@@ -12,6 +33,12 @@ router = APIRouter(
     tags=["Billing"]
 )
 
+# numero_documento → (pdf_path, filename, etag) para descargas repetidas
+PDF_LOOKUP_CACHE_SIZE = 2048
+PDF_LOOKUP_TTL_SECONDS = 60
+
+_pdf_lookup = TTLCache(PDF_LOOKUP_CACHE_SIZE, PDF_LOOKUP_TTL_SECONDS)
+
 # ============================================================
 # RBAC GUARD
 # ============================================================
@@ -39,6 +66,7 @@ def buscar_billing(
     tipo_documento: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=10000),
+    count: CountStrategy = Query(DEFAULT_COUNT_STRATEGY),
     conn=Depends(get_db)
 ):
     offset = (page - 1) * page_size
@@ -48,8 +76,8 @@ def buscar_billing(
     params = {}
 
     if cliente and cliente.upper() != "ALL":
-        filtros.append("nombre_cliente ILIKE %(cliente)s")
-        params["cliente"] = f"%{cliente}%"
+        filtros.append(contains_clause("nombre_cliente", "%(cliente)s"))
+        params["cliente"] = contains_pattern(cliente)
 
     if tipo_factura:
         filtros.append("tipo_factura = %(tipo_factura)s")
@@ -70,15 +98,7 @@ def buscar_billing(
     where_sql = "WHERE " + " AND ".join(filtros) if filtros else ""
 
     # -------- TOTAL --------
-    cur.execute(
-        f"""
-        SELECT COUNT(*) AS total
-        FROM invoicing
-        {where_sql}
-        """,
-        params
-    )
-    total = cur.fetchone()["total"]
+    total = count_total(cur, count, "invoicing", where_sql, params)
 
     # -------- DATA --------
     cur.execute(
@@ -98,19 +118,292 @@ def buscar_billing(
         ORDER BY fecha_emision DESC
         LIMIT %(limit)s OFFSET %(offset)s
         """,
-        {**params, "limit": page_size, "offset": offset}
+        {**params, "limit": page_size + 1, "offset": offset}
     )
 
-    data = cur.fetchall()
+    data, has_more = split_page(cur.fetchall(), page_size)
     cur.close()
 
-    return {
+    return FastJSONResponse({
         "total": total,
         "page": page,
         "page_size": page_size,
+        "has_more": has_more,
+        "count_strategy": count,
         "data": data
+    })
+
+
+# ============================================================
+# POST /billing/pdf/export
+# Exportación masiva de PDFs como ZIP (streaming)
+# ============================================================
+
+EXPORT_MAX_DOCUMENTS = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+class _ZipChunkWriter:
+    """
+    Destino no-seekable para zipfile: acumula lo escrito y lo
+    entrega por partes, sin armar el ZIP completo en memoria.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_name(doc: dict) -> str:
+    numero = str(doc["numero_documento"]).replace("/", "_")
+    return f"{doc['tipo_documento']}_{numero}.pdf"
+
+
+def _es_manual(doc: dict) -> bool:
+    return (doc.get("tipo_factura") or "").upper() == "MANUAL"
+
+
+def _registrar_pdf_documento(invoicing_id: int, pdf_path: str,
+                             filename: str):
+    # Solo MANUAL: la preview NO fiscal de un documento electrónico
+    # nunca pasa a ser su PDF
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        pdf_path = store_file(
+            cur, pdf_path, filename=filename,
+            mime_type="application/pdf", move=True
+        )["storage_path"]
+
+        cur.execute("""
+            UPDATE invoicing
+            SET pdf_path = %s
+            WHERE id = %s
+            RETURNING numero_documento
+        """, (pdf_path, invoicing_id))
+        row = cur.fetchone()
+        conn.commit()
+        if row:
+            _pdf_lookup.invalidate(row[0])
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _remove_quiet(path: str):
+    try:
+        os.remove(path)
+    except (FileNotFoundError, TypeError):
+        pass
+
+
+def _finalizar_render(doc: dict, path: str):
+    """
+    Ya en el ZIP: MANUAL se registra (mueve al almacén); la preview
+    electrónica se borra.
+    """
+    if _es_manual(doc):
+        try:
+            _registrar_pdf_documento(doc["id"], path, _zip_name(doc))
+        except Exception as e:
+            print("❌ Error registrando PDF de documento:", doc["id"], e)
+    _remove_quiet(path)
+
+
+def _descartar_render(fut):
+    # Render no enviado (cliente cerró la descarga): se borra
+    try:
+        _remove_quiet(fut.result()[0])
+    except Exception:
+        pass
+
+
+def _iter_zip(ready: list, pending: dict):
+    """
+    ready:   [(arcname, path)] ya existentes en disco
+    pending: {future: (arcname, doc)} renders en curso
+    Se envían primero los listos y luego los renders a medida
+    que terminan. Los renders son archivos temporales únicos: se
+    registran (MANUAL) o borran al agregarse al ZIP.
+    """
+    sink = _ZipChunkWriter()
+    errores = []
+    procesados = set()
+
+    def add_file(zf, arcname, path):
+        with zf.open(arcname, "w") as dst, open(path, "rb") as src:
+            while True:
+                chunk = src.read(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                data = sink.drain()
+                if data:
+                    yield data
+        data = sink.drain()
+        if data:
+            yield data
+
+    try:
+        with zipfile.ZipFile(
+            sink, mode="w", compression=zipfile.ZIP_STORED
+        ) as zf:
+            for arcname, path in ready:
+                yield from add_file(zf, arcname, path)
+
+            for fut in as_completed(pending):
+                procesados.add(fut)
+                arcname, doc = pending[fut]
+                try:
+                    path = fut.result()[0]
+                except Exception as e:
+                    errores.append(f"{arcname}: {e}")
+                    continue
+                try:
+                    yield from add_file(zf, arcname, path)
+                finally:
+                    _finalizar_render(doc, path)
+
+            if errores:
+                zf.writestr("ERRORES.txt", "\n".join(errores))
+
+        yield sink.drain()
+    finally:
+        for fut in pending:
+            if fut not in procesados:
+                fut.add_done_callback(_descartar_render)
+
+
+@router.post("/pdf/export")
+def exportar_pdfs(payload: dict, conn=Depends(get_db)):
+    """
+    Descarga varios PDFs en un solo ZIP.
+
+    Payload (filtro o lista de ids de invoicing):
+    {
+        ids: [1, 2, 3],               # opcional
+        cliente: "ACME",              # opcional
+        fecha_desde: "2025-01-01",    # opcional
+        fecha_hasta: "2025-01-31",    # opcional
+        tipo_documento: "FACTURA"     # opcional
     }
 
+    Los PDFs faltantes se generan en paralelo en el pool de render.
+    Los MANUAL quedan registrados en invoicing.pdf_path; los
+    electrónicos van al ZIP como PREVIEW_… (NO fiscal) y no se
+    registran.
+    """
+
+    filtros = []
+    params = {}
+
+    ids = payload.get("ids")
+    if ids:
+        filtros.append("id = ANY(%(ids)s)")
+        params["ids"] = [int(i) for i in ids]
+
+    cliente = payload.get("cliente")
+    if cliente and cliente.upper() != "ALL":
+        filtros.append(contains_clause("nombre_cliente", "%(cliente)s"))
+        params["cliente"] = contains_pattern(cliente)
+
+    if payload.get("tipo_documento"):
+        filtros.append("tipo_documento = %(tipo_documento)s")
+        params["tipo_documento"] = payload["tipo_documento"]
+
+    if payload.get("fecha_desde"):
+        filtros.append("fecha_emision >= %(fecha_desde)s")
+        params["fecha_desde"] = payload["fecha_desde"]
+
+    if payload.get("fecha_hasta"):
+        filtros.append("fecha_emision <= %(fecha_hasta)s")
+        params["fecha_hasta"] = payload["fecha_hasta"]
+
+    if not filtros:
+        raise HTTPException(400, "Debe indicar ids o al menos un filtro")
+
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        f"""
+        SELECT
+            id,
+            tipo_factura,
+            tipo_documento,
+            numero_documento,
+            nombre_cliente,
+            fecha_emision,
+            moneda,
+            total,
+            termino_pago,
+            num_informe,
+            buque_contenedor,
+            operacion,
+            periodo_operacion,
+            descripcion_servicio,
+            pdf_path
+        FROM invoicing
+        WHERE {" AND ".join(filtros)}
+        ORDER BY fecha_emision, numero_documento
+        LIMIT %(limit)s
+        """,
+        {**params, "limit": EXPORT_MAX_DOCUMENTS + 1}
+    )
+    docs = cur.fetchall()
+    cur.close()
+
+    if not docs:
+        raise HTTPException(404, "No hay documentos para exportar")
+
+    if len(docs) > EXPORT_MAX_DOCUMENTS:
+        raise HTTPException(
+            400,
+            f"Máximo {EXPORT_MAX_DOCUMENTS} documentos por exportación"
+        )
+
+    ready = []
+    pending = {}
+    seen = set()
+
+    for doc in docs:
+        arcname = _zip_name(doc)
+        if arcname in seen:
+            arcname = f"{doc['id']}_{arcname}"
+        seen.add(arcname)
+
+        path = doc.get("pdf_path")
+        if path and os.path.exists(path):
+            ready.append((arcname, path))
+            continue
+
+        if not _es_manual(doc):
+            arcname = f"PREVIEW_{arcname}"
+
+        fut = render_pool.submit(generar_pdf_documento, dict(doc))
+        pending[fut] = (arcname, doc)
+
+    filename = f"documentos_{date.today().isoformat()}.zip"
+
+    return StreamingResponse(
+        _iter_zip(ready, pending),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Documents-Total": str(len(docs)),
+            "X-Documents-Rendered": str(len(pending))
+        }
+    )
+
 
 # ============================================================
 # GET /billing/{numero_documento}
@@ -133,7 +426,7 @@ def get_factura(numero_documento: str, conn=Depends(get_db)):
     if not factura:
         raise HTTPException(404, "Factura no encontrada")
 
-    return factura
+    return without_search_columns(factura)
 
 
 # ======================================================
@@ -142,39 +435,61 @@ def get_factura(numero_documento: str, conn=Depends(get_db)):
 @router.get("/pdf/{numero_documento}")
 def obtener_pdf_factura(
     numero_documento: str,
-    conn=Depends(get_db)
+    request: Request
 ):
+    """
+    ETag fuerte (SHA-256 del adjunto o stat del archivo),
+    Last-Modified, 304 y Range. numero_documento → ruta se cachea
+    en memoria: una previsualización repetida no toca la BD.
+    """
+
+    entry = _pdf_lookup.get(numero_documento)
+
+    if entry is None:
+        conn = get_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(
+                """
+                SELECT i.pdf_path, a.original_name, a.sha256
+                FROM invoicing i
+                LEFT JOIN attachments a ON a.storage_path = i.pdf_path
+                WHERE i.numero_documento = %s
+                """,
+                (numero_documento,)
+            )
+            row = cur.fetchone()
+        finally:
+            cur.close()
+            conn.close()
 
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-
-    cur.execute(
-        """
-        SELECT pdf_path
-        FROM invoicing
-        WHERE numero_documento = %s
-        """,
-        (numero_documento,)
-    )
-
-    row = cur.fetchone()
-    cur.close()
+        if not row or not row.get("pdf_path"):
+            raise HTTPException(
+                status_code=404,
+                detail="PDF no encontrado"
+            )
 
-    if not row or not row.get("pdf_path"):
-        raise HTTPException(
-            status_code=404,
-            detail="PDF no encontrado"
+        pdf_path = row["pdf_path"]
+        entry = (
+            pdf_path,
+            row.get("original_name") or os.path.basename(pdf_path),
+            strong_etag(row["sha256"]) if row.get("sha256") else None
         )
+        _pdf_lookup.set(numero_documento, entry)
 
-    pdf_path = row["pdf_path"]
+    pdf_path, filename, etag = entry
 
-    if not os.path.exists(pdf_path):
+    try:
+        return conditional_file_response(
+            request,
+            pdf_path,
+            media_type="application/pdf",
+            filename=filename,
+            etag=etag
+        )
+    except FileNotFoundError:
+        _pdf_lookup.invalidate(numero_documento)
         raise HTTPException(
             status_code=404,
             detail="El archivo PDF no existe en el servidor"
         )
-
-    return FileResponse(
-        path=pdf_path,
-        media_type="application/pdf",
-        filename=os.path.basename(pdf_path)
-    )
\ No newline at end of file
@@ -0,0 +1,147 @@
+# ============================================================
+# ROUTER: Change feed para parchar grillas abiertas
+# (collections, billing, invoice-to-pay, disputas)
+# ============================================================
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from psycopg2.extensions import ISOLATION_LEVEL_REPEATABLE_READ
+from starlette.concurrency import run_in_threadpool
+
+import database
+from services.change_feed import ChangeDomain, changes_since, poller_for
+from services.json_response import FastJSONResponse, dumps
+
+router = APIRouter(prefix="/changes", tags=["Change Feed"])
+
+CHANGE_STREAM_KEEPALIVE_SECONDS = 30
+
+
+def _read_changes(domain: str, since: int) -> dict:
+    conn = database.get_conn()
+    try:
+        conn.set_session(
+            isolation_level=ISOLATION_LEVEL_REPEATABLE_READ,
+            readonly=True
+        )
+        data = changes_since(conn, domain, since)
+        conn.commit()
+        return data
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# ============================================================
+# GET /changes?domain=collections&since=<version>
+# ============================================================
+@router.get("")
+def get_changes(
+    domain: ChangeDomain,
+    since: int = Query(0, ge=0)
+):
+    """
+    Ver el protocolo en services/change_feed.py.
+    """
+    try:
+        data = _read_changes(domain, since)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return FastJSONResponse(data)
+
+
+# ============================================================
+# GET /changes/stream?domain=collections&since=<version>
+# Server-Sent Events: un poller compartido por dominio
+# (services/change_feed.py) consulta el feed y reparte a todos los
+# streams abiertos; cada stream solo hace su lectura inicial
+# ============================================================
+def _sse(event: str, data: dict, event_id=None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return (
+        f"{head}event: {event}\n".encode()
+        + b"data: " + dumps(data) + b"\n\n"
+    )
+
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    domain: ChangeDomain,
+    since: int = Query(0, ge=0),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Eventos:
+      changes → {version, changes: [...]}
+      reset   → {version}: recargar la grilla completa
+    El id de cada evento es la version; al reconectar, el navegador /
+    cliente envía Last-Event-ID y el stream continúa desde ahí.
+    """
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    poller = poller_for(domain)
+
+    async def eventos():
+        data = await run_in_threadpool(_read_changes, domain, since)
+        version = data["version"]
+        enviados = {r["seq"] for r in data["changes"]}
+
+        # El poller reparte a esta cola todo lo de txid >= version: lo
+        # que se confirme después de la lectura inicial llega por ahí
+        # (quizá repetido, nunca perdido)
+        queue = poller.subscribe(version)
+        try:
+            if data["reset"]:
+                yield _sse("reset", {"version": version}, version)
+            elif data["changes"]:
+                yield _sse("changes", {
+                    "version": version,
+                    "changes": data["changes"]
+                }, version)
+
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), CHANGE_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+
+                version = max(version, message["version"])
+
+                if message["event"] == "reset":
+                    enviados = set()
+                    yield _sse("reset", {"version": version}, version)
+                    continue
+
+                # La primera entrega del poller puede repetir seq de la
+                # lectura inicial
+                changes = [
+                    r for r in message["changes"]
+                    if r["seq"] not in enviados
+                ]
+                if changes:
+                    yield _sse("changes", {
+                        "version": version,
+                        "changes": changes
+                    }, version)
+        finally:
+            poller.unsubscribe(queue)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
@@ -3,6 +3,14 @@ from fastapi import APIRouter, HTTPException
 import database
 from fastapi import APIRouter, HTTPException, Depends, Header
 from rbac_service import has_permission
+from psycopg2.extras import RealDictCursor
+from services.json_response import FastJSONResponse
+from services.pagination import (
+    CountStrategy,
+    DEFAULT_COUNT_STRATEGY,
+    count_total,
+    keyset_page
+)
 
 router = APIRouter(prefix="/clientes", tags=["Clientes"])
 
@@ -88,59 +96,61 @@ def get_ultimo_cliente():
 # LISTAR CLIENTES — PAGINADO
 # ============================================================
 @router.get("")
-def get_clientes(page: int = 1, page_size: int = 50):
-    offset = (page - 1) * page_size
+def get_clientes(
+    after: str | None = None,
+    page: int = 1,
+    page_size: int = 50,
+    count: CountStrategy = DEFAULT_COUNT_STRATEGY
+):
+    """
+    after: codigo de la última fila recibida (next_cursor).
+    Sin after se usa page (OFFSET), por compatibilidad.
+    count: exact | estimated | cached | none (ver services/pagination.py)
+    """
+    conn = database.get_conn()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        rows, has_more, next_cursor = keyset_page(
+            cur,
+            """
+            SELECT
+                codigo,
+                nombrejuridico,
+                nombrecomercial,
+                pais,
+                correo,
+                telefono,
+                cedulajuridicavat,
+                actividad_economica,
+                comentarios,
+                provincia,
+                canton,
+                distrito,
+                direccionexacta,
+                fecha_pago,
+                prefijo,
+                contacto_principal,
+                contacto_secundario
+            FROM cliente
+            """,
+            key="codigo",
+            page_size=page_size,
+            after=after,
+            offset=(page - 1) * page_size
+        )
 
-    rows = database.sql("""
-        SELECT
-            codigo,
-            nombrejuridico,
-            nombrecomercial,
-            pais,
-            correo,
-            telefono,
-            cedulajuridicavat,
-            actividad_economica,
-            comentarios,
-            provincia,
-            canton,
-            distrito,
-            direccionexacta,
-            fecha_pago,
-            prefijo,
-            contacto_principal,
-            contacto_secundario
-        FROM cliente
-        ORDER BY codigo ASC
-        LIMIT %s OFFSET %s
-    """, (page_size, offset), fetch=True)
-
-    total = database.sql("SELECT COUNT(*) FROM cliente", fetch=True)[0][0]
-
-    data = [
-        {
-            "codigo": r[0],
-            "nombrejuridico": r[1],
-            "nombrecomercial": r[2],
-            "pais": r[3],
-            "correo": r[4],
-            "telefono": r[5],
-            "cedulajuridicavat": r[6],
-            "actividad_economica": r[7],
-            "comentarios": r[8],
-            "provincia": r[9],
-            "canton": r[10],
-            "distrito": r[11],
-            "direccionexacta": r[12],
-            "fecha_pago": r[13],
-            "prefijo": r[14],
-            "contacto_principal": r[15],
-            "contacto_secundario": r[16],
-        }
-        for r in rows
-    ]
-
-    return {"total": total, "data": data}
+        total = count_total(cur, count, "cliente")
+    finally:
+        cur.close()
+        conn.close()
+
+    return FastJSONResponse({
+        "total": total,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "count_strategy": count,
+        "data": rows
+    })
 
 
 # ============================================================
@@ -4,13 +4,18 @@ from fastapi import (
     HTTPException,
     Header
 )
+import psycopg2
+import psycopg2.errors
 from psycopg2.extras import RealDictCursor
 from typing import List, Dict, Any
-from datetime import date, datetime
+from datetime import date
 from calendar import monthrange
+from concurrent.futures import ThreadPoolExecutor
 
-from database import get_db
+from database import get_db, get_conn
 from rbac_service import has_permission
+from services.json_response import FastJSONResponse
+from services.numbering import next_number
 
 
 router = APIRouter(
@@ -33,14 +38,51 @@ def require_permission(module: str, action: str):
     return checker
 
 
-@router.post("/period/close")
-def close_period(payload: dict, conn=Depends(get_db)):
-    required = ["company_code", "fiscal_year", "period", "ledger", "closed_by"]
-    for f in required:
-        if f not in payload:
-            raise HTTPException(400, f"Missing field: {f}")
+# ============================================================
+# LOCK POR (company_code, ledger)
+# ============================================================
+# Cada par (empresa, ledger) se serializa con un advisory lock
+# transaccional. Pares distintos cierran en paralelo; un cierre
+# duplicado del mismo par falla de inmediato en lugar de esperar.
 
-    cur = conn.cursor(cursor_factory=RealDictCursor)
+CLOSING_LOCK_NAMESPACE = "closing_status"
+
+# Máximo de workers para cierres por lote
+CLOSE_BATCH_MAX_WORKERS = 8
+
+
+def try_lock_closing_key(cur, company_code: str, ledger: str) -> bool:
+    """
+    Intenta tomar pg_advisory_xact_lock para (company_code, ledger).
+    El lock se libera automáticamente al commit/rollback.
+    """
+    cur.execute(
+        "SELECT pg_try_advisory_xact_lock(hashtext(%s), hashtext(%s)) AS locked",
+        (CLOSING_LOCK_NAMESPACE, f"{company_code}|{ledger}")
+    )
+    row = cur.fetchone()
+    locked = row["locked"] if isinstance(row, dict) else row[0]
+    return bool(locked)
+
+
+def require_closing_lock(cur, company_code: str, ledger: str):
+    """
+    Igual que try_lock_closing_key pero responde 409 si el par ya
+    está en cierre. Lo usan todos los pasos (period, gl, tb, pnl, fs,
+    fy): dos pasos del mismo par nunca corren a la vez.
+    """
+    if not try_lock_closing_key(cur, company_code, ledger):
+        raise HTTPException(
+            409,
+            "Ya existe un cierre en curso para esta empresa/ledger."
+        )
+
+
+def _close_period_tx(cur, company_code, fiscal_year, period, ledger, closed_by):
+    """
+    Cierra (o crea cerrado) el período dentro de la transacción actual.
+    Requiere que el lock del par (company_code, ledger) ya esté tomado.
+    """
 
     # 1️⃣ Intentar cerrar si existe
     cur.execute("""
@@ -54,11 +96,11 @@ def close_period(payload: dict, conn=Depends(get_db)):
           AND ledger = %s
         RETURNING id
     """, (
-        payload["closed_by"],
-        payload["company_code"],
-        payload["fiscal_year"],
-        payload["period"],
-        payload["ledger"]
+        closed_by,
+        company_code,
+        fiscal_year,
+        period,
+        ledger
     ))
 
     row = cur.fetchone()
@@ -91,14 +133,47 @@ def close_period(payload: dict, conn=Depends(get_db)):
             )
             RETURNING id
         """, (
+            company_code,
+            fiscal_year,
+            period,
+            ledger,
+            closed_by
+        ))
+        row = cur.fetchone()
+
+    return row["id"]
+
+
+@router.post("/period/close")
+def close_period(payload: dict, conn=Depends(get_db)):
+    required = ["company_code", "fiscal_year", "period", "ledger", "closed_by"]
+    for f in required:
+        if f not in payload:
+            raise HTTPException(400, f"Missing field: {f}")
+
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        require_closing_lock(cur, payload["company_code"], payload["ledger"])
+
+        _close_period_tx(
+            cur,
             payload["company_code"],
             payload["fiscal_year"],
             payload["period"],
             payload["ledger"],
             payload["closed_by"]
-        ))
+        )
+
+        conn.commit()
+
+    except HTTPException:
+        conn.rollback()
+        raise
 
-    conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(500, f"Error cerrando período: {e}")
 
     return {
         "status": "ok",
@@ -106,6 +181,142 @@ def close_period(payload: dict, conn=Depends(get_db)):
     }
 
 
+def _close_period_worker(company_code, ledger, fiscal_year, period, closed_by):
+    """
+    Cierra un par (company_code, ledger) en su propia conexión/transacción.
+    Nunca lanza: devuelve el resultado por par.
+    """
+    result = {
+        "company_code": company_code,
+        "ledger": ledger
+    }
+
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+
+        if not try_lock_closing_key(cur, company_code, ledger):
+            conn.rollback()
+            result.update(
+                status="locked",
+                message="Ya existe un cierre en curso para esta empresa/ledger."
+            )
+            return result
+
+        status_id = _close_period_tx(
+            cur, company_code, fiscal_year, period, ledger, closed_by
+        )
+        conn.commit()
+
+        result.update(
+            status="ok",
+            closing_status_id=status_id,
+            message="Periodo cerrado correctamente"
+        )
+        return result
+
+    except Exception as e:
+        if conn is not None:
+            conn.rollback()
+        result.update(status="error", message=str(e))
+        return result
+
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+
+
+# ============================================================
+# POST /closing/period/close/batch
+# Cierre de período para varias empresas / ledgers en paralelo
+# ============================================================
+
+@router.post("/period/close/batch")
+def close_period_batch(payload: dict):
+    """
+    Cierra el mismo período para varios pares (empresa, ledger).
+
+    Cada par corre en su propia conexión dentro de un pool de workers
+    y toma su propio advisory lock: entidades independientes cierran
+    concurrentemente y un par ya en cierre se reporta como "locked".
+
+    Payload esperado:
+    {
+        fiscal_year: 2025,
+        period: 12,
+        closed_by: "<usuario_logeado>",
+        targets: [
+            {company_code: "MSL ...", ledger: "0L"},
+            {company_code: "MSL ...", ledger: "2L"}
+        ],
+        max_workers: 4   # opcional
+    }
+    """
+
+    required = ["fiscal_year", "period", "closed_by", "targets"]
+    for f in required:
+        if f not in payload:
+            raise HTTPException(400, f"Missing field: {f}")
+
+    targets = payload["targets"]
+    if not isinstance(targets, list) or not targets:
+        raise HTTPException(400, "targets debe ser una lista no vacía.")
+
+    pairs = []
+    seen = set()
+    for t in targets:
+        if not isinstance(t, dict):
+            raise HTTPException(
+                400, "Cada target debe ser {company_code, ledger}."
+            )
+        company = t.get("company_code")
+        ledger = t.get("ledger") or "0L"
+        if not company:
+            raise HTTPException(400, "Missing field: targets[].company_code")
+        if (company, ledger) not in seen:
+            seen.add((company, ledger))
+            pairs.append((company, ledger))
+
+    try:
+        fiscal_year = int(payload["fiscal_year"])
+        period = int(payload["period"])
+        requested_workers = int(
+            payload.get("max_workers") or CLOSE_BATCH_MAX_WORKERS
+        )
+    except (TypeError, ValueError):
+        raise HTTPException(
+            400, "fiscal_year, period y max_workers deben ser enteros."
+        )
+    closed_by = payload["closed_by"]
+
+    max_workers = min(requested_workers, CLOSE_BATCH_MAX_WORKERS, len(pairs))
+
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+        results = list(pool.map(
+            lambda p: _close_period_worker(
+                p[0], p[1], fiscal_year, period, closed_by
+            ),
+            pairs
+        ))
+
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+
+    return {
+        "status": "ok" if counts.get("ok", 0) == len(results) else "partial",
+        "fiscal_year": fiscal_year,
+        "period": period,
+        "summary": counts,
+        "results": results
+    }
+
+
 @router.post("/gl/preview")
 def preview_gl_closing(payload: Dict[str, Any], conn=Depends(get_db)):
     required_fields = ["company_code", "fiscal_year", "period"]
@@ -185,27 +396,18 @@ def preview_gl_closing(payload: Dict[str, Any], conn=Depends(get_db)):
     total_credit = sum(r["credit"] for r in rows)
     diff = round(total_debit - total_credit, 2)
 
-    return {
+    return FastJSONResponse({
         "company_code": company,
         "fiscal_year": fiscal_year,
         "period": period,
         "totals": {
-            "debit": float(total_debit),
-            "credit": float(total_credit),
-            "difference": float(diff)
+            "debit": total_debit,
+            "credit": total_credit,
+            "difference": diff
         },
         "is_balanced": diff == 0,
-        "data": [
-            {
-                "account_code": r["account_code"],
-                "account_name": r["account_name"],
-                "debit": float(r["debit"]),
-                "credit": float(r["credit"]),
-                "balance": float(r["balance"])
-            }
-            for r in rows
-        ]
-    }
+        "data": rows
+    })
 # ============================================================
 # POST /closing/gl/post
 # Postea el batch de cierre de Libro Mayor (GL_CLOSING)
@@ -237,6 +439,8 @@ def post_gl_closing(
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
+        require_closing_lock(cur, company, ledger)
+
         # ----------------------------------------------------
         # 1️⃣ Validar estado del período
         # ----------------------------------------------------
@@ -297,7 +501,7 @@ def post_gl_closing(
         # ----------------------------------------------------
         batch_code = (
             f"GLCL-{fiscal_year}-{period:02d}-"
-            f"{int(datetime.utcnow().timestamp())}"
+            f"{next_number(cur, 'CLOSING_BATCH'):06d}"
         )
 
         cur.execute("""
@@ -395,6 +599,24 @@ def post_gl_closing(
 # Reversa controlada de batch de cierre
 # ============================================================
 
+# Flag de closing_status que levanta cada tipo de batch
+BATCH_STATUS_FLAGS = {
+    "GL_CLOSING": "gl_closed",
+    "TB_POST": "tb_closed",
+    "CLOSE_PNL": "pnl_closed",
+    "EQ_ADJ": "equity_closed",
+    "FS_FINAL": "fs_closed",
+    "OPEN_FY": "fy_opened"
+}
+
+# Tiempo máximo esperando locks durante una reversa
+REVERSE_LOCK_TIMEOUT = "5s"
+
+# Profundidad máxima de la cadena source_batch_id
+# (OPEN_FY → FS_FINAL → CLOSE_PNL → TB_POST → GL_CLOSING)
+REVERSE_MAX_DEPTH = 16
+
+
 @router.post("/batch/{batch_id}/reverse")
 def reverse_closing_batch(
     batch_id: int,
@@ -404,10 +626,16 @@ def reverse_closing_batch(
     """
     Reversa un batch de cierre contable.
 
+    La cadena completa de dependencias (source_batch_id) se resuelve
+    con un único CTE recursivo. Sin cascade, la reversa falla si existe
+    cualquier descendiente posteado; con cascade=true se reversa la
+    cadena entera en una sola transacción.
+
     Payload esperado:
     {
         reversed_by: "<usuario_logeado>",
-        reason: "Motivo de la reversa"
+        reason: "Motivo de la reversa",
+        cascade: false   # opcional
     }
     """
 
@@ -422,21 +650,48 @@ def reverse_closing_batch(
         "reason",
         "Reversa solicitada por el usuario"
     )
+    cascade = bool(payload.get("cascade", False))
 
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
         # ----------------------------------------------------
-        # 1️⃣ Obtener batch objetivo
+        # 0️⃣ Tiempo de lock acotado (solo esta transacción)
+        # ----------------------------------------------------
+        cur.execute(
+            "SET LOCAL lock_timeout = %s",
+            (REVERSE_LOCK_TIMEOUT,)
+        )
+
+        # ----------------------------------------------------
+        # 1️⃣ Batch objetivo + cadena de dependientes (un query)
+        #    Se bloquea en orden de id para evitar deadlocks.
         # ----------------------------------------------------
         cur.execute("""
-            SELECT *
-            FROM closing_batches
-            WHERE id = %s
-            FOR UPDATE
-        """, (batch_id,))
+            WITH RECURSIVE chain AS (
+                SELECT id, 0 AS depth
+                FROM closing_batches
+                WHERE id = %s
+
+                UNION ALL
 
-        batch = cur.fetchone()
+                SELECT cb.id, c.depth + 1
+                FROM closing_batches cb
+                JOIN chain c ON cb.source_batch_id = c.id
+                WHERE c.depth < %s
+            )
+            SELECT b.*, c.depth
+            FROM closing_batches b
+            JOIN chain c ON c.id = b.id
+            ORDER BY b.id
+            FOR UPDATE OF b
+        """, (batch_id, REVERSE_MAX_DEPTH))
+
+        chain = {}
+        for r in cur.fetchall():
+            chain.setdefault(r["id"], r)
+
+        batch = chain.get(batch_id)
 
         if not batch:
             raise HTTPException(404, "Batch no encontrado.")
@@ -448,19 +703,18 @@ def reverse_closing_batch(
             )
 
         # ----------------------------------------------------
-        # 2️⃣ Verificar dependencias (hijos posteados)
+        # 2️⃣ Verificar dependencias (toda la cadena posteada)
         # ----------------------------------------------------
-        cur.execute("""
-            SELECT id, batch_code
-            FROM closing_batches
-            WHERE source_batch_id = %s
-              AND status = 'POSTED'
-        """, (batch_id,))
-
-        dependents = cur.fetchall()
+        dependents = [
+            b for b in chain.values()
+            if b["id"] != batch_id and b["status"] == "POSTED"
+        ]
 
-        if dependents:
-            codes = ", ".join(d["batch_code"] for d in dependents)
+        if dependents and not cascade:
+            codes = ", ".join(
+                d["batch_code"]
+                for d in sorted(dependents, key=lambda d: d["depth"])
+            )
             raise HTTPException(
                 status_code=409,
                 detail=(
@@ -469,8 +723,55 @@ def reverse_closing_batch(
                 )
             )
 
+        targets = [batch] + dependents
+
+        unknown = sorted({
+            b["batch_type"] for b in targets
+            if b["batch_type"] not in BATCH_STATUS_FLAGS
+        })
+        if unknown:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Batch type desconocido: {', '.join(unknown)}"
+            )
+
+        target_ids = [b["id"] for b in targets]
+
+        # ----------------------------------------------------
+        # 3️⃣ Líneas espejo negadas (un solo INSERT … SELECT)
+        # ----------------------------------------------------
+        cur.execute("""
+            INSERT INTO closing_batch_lines (
+                batch_id,
+                account_code,
+                account_name,
+                debit,
+                credit,
+                balance,
+                currency,
+                source_type,
+                source_reference
+            )
+            SELECT
+                l.batch_id,
+                l.account_code,
+                l.account_name,
+                -l.debit,
+                -l.credit,
+                -l.balance,
+                l.currency,
+                'REVERSAL',
+                b.batch_code
+            FROM closing_batch_lines l
+            JOIN closing_batches b ON b.id = l.batch_id
+            WHERE l.batch_id = ANY(%s)
+              AND l.source_type IS DISTINCT FROM 'REVERSAL'
+        """, (target_ids,))
+
+        mirrored_lines = cur.rowcount
+
         # ----------------------------------------------------
-        # 3️⃣ Marcar batch como REVERSED
+        # 4️⃣ Marcar batches como REVERSED
         # ----------------------------------------------------
         cur.execute("""
             UPDATE closing_batches
@@ -479,64 +780,59 @@ def reverse_closing_batch(
                 reversed_at = NOW(),
                 reversed_by = %s,
                 reverse_reason = %s
-            WHERE id = %s
+            WHERE id = ANY(%s)
         """, (
             reversed_by,
             reason,
-            batch_id
+            target_ids
         ))
 
         # ----------------------------------------------------
-        # 4️⃣ Rollback de flags en closing_status
+        # 5️⃣ Rollback de flags en closing_status (set-based)
         # ----------------------------------------------------
         cur.execute("""
-            SELECT *
-            FROM closing_status
-            WHERE company_code = %s
-              AND fiscal_year = %s
-              AND period = %s
-              AND ledger = %s
-            FOR UPDATE
-        """, (
-            batch["company_code"],
-            batch["fiscal_year"],
-            batch["period"],
-            batch["ledger"]
-        ))
-
-        status = cur.fetchone()
-
-        if not status:
-            raise HTTPException(
-                status_code=500,
-                detail="Estado de cierre no encontrado."
+            WITH reversed AS (
+                SELECT
+                    company_code,
+                    fiscal_year,
+                    period,
+                    ledger,
+                    ARRAY_AGG(batch_type) AS types
+                FROM closing_batches
+                WHERE id = ANY(%s)
+                GROUP BY company_code, fiscal_year, period, ledger
             )
-
-        flag_map = {
-            "GL_CLOSING": "gl_closed",
-            "TB_POST": "tb_closed",
-            "CLOSE_PNL": "pnl_closed",
-            "EQ_ADJ": "equity_closed",
-            "FS_FINAL": "fs_closed",
-            "OPEN_FY": "fy_opened"
+            UPDATE closing_status cs
+            SET
+                gl_closed     = cs.gl_closed     AND NOT ('GL_CLOSING' = ANY(r.types)),
+                tb_closed     = cs.tb_closed     AND NOT ('TB_POST'    = ANY(r.types)),
+                pnl_closed    = cs.pnl_closed    AND NOT ('CLOSE_PNL'  = ANY(r.types)),
+                equity_closed = cs.equity_closed AND NOT ('EQ_ADJ'     = ANY(r.types)),
+                fs_closed     = cs.fs_closed     AND NOT ('FS_FINAL'   = ANY(r.types)),
+                fy_opened     = cs.fy_opened     AND NOT ('OPEN_FY'    = ANY(r.types)),
+                last_batch_id = NULL,
+                updated_at = NOW()
+            FROM reversed r
+            WHERE cs.company_code = r.company_code
+              AND cs.fiscal_year = r.fiscal_year
+              AND cs.period = r.period
+              AND cs.ledger = r.ledger
+            RETURNING cs.id
+        """, (target_ids,))
+
+        updated_status = cur.fetchall()
+
+        status_keys = {
+            (b["company_code"], b["fiscal_year"], b["period"], b["ledger"])
+            for b in targets
         }
 
-        flag = flag_map.get(batch["batch_type"])
-        if not flag:
+        if len(updated_status) < len(status_keys):
             raise HTTPException(
                 status_code=500,
-                detail=f"Batch type desconocido: {batch['batch_type']}"
+                detail="Estado de cierre no encontrado."
             )
 
-        cur.execute(f"""
-            UPDATE closing_status
-            SET
-                {flag} = FALSE,
-                last_batch_id = NULL,
-                updated_at = NOW()
-            WHERE id = %s
-        """, (status["id"],))
-
         conn.commit()
 
         return {
@@ -544,13 +840,33 @@ def reverse_closing_batch(
             "batch_id": batch_id,
             "batch_code": batch["batch_code"],
             "batch_type": batch["batch_type"],
-            "reversed_by": reversed_by
+            "reversed_by": reversed_by,
+            "cascade": cascade,
+            "reversed_batches": [
+                {
+                    "batch_id": b["id"],
+                    "batch_code": b["batch_code"],
+                    "batch_type": b["batch_type"]
+                }
+                for b in sorted(targets, key=lambda b: b["depth"])
+            ],
+            "mirrored_lines": mirrored_lines
         }
 
     except HTTPException:
         conn.rollback()
         raise
 
+    except psycopg2.errors.LockNotAvailable:
+        conn.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                "La cadena de batches está bloqueada por otra operación. "
+                "Intente nuevamente."
+            )
+        )
+
     except Exception as e:
         conn.rollback()
         raise HTTPException(
@@ -644,7 +960,7 @@ def preview_trial_balance(payload: dict, conn=Depends(get_db)):
     total_credit = sum(r["credit"] for r in rows)
     difference = round(total_debit - total_credit, 2)
 
-    return {
+    return FastJSONResponse({
         "source_batch": {
             "batch_id": gl_batch["id"],
             "batch_code": gl_batch["batch_code"],
@@ -657,24 +973,15 @@ def preview_trial_balance(payload: dict, conn=Depends(get_db)):
         "ledger": gl_batch["ledger"],
 
         "totals": {
-            "debit": float(total_debit),
-            "credit": float(total_credit),
-            "difference": float(difference)
+            "debit": total_debit,
+            "credit": total_credit,
+            "difference": difference
         },
 
         "is_balanced": difference == 0,
 
-        "data": [
-            {
-                "account_code": r["account_code"],
-                "account_name": r["account_name"],
-                "debit": float(r["debit"]),
-                "credit": float(r["credit"]),
-                "balance": float(r["balance"])
-            }
-            for r in rows
-        ]
-    }
+        "data": rows
+    })
 
 
 # ============================================================
@@ -712,6 +1019,8 @@ def post_trial_balance(
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
+        require_closing_lock(cur, company, ledger)
+
         # ----------------------------------------------------
         # 1️⃣ Obtener estado de cierre ACTIVO del período
         # ----------------------------------------------------
@@ -806,7 +1115,7 @@ def post_trial_balance(
         # ----------------------------------------------------
         batch_code = (
             f"TB-{fiscal_year}-{period:02d}-"
-            f"{int(datetime.utcnow().timestamp())}"
+            f"{next_number(cur, 'CLOSING_BATCH'):06d}"
         )
 
         cur.execute("""
@@ -961,6 +1270,8 @@ def post_pnl_closing(
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
+        require_closing_lock(cur, company, ledger)
+
         # ----------------------------------------------------
         # 1️⃣ Validar estado del cierre
         # ----------------------------------------------------
@@ -1044,7 +1355,7 @@ def post_pnl_closing(
         # ----------------------------------------------------
         batch_code = (
             f"PNL-{fiscal_year}-{period:02d}-"
-            f"{int(datetime.utcnow().timestamp())}"
+            f"{next_number(cur, 'CLOSING_BATCH'):06d}"
         )
 
         cur.execute("""
@@ -1177,7 +1488,6 @@ def post_pnl_closing(
 
 from fastapi import HTTPException, Depends
 from psycopg2.extras import RealDictCursor
-from datetime import datetime
 from security.auth import get_current_user
 
 @router.post("/fs/post")
@@ -1215,6 +1525,8 @@ def post_financial_statements(
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
+        require_closing_lock(cur, company, ledger)
+
         # ----------------------------------------------------
         # 1️⃣ Validar estado de cierre (lock fuerte)
         # ----------------------------------------------------
@@ -1350,7 +1662,7 @@ def post_financial_statements(
         # ----------------------------------------------------
         batch_code = (
             f"FS-{fiscal_year}-{period:02d}-"
-            f"{int(datetime.utcnow().timestamp())}"
+            f"{next_number(cur, 'CLOSING_BATCH'):06d}"
         )
 
         cur.execute("""
@@ -1429,7 +1741,6 @@ def post_financial_statements(
 
 from fastapi import HTTPException, Depends
 from psycopg2.extras import RealDictCursor
-from datetime import datetime
 from security.auth import get_current_user
 
 @router.post("/fy/open")
@@ -1460,6 +1771,8 @@ def open_new_fiscal_year(
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
+        require_closing_lock(cur, company, ledger)
+
         # ----------------------------------------------------
         # 1️⃣ Obtener ÚLTIMO ejercicio fiscal cerrado (FS_FINAL)
         # ----------------------------------------------------
@@ -1511,7 +1824,7 @@ def open_new_fiscal_year(
         # ----------------------------------------------------
         batch_code = (
             f"OPEN-{new_year}-"
-            f"{int(datetime.utcnow().timestamp())}"
+            f"{next_number(cur, 'CLOSING_BATCH'):06d}"
         )
 
         cur.execute("""
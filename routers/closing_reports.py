@@ -2,9 +2,9 @@ from fastapi import (
     APIRouter,
     Depends,
     HTTPException,
-    Header
+    Header,
+    Request
 )
-from fastapi.responses import FileResponse
 from psycopg2.extras import RealDictCursor
 import os
 import tempfile
@@ -12,6 +12,13 @@ import tempfile
 from database import get_db
 from reports.pdf_closing_report import generate_closing_batch_pdf
 from rbac_service import has_permission
+from services.http_cache import (
+    strong_etag,
+    is_not_modified,
+    not_modified_response,
+    conditional_file_response
+)
+from services.pdf.cache import PdfDiskCache
 
 
 router = APIRouter(
@@ -34,8 +41,40 @@ def require_permission(module: str, action: str):
     return checker
 
 
+# ============================================================
+# CACHE DE PDFs DE BATCH
+# ============================================================
+# Un batch POSTED es inmutable: el PDF se cachea por
+# (batch_id, checksum de líneas) y se sirve con ETag/304/Range.
+
+CLOSING_PDF_CACHE_DIR = os.path.join(
+    tempfile.gettempdir(), "erp_som_cache", "closing_batches"
+)
+CLOSING_PDF_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Filas por viaje al servidor al generar el reporte
+LINES_FETCH_SIZE = 2000
+
+_pdf_cache = PdfDiskCache(
+    CLOSING_PDF_CACHE_DIR,
+    CLOSING_PDF_CACHE_MAX_BYTES
+)
+
+BATCH_TITLES = {
+    "GL_CLOSING": "Cierre de Libro Mayor",
+    "TB_POST": "Balance de Comprobación",
+    "CLOSE_PNL": "Cierre de Estado de Resultados",
+    "FS_FINAL": "Estados Financieros Finales",
+    "OPEN_FY": "Apertura de Ejercicio Fiscal"
+}
+
+
 @router.get("/batch/{batch_id}/pdf")
-def download_closing_batch_pdf(batch_id: int, conn=Depends(get_db)):
+def download_closing_batch_pdf(
+    batch_id: int,
+    request: Request,
+    conn=Depends(get_db)
+):
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     # --------------------------------------------------
@@ -53,65 +92,92 @@ def download_closing_batch_pdf(batch_id: int, conn=Depends(get_db)):
         raise HTTPException(404, "Batch no encontrado o no posteado.")
 
     # --------------------------------------------------
-    # 2️⃣ Líneas
+    # 2️⃣ Checksum de líneas (sin traer las filas)
     # --------------------------------------------------
     cur.execute("""
-        SELECT *
+        SELECT
+            COUNT(*) AS line_count,
+            COALESCE(SUM(debit), 0)   AS debit,
+            COALESCE(SUM(credit), 0)  AS credit,
+            COALESCE(SUM(balance), 0) AS balance,
+            md5(string_agg(
+                concat_ws('|', id, account_code, account_name,
+                          debit, credit, balance, currency),
+                ',' ORDER BY id
+            )) AS checksum
         FROM closing_batch_lines
         WHERE batch_id = %s
-        ORDER BY account_code
     """, (batch_id,))
-    lines = cur.fetchall()
+    summary = cur.fetchone()
 
-    if not lines:
+    if not summary["line_count"]:
         raise HTTPException(500, "Batch sin líneas.")
 
-    # --------------------------------------------------
-    # 3️⃣ Totales
-    # --------------------------------------------------
-    totals = {
-        "debit": sum(l["debit"] for l in lines),
-        "credit": sum(l["credit"] for l in lines),
-        "balance": sum(l["balance"] for l in lines)
-    }
+    cache_key = PdfDiskCache.make_key(
+        batch_id,
+        batch["batch_code"],
+        batch["batch_type"],
+        batch["posted_by"],
+        batch["posted_at"],
+        summary["checksum"]
+    )
+    etag = strong_etag(cache_key)
+    filename = f"{batch['batch_code']}.pdf"
 
-    # --------------------------------------------------
-    # 4️⃣ Header
-    # --------------------------------------------------
-    titles = {
-        "GL_CLOSING": "Cierre de Libro Mayor",
-        "TB_POST": "Balance de Comprobación",
-        "CLOSE_PNL": "Cierre de Estado de Resultados",
-        "FS_FINAL": "Estados Financieros Finales",
-        "OPEN_FY": "Apertura de Ejercicio Fiscal"
-    }
-
-    header = {
-        "title": titles.get(batch["batch_type"], "Cierre Contable"),
-        "company": batch["company_code"],
-        "fiscal_year": batch["fiscal_year"],
-        "period": batch["period"],
-        "ledger": batch["ledger"],
-        "batch_code": batch["batch_code"],
-        "posted_by": batch["posted_by"],
-        "posted_at": batch["posted_at"].strftime("%d/%m/%Y %H:%M")
-    }
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
 
     # --------------------------------------------------
-    # 5️⃣ Generar PDF
+    # 3️⃣ Generar PDF solo si no está en cache
     # --------------------------------------------------
-    tmp_dir = tempfile.gettempdir()
-    file_path = os.path.join(tmp_dir, f"{batch['batch_code']}.pdf")
-
-    generate_closing_batch_pdf(
-        file_path=file_path,
-        header=header,
-        lines=lines,
-        totals=totals
-    )
+    def render(file_path):
+        # Cursor con nombre: las líneas llegan por bloques y el
+        # reporte las consume sin materializarlas completas.
+        lines_cur = conn.cursor(
+            name=f"closing_batch_lines_{batch_id}",
+            cursor_factory=RealDictCursor
+        )
+        lines_cur.itersize = LINES_FETCH_SIZE
+        lines_cur.execute("""
+            SELECT account_code, account_name, debit, credit, balance
+            FROM closing_batch_lines
+            WHERE batch_id = %s
+            ORDER BY account_code
+        """, (batch_id,))
+
+        totals = {
+            "debit": summary["debit"],
+            "credit": summary["credit"],
+            "balance": summary["balance"]
+        }
+
+        header = {
+            "title": BATCH_TITLES.get(batch["batch_type"], "Cierre Contable"),
+            "company": batch["company_code"],
+            "fiscal_year": batch["fiscal_year"],
+            "period": batch["period"],
+            "ledger": batch["ledger"],
+            "batch_code": batch["batch_code"],
+            "posted_by": batch["posted_by"],
+            "posted_at": batch["posted_at"].strftime("%d/%m/%Y %H:%M")
+        }
+
+        try:
+            generate_closing_batch_pdf(
+                file_path=file_path,
+                header=header,
+                lines=lines_cur,
+                totals=totals
+            )
+        finally:
+            lines_cur.close()
+
+    file_path = _pdf_cache.get_or_render(cache_key, render)
 
-    return FileResponse(
+    return conditional_file_response(
+        request,
         file_path,
         media_type="application/pdf",
-        filename=f"{batch['batch_code']}.pdf"
+        filename=filename,
+        etag=etag
     )
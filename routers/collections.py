@@ -11,6 +11,14 @@ from datetime import date, datetime, timedelta
 
 from database import get_db
 from rbac_service import has_permission
+from services.json_response import FastJSONResponse
+from services.search import contains_clause, contains_pattern
+from services.pagination import (
+    CountStrategy,
+    DEFAULT_COUNT_STRATEGY,
+    count_total,
+    split_page
+)
 
 
 router = APIRouter(
@@ -70,7 +78,21 @@ def sync_collections_from_invoicing(conn=Depends(get_db)):
 
     try:
         cur.execute("""
-            SELECT *
+            SELECT
+                i.tipo_factura,
+                i.tipo_documento,
+                i.numero_documento,
+                i.codigo_cliente,
+                i.nombre_cliente,
+                i.fecha_emision,
+                i.moneda,
+                i.total,
+                i.termino_pago,
+                i.num_informe,
+                i.buque_contenedor,
+                i.operacion,
+                i.periodo_operacion,
+                i.descripcion_servicio
             FROM invoicing i
             WHERE i.tipo_documento IN ('FACTURA', 'NOTA_CREDITO')
               AND i.estado = 'EMITIDA'
@@ -274,11 +296,13 @@ def search_collections(
     ),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
+    count: CountStrategy = Query(DEFAULT_COUNT_STRATEGY),
     conn=Depends(get_db)
 ):
     """
     Devuelve facturas en Collections con filtros y paginación.
     NO se ejecuta automáticamente en UI.
+    count: exact | estimated | cached | none (ver services/pagination.py)
     """
 
     offset = (page - 1) * page_size
@@ -289,12 +313,12 @@ def search_collections(
 
     # ================= FILTROS =================
     if cliente and cliente.upper() != "ALL":
-        filtros.append("""
+        filtros.append(f"""
             (codigo_cliente = %(cliente_exact)s
-             OR nombre_cliente ILIKE %(cliente_like)s)
+             OR {contains_clause("nombre_cliente", "%(cliente_like)s")})
         """)
         params["cliente_exact"] = cliente.strip()
-        params["cliente_like"] = f"%{cliente.strip()}%"
+        params["cliente_like"] = contains_pattern(cliente)
 
     if bucket_aging:
         filtros.append("bucket_aging = %(bucket_aging)s")
@@ -311,15 +335,7 @@ def search_collections(
     where_sql = "WHERE " + " AND ".join(filtros) if filtros else ""
 
     # ================= TOTAL =================
-    cur.execute(
-        f"""
-        SELECT COUNT(*) AS total
-        FROM collections
-        {where_sql}
-        """,
-        params
-    )
-    total = cur.fetchone()["total"]
+    total = count_total(cur, count, "collections", where_sql, params)
 
     # ================= DATA =================
     cur.execute(
@@ -354,20 +370,22 @@ def search_collections(
         """,
         {
             **params,
-            "limit": page_size,
+            "limit": page_size + 1,
             "offset": offset
         }
     )
 
-    data = cur.fetchall()
+    data, has_more = split_page(cur.fetchall(), page_size)
     cur.close()
 
-    return {
+    return FastJSONResponse({
         "total": total,
         "page": page,
         "page_size": page_size,
+        "has_more": has_more,
+        "count_strategy": count,
         "data": data
-    }
+    })
 
 
 # ============================================================
@@ -1,58 +1,50 @@
 # ============================================================
 # ROUTER: Continentes / Países / Puertos desde una sola tabla
 # Tabla: continentes_paises_puertos
+# Servido desde el cache en memoria (services/geography.py),
+# con ETag / 304 y Cache-Control
 # ============================================================
 
-from fastapi import APIRouter
-from database import sql
+from fastapi import APIRouter, Request
+
+from services import geography
+from services.geography import GEOGRAPHY_CACHE_CONTROL
+from services.http_cache import conditional_json_response
 
 router = APIRouter(prefix="/cpp", tags=["Continentes / Países / Puertos"])
 
+
+def _responder(request: Request, content, geo):
+    return conditional_json_response(
+        request, content, geo.etag, GEOGRAPHY_CACHE_CONTROL
+    )
+
+
 # ============================================================
 # GET → Lista de continentes (únicos)
 # ============================================================
 @router.get("/continentes")
-def get_continentes_cpp():
-    rows = sql("""
-        SELECT DISTINCT continente
-        FROM continentes_paises_puertos
-        WHERE continente IS NOT NULL AND continente <> ''
-        ORDER BY continente;
-    """, fetch=True)
-
-    return [row[0] for row in rows]
+def get_continentes_cpp(request: Request):
+    geo = geography.flat.get()
+    return _responder(request, geo.continentes, geo)
 
 
 # ============================================================
 # GET → Lista de países según continente
 # ============================================================
 @router.get("/paises")
-def get_paises_cpp(continente: str):
-    rows = sql("""
-        SELECT DISTINCT pais
-        FROM continentes_paises_puertos
-        WHERE continente = %s
-          AND pais IS NOT NULL AND pais <> ''
-        ORDER BY pais;
-    """, (continente,), fetch=True)
-
-    return [row[0] for row in rows]
+def get_paises_cpp(continente: str, request: Request):
+    geo = geography.flat.get()
+    return _responder(request, geo.paises_de(continente), geo)
 
 
 # ============================================================
 # GET → Lista de puertos según país
 # ============================================================
 @router.get("/puertos")
-def get_puertos_cpp(pais: str):
-    rows = sql("""
-        SELECT DISTINCT puerto
-        FROM continentes_paises_puertos
-        WHERE pais = %s
-          AND puerto IS NOT NULL AND puerto <> ''
-        ORDER BY puerto;
-    """, (pais,), fetch=True)
-
-    return [row[0] for row in rows]
+def get_puertos_cpp(pais: str, request: Request):
+    geo = geography.flat.get()
+    return _responder(request, geo.puertos_de(pais), geo)
 
 
 # ============================================================
@@ -60,13 +52,6 @@ def get_puertos_cpp(pais: str):
 # ============================================================
 
 @router.get("/puertos_all")
-def get_todos_los_puertos():
-    rows = sql("""
-        SELECT DISTINCT puerto
-        FROM continentes_paises_puertos
-        WHERE puerto IS NOT NULL AND puerto <> ''
-        ORDER BY puerto;
-    """, fetch=True)
-
-    return [r[0] for r in rows]
-
+def get_todos_los_puertos(request: Request):
+    geo = geography.flat.get()
+    return _responder(request, geo.puertos_all, geo)
@@ -9,6 +9,8 @@ from datetime import datetime
 
 from database import get_db
 from rbac_service import has_permission
+from services.json_response import FastJSONResponse
+from services.pagination import split_page, where_sql
 
 # ============================================================
 # ROUTER
@@ -52,23 +54,54 @@ DISPUTE_STATUSES = [
     "Resolved"
 ]
 
+# ============================================================
+# GET /dispute-management
+# LISTADO (KEYSET POR d.created_at, d.id)
+# ============================================================
+# El último comentario viene de las columnas last_comment* que
+# mantiene el trigger de dispute_history (migrations/008): no hay
+# subconsulta por fila. ?after=<next_cursor> continúa desde
+# (created_at, dispute_id) de la última fila recibida; created_at es
+# NOT NULL (migrations/017).
+
+def _encode_cursor(created_at, dispute_id) -> str:
+    return f"{created_at.isoformat()}|{dispute_id}"
+
+
+def _decode_cursor(after: str) -> tuple:
+    try:
+        created_at, dispute_id = after.split("|")
+        return datetime.fromisoformat(created_at), int(dispute_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
 @router.get("")
 def list_dispute_management(
     cliente: Optional[str] = Query(None),
+    after: Optional[str] = Query(None),
     page: int = 1,
     page_size: int = 50,
     conn=Depends(get_db)
 ):
+    """
+    after: next_cursor de la página anterior (sin after → page/OFFSET).
+    """
     cur = conn.cursor(cursor_factory=RealDictCursor)
     offset = (page - 1) * page_size
 
-    where = ""
+    conditions = []
     params = []
 
     if cliente:
-        where = "WHERE d.codigo_cliente = %s"
+        conditions.append("d.codigo_cliente = %s")
         params.append(cliente)
 
+    if after:
+        conditions.append("(d.created_at, d.id) < (%s, %s)")
+        params.extend(_decode_cursor(after))
+        offset = 0
+
     sql = f"""
         SELECT
             dm.id               AS management_id,
@@ -95,29 +128,32 @@ def list_dispute_management(
 
             d.created_at,
 
-            (
-                SELECT comentario
-                FROM dispute_history h
-                WHERE h.dispute_management_id = dm.id
-                ORDER BY h.created_at DESC
-                LIMIT 1
-            ) AS ultimo_comentario
+            dm.last_comment     AS ultimo_comentario,
+            dm.last_comment_by  AS ultimo_comentario_por,
+            dm.last_comment_at  AS ultimo_comentario_fecha
 
         FROM dispute_management dm
         JOIN disputa d ON d.id = dm.dispute_id
-        {where}
-        ORDER BY d.created_at DESC
+        {where_sql(conditions)}
+        ORDER BY d.created_at DESC, d.id DESC
         LIMIT %s OFFSET %s
     """
 
-    cur.execute(sql, params + [page_size, offset])
-    data = cur.fetchall()
+    cur.execute(sql, params + [page_size + 1, offset])
+    data, has_more = split_page(cur.fetchall(), page_size)
 
-    return {
+    next_cursor = None
+    if has_more:
+        last = data[-1]
+        next_cursor = _encode_cursor(last["created_at"], last["dispute_id"])
+
+    return FastJSONResponse({
         "page": page,
         "page_size": page_size,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
         "data": data
-    }
+    })
 
 # ============================================================
 # POST /dispute-management/{management_id}/status
@@ -188,50 +224,122 @@ def get_history(
 # ============================================================
 # GET /dispute-management/kpis/summary
 # ============================================================
+# Sin filtros → dispute_kpi_counters (migrations/009), una fila por
+# estatus mantenida por trigger: O(estatus).
+# Con cliente / status → una sola pasada con agregación condicional.
+# IncomingVolume (disputas creadas en el mes) es un rango sobre el
+# índice de disputa.created_at en ambos casos.
 
-@router.get("/kpis/summary")
-def get_kpis(conn=Depends(get_db)):
-    cur = conn.cursor(cursor_factory=RealDictCursor)
+RESOLVED_STATUS = "Resolved"
 
-    # ADO
-    cur.execute("""
-        SELECT AVG(CURRENT_DATE - d.created_at::date) AS ado
-        FROM dispute_management dm
-        JOIN disputa d ON d.id = dm.dispute_id
-        WHERE dm.status != 'Resolved'
-    """)
-    ado = cur.fetchone()["ado"]
 
-    # DDO
+def _kpis_from_counters(cur) -> dict:
     cur.execute("""
-        SELECT AVG(dm.dispute_closed_at::date - d.created_at::date) AS ddo
-        FROM dispute_management dm
-        JOIN disputa d ON d.id = dm.dispute_id
-        WHERE dm.status = 'Resolved'
+        SELECT
+            status,
+            dispute_count,
+            disputed_amount,
+            created_count,
+            created_days_sum,
+            closed_count,
+            close_days_sum,
+            CURRENT_DATE - DATE '2000-01-01' AS today
+        FROM dispute_kpi_counters
+        ORDER BY status
     """)
-    ddo = cur.fetchone()["ddo"]
+    rows = cur.fetchall()
+
+    open_n = open_days = 0
+    amount = 0
+    ddo = None
+    by_status = []
+
+    for r in rows:
+        by_status.append({
+            "status": r["status"],
+            "count": r["dispute_count"],
+            "disputed_amount": r["disputed_amount"]
+        })
+
+        if r["status"] == RESOLVED_STATUS:
+            if r["closed_count"]:
+                ddo = r["close_days_sum"] / r["closed_count"]
+            continue
+
+        open_n += r["created_count"]
+        open_days += r["today"] * r["created_count"] - r["created_days_sum"]
+        amount += r["disputed_amount"]
 
-    # Incoming Volume (mes actual)
     cur.execute("""
         SELECT COUNT(*) AS incoming_volume
         FROM disputa
-        WHERE DATE_TRUNC('month', created_at) = DATE_TRUNC('month', CURRENT_DATE)
+        WHERE created_at >= DATE_TRUNC('month', CURRENT_DATE)
+          AND created_at <  DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month'
     """)
-    incoming = cur.fetchone()["incoming_volume"]
 
-    # Disputed Amount
-    cur.execute("""
-        SELECT SUM(disputed_amount) AS disputed_amount
-        FROM dispute_management
-        WHERE status != 'Resolved'
-    """)
-    amount = cur.fetchone()["disputed_amount"]
+    return {
+        "ado": open_days / open_n if open_n else None,
+        "ddo": ddo,
+        "incoming_volume": cur.fetchone()["incoming_volume"],
+        "disputed_amount": amount,
+        "by_status": by_status
+    }
+
+
+def _kpis_scan(cur, cliente: Optional[str], status: Optional[str]) -> dict:
+    conditions = []
+    params = []
+
+    if cliente:
+        conditions.append("d.codigo_cliente = %s")
+        params.append(cliente)
+    if status:
+        conditions.append("dm.status = %s")
+        params.append(status)
+
+    cur.execute(f"""
+        SELECT
+            AVG(CURRENT_DATE - d.created_at::date)
+                FILTER (WHERE dm.status != 'Resolved')          AS ado,
+            AVG(dm.dispute_closed_at::date - d.created_at::date)
+                FILTER (WHERE dm.status = 'Resolved')           AS ddo,
+            COUNT(*)
+                FILTER (WHERE d.created_at >= DATE_TRUNC('month', CURRENT_DATE)
+                          AND d.created_at <  DATE_TRUNC('month', CURRENT_DATE)
+                                             + INTERVAL '1 month') AS incoming_volume,
+            SUM(dm.disputed_amount)
+                FILTER (WHERE dm.status != 'Resolved')          AS disputed_amount
+        FROM disputa d
+        LEFT JOIN dispute_management dm ON dm.dispute_id = d.id
+        {where_sql(conditions)}
+    """, params)
+    row = cur.fetchone()
+
+    return {**row, "by_status": None}
+
+
+@router.get("/kpis/summary")
+def get_kpis(
+    cliente: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    conn=Depends(get_db)
+):
+    if status and status not in DISPUTE_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
+
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+
+    if cliente or status:
+        kpis = _kpis_scan(cur, cliente, status)
+    else:
+        kpis = _kpis_from_counters(cur)
 
     return {
-        "ADO": round(ado or 0, 2),
-        "DDO": round(ddo or 0, 2),
-        "IncomingVolume": incoming,
-        "DisputedAmount": float(amount or 0)
+        "ADO": round(float(kpis["ado"] or 0), 2),
+        "DDO": round(float(kpis["ddo"] or 0), 2),
+        "IncomingVolume": kpis["incoming_volume"],
+        "DisputedAmount": float(kpis["disputed_amount"] or 0),
+        "ByStatus": kpis["by_status"]
     }
 
 # ============================================================
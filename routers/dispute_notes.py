@@ -9,6 +9,7 @@ from fastapi import (
     HTTPException,
     UploadFile,
     File,
+    Form,
     Header
 )
 from psycopg2.extras import RealDictCursor
@@ -16,10 +17,10 @@ from psycopg2 import sql
 from datetime import datetime, date
 from typing import Optional, Dict, Any
 from decimal import Decimal, ROUND_HALF_UP
-import xml.etree.ElementTree as ET
 
 from database import get_db
 from rbac_service import has_permission
+from services.xml.comprobante_parser import parse_comprobante
 
 
 router = APIRouter(
@@ -305,3 +306,91 @@ def create_note_manual(management_id: int, payload: dict, conn=Depends(get_db)):
         "new_disputed_amount": float(new_amount),
         "resolved": resolved
     }
+
+
+# ============================================================
+# POST /notes/xml
+# ============================================================
+
+# Tipo de comprobante → tipo de nota
+XML_NOTE_TYPES = {
+    "NC": "NC",
+    "NCE": "NC",
+    "ND": "ND",
+}
+
+
+@router.post("/{management_id}/notes/xml")
+def create_note_xml(
+    management_id: int,
+    file: UploadFile = File(...),
+    user: str = Form("system"),
+    comentario: str = Form(""),
+    conn=Depends(get_db)
+):
+
+    xml_bytes = file.file.read()
+    if not xml_bytes:
+        raise HTTPException(400, "Archivo XML vacío")
+
+    try:
+        doc = parse_comprobante(xml_bytes)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    tipo = XML_NOTE_TYPES.get(doc["tipo"])
+    if not tipo:
+        raise HTTPException(
+            400,
+            f"El XML no es una nota de crédito/débito ({doc['tipo']})"
+        )
+
+    try:
+        monto = Q(D(doc["total_comprobante"]))
+    except Exception:
+        raise HTTPException(400, "TotalComprobante inválido")
+
+    if monto <= Decimal("0.00"):
+        raise HTTPException(400, "Monto debe ser mayor a 0")
+
+    moneda = doc["codigo_moneda"] or "CRC"
+
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+
+    ctx = _get_dispute_context(cur, management_id)
+    current = D(ctx["disputed_amount"] or ctx["monto_original"] or 0)
+
+    billing_id = _crear_en_billing(
+        cur,
+        tipo=tipo,
+        monto=monto,
+        moneda=moneda,
+        dispute_case=ctx["dispute_case"],
+        numero_documento=ctx["numero_documento"],
+        codigo_cliente=ctx["codigo_cliente"],
+        nombre_cliente=ctx["nombre_cliente"],
+        source="DISPUTE-XML",
+        xml_raw=xml_bytes.decode("utf-8", errors="replace")
+    )
+
+    new_amount = _calc_new_disputed_amount(current, tipo, monto)
+    new_amount, resolved = _close_if_zero(cur, management_id, new_amount)
+
+    hist = (
+        f"{tipo} XML {doc['numero_consecutivo']} creada "
+        f"(Billing ID {billing_id}) por {monto} {moneda}"
+    )
+    if comentario:
+        hist += f" | {comentario}"
+
+    _insert_history(cur, management_id, hist, user)
+
+    conn.commit()
+
+    return {
+        "status": "ok",
+        "billing_id": billing_id,
+        "clave": doc["clave"],
+        "new_disputed_amount": float(new_amount),
+        "resolved": resolved
+    }
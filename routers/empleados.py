@@ -1,6 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, Header
 from pydantic import BaseModel
 import database
+from psycopg2.extras import RealDictCursor
+from services.json_response import FastJSONResponse
+from services.pagination import (
+    CountStrategy,
+    DEFAULT_COUNT_STRATEGY,
+    count_total,
+    keyset_page
+)
 
 from rbac_service import has_permission
 
@@ -100,46 +108,52 @@ def agregar_empleado(emp: Empleado):
 # LISTAR empleados — paginado
 # ============================================================
 @router.get("/")
-def get_empleados(page: int = 1, page_size: int = 50):
-    offset = (page - 1) * page_size
-
-    rows = database.sql(f"""
-        SELECT
-            codigo, nombre, apellidos, estado_civil, genero, nacionalidad,
-            prefijo, telefono, provincia, canton, distrito, direccion,
-            jornada, salario, pago, banco, cuenta_iban, moneda,
-            enfermedades, contacto_emergencia, telefono_emergencia,
-            activo1, marca1, serial1,
-            activo2, marca2, serial2,
-            activo3, marca3, serial3,
-            fecharegistro
-        FROM empleados
-        ORDER BY codigo ASC
-        LIMIT {page_size} OFFSET {offset}
-    """, fetch=True)
-
-    total = database.sql("SELECT COUNT(*) FROM empleados", fetch=True)[0][0]
-
-    columnas = [
-        "codigo", "nombre", "apellidos", "estado_civil", "genero", "nacionalidad",
-        "prefijo", "telefono", "provincia", "canton", "distrito", "direccion",
-        "jornada", "salario", "pago", "banco", "cuenta_iban", "moneda",
-        "enfermedades", "contacto_emergencia", "telefono_emergencia",
-        "activo1", "marca1", "serial1",
-        "activo2", "marca2", "serial2",
-        "activo3", "marca3", "serial3",
-        "fecharegistro"
-    ]
-
-    data = []
-    for r in rows:
-        item = {}
-        for i, c in enumerate(columnas):
-            v = r[i]
-            item[c] = "" if v is None else str(v)
-        data.append(item)
+def get_empleados(
+    after: str | None = None,
+    page: int = 1,
+    page_size: int = 50,
+    count: CountStrategy = DEFAULT_COUNT_STRATEGY
+):
+    """
+    after: codigo de la última fila recibida (next_cursor).
+    Sin after se usa page (OFFSET), por compatibilidad.
+    count: exact | estimated | cached | none (ver services/pagination.py)
+    """
+    conn = database.get_conn()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        rows, has_more, next_cursor = keyset_page(
+            cur,
+            """
+            SELECT
+                codigo, nombre, apellidos, estado_civil, genero, nacionalidad,
+                prefijo, telefono, provincia, canton, distrito, direccion,
+                jornada, salario, pago, banco, cuenta_iban, moneda,
+                enfermedades, contacto_emergencia, telefono_emergencia,
+                activo1, marca1, serial1,
+                activo2, marca2, serial2,
+                activo3, marca3, serial3,
+                fecharegistro
+            FROM empleados
+            """,
+            key="codigo",
+            page_size=page_size,
+            after=after,
+            offset=(page - 1) * page_size
+        )
+
+        total = count_total(cur, count, "empleados")
+    finally:
+        cur.close()
+        conn.close()
 
-    return {"data": data, "total": total}
+    return FastJSONResponse({
+        "total": total,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "count_strategy": count,
+        "data": rows
+    })
 
 
 # ============================================================
@@ -6,31 +6,50 @@ from fastapi import (
     UploadFile,
     File,
     Form,
-    Query
+    Query,
+    Request
 )
 
 from psycopg2.extras import RealDictCursor
 from datetime import datetime, date
-from fastapi.responses import FileResponse
 import os
 import uuid
 
-from database import get_db
+from database import get_db, get_conn
 from rbac_service import has_permission
+from services.numbering import next_number
 
 from services.xml.factura_electronica_parser import (
-    parse_factura_electronica_from_bytes
+    factura_from_comprobante
 )
+from services.xml.upload import parse_xml_upload
 
 from services.pdf.factura_preview_pdf import (
     generar_factura_preview_pdf
 )
+from services.attachments import AttachmentTooLarge, store_file
+from services.pdf import render_pool
+from services.http_cache import conditional_file_response, strong_etag
+from services.lookup_cache import TTLCache
 
 router = APIRouter(
     prefix="/factura",
     tags=["Facturación"]
 )
 
+# factura_id → (pdf_path, filename, etag) para descargas repetidas
+PDF_LOOKUP_CACHE_SIZE = 2048
+PDF_LOOKUP_TTL_SECONDS = 60
+
+_pdf_lookup = TTLCache(PDF_LOOKUP_CACHE_SIZE, PDF_LOOKUP_TTL_SECONDS)
+
+# Un PENDING más viejo que esto se considera huérfano (reinicio,
+# deploy, worker caído) y se vuelve a encolar
+FACTURA_PDF_STALE_MINUTES = 5
+
+# Máximo de facturas re-encoladas por pasada (arranque)
+FACTURA_PDF_RECOVERY_BATCH = 200
+
 # ============================================================
 # RBAC GUARD
 # ============================================================
@@ -47,25 +66,191 @@ def require_permission(module: str, action: str):
 
 
 # ============================================================
-# OBTENER SIGUIENTE NÚMERO DE FACTURA (SEGURO CON RealDictCursor)
+# OBTENER SIGUIENTE NÚMERO DE FACTURA (CONTADOR GAPLESS)
 # ============================================================
 def obtener_siguiente_numero_factura(cur):
+    """
+    Toma el siguiente número de la serie FACTURA_MANUAL.
+    Bloquea solo la fila del contador hasta el commit/rollback.
+    """
+    return next_number(cur, "FACTURA_MANUAL")
+
+
+# ============================================================
+# CALLBACKS DEL RENDER DE PDF (corren fuera del request)
+# ============================================================
+def _registrar_pdf_factura(factura_id: int, pdf_path: str, filename: str):
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        pdf_path = store_file(
+            cur, pdf_path, filename=filename,
+            mime_type="application/pdf", move=True
+        )["storage_path"]
+
+        cur.execute("""
+            UPDATE factura
+            SET pdf_path = %s,
+                pdf_status = 'READY',
+                pdf_error = NULL
+            WHERE id = %s
+        """, (pdf_path, factura_id))
+
+        cur.execute("""
+            UPDATE invoicing
+            SET pdf_path = %s
+            WHERE factura_id = %s
+        """, (pdf_path, factura_id))
+
+        conn.commit()
+        _pdf_lookup.invalidate(factura_id)
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _registrar_error_pdf_factura(factura_id: int, error: Exception):
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE factura
+            SET pdf_status = 'ERROR',
+                pdf_error = %s
+            WHERE id = %s
+        """, (str(error), factura_id))
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
 
-    cur.execute("""
-        SELECT COALESCE(
-            MAX(numero_factura::int),
-            2199
-        ) AS ultimo
-        FROM factura
-        WHERE tipo_factura = 'MANUAL'
-    """)
 
+def _encolar_pdf_factura(factura_id: int, pdf_data: dict):
+    from services.pdf.factura_manual_pdf import (
+        BASE_DIR, generar_factura_manual_pdf
+    )
+
+    # Ruta única por render (un re-encolado no pisa a otro en curso)
+    numero = pdf_data["numero_factura"]
+    filename = f"Factura_{numero}.pdf"
+    output_path = os.path.join(
+        BASE_DIR, f"Factura_{numero}_{uuid.uuid4().hex}.pdf"
+    )
+
+    render_pool.submit(
+        generar_factura_manual_pdf,
+        pdf_data,
+        output_path,
+        on_done=lambda path: _registrar_pdf_factura(factura_id, path, filename),
+        on_error=lambda e: _registrar_error_pdf_factura(factura_id, e)
+    )
+
+
+# ============================================================
+# RECUPERACIÓN DE PDFs PENDIENTES
+# ============================================================
+def _datos_pdf_factura(cur, factura_id: int) -> dict:
+    """
+    Reconstruye desde la BD el mismo pdf_data que arma
+    crear_factura_manual.
+    """
+    cur.execute("""
+        SELECT
+            f.numero_factura,
+            f.fecha_emision,
+            f.termino_pago,
+            f.moneda,
+            f.total,
+            s.cliente,
+            s.buque_contenedor,
+            s.operacion,
+            s.num_informe,
+            s.fecha_inicio,
+            s.fecha_fin,
+            (
+                SELECT d.descripcion
+                FROM factura_detalle d
+                WHERE d.factura_id = f.id
+                LIMIT 1
+            ) AS descripcion
+        FROM factura f
+        LEFT JOIN servicios s
+               ON s.factura::text = f.numero_factura::text
+        WHERE f.id = %s
+    """, (factura_id,))
     row = cur.fetchone()
 
-    if not row or row.get("ultimo") is None:
-        return 2200
+    return {
+        "numero_factura": row["numero_factura"],
+        "fecha_factura": row["fecha_emision"],
+        "cliente": row["cliente"],
+        "buque": row["buque_contenedor"],
+        "operacion": row["operacion"],
+        "num_informe": row["num_informe"],
+        "periodo": f"{row['fecha_inicio']} a {row['fecha_fin']}",
+        "descripcion": row["descripcion"],
+        "moneda": row["moneda"] or "USD",
+        "termino_pago": row["termino_pago"],
+        "total": row["total"]
+    }
 
-    return int(row["ultimo"]) + 1
+
+def reencolar_pdfs_pendientes(factura_id: int = None,
+                              incluir_errores: bool = False) -> list:
+    """
+    Vuelve a encolar el render de facturas MANUAL cuyo PDF quedó
+    PENDING más de FACTURA_PDF_STALE_MINUTES (y ERROR si
+    incluir_errores). El UPDATE ... RETURNING reclama cada fila: con
+    varios workers, solo uno la re-encola. Devuelve los ids.
+    """
+    estados = "('PENDING', 'ERROR')" if incluir_errores else "('PENDING')"
+    filtro_id = "AND id = %(id)s" if factura_id is not None else ""
+
+    conn = get_conn()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute(f"""
+            UPDATE factura
+            SET pdf_status = 'PENDING',
+                pdf_error = NULL,
+                pdf_requested_at = NOW()
+            WHERE id IN (
+                SELECT id
+                FROM factura
+                WHERE tipo_factura = 'MANUAL'
+                  AND pdf_path IS NULL
+                  AND pdf_status IN {estados}
+                  AND (
+                      pdf_status = 'ERROR'
+                      OR COALESCE(pdf_requested_at, '-infinity')
+                         < NOW() - make_interval(mins => %(stale)s)
+                  )
+                  {filtro_id}
+                ORDER BY id
+                LIMIT %(limit)s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id
+        """, {
+            "id": factura_id,
+            "stale": FACTURA_PDF_STALE_MINUTES,
+            "limit": FACTURA_PDF_RECOVERY_BATCH
+        })
+        ids = [r["id"] for r in cur.fetchall()]
+
+        trabajos = [(i, _datos_pdf_factura(cur, i)) for i in ids]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    for i, pdf_data in trabajos:
+        _encolar_pdf_factura(i, pdf_data)
+
+    return ids
 
 
 # ============================================================
@@ -74,15 +259,8 @@ def obtener_siguiente_numero_factura(cur):
 @router.post("/manual")
 def crear_factura_manual(payload: dict, conn=Depends(get_db)):
 
-    try:
-        from services.pdf.factura_manual_pdf import generar_factura_manual_pdf
-    except ImportError:
-        raise HTTPException(
-            status_code=500,
-            detail="Módulo de generación de PDF no disponible"
-        )
-
     cur = None
+    pdf_data = None
 
     try:
         servicio_id = payload.get("servicio_id")
@@ -166,7 +344,7 @@ def crear_factura_manual(payload: dict, conn=Depends(get_db)):
         fecha_factura = datetime.now()
 
         # ====================================================
-        # INSERT FACTURA
+        # INSERT FACTURA (PDF PENDIENTE)
         # ====================================================
         cur.execute("""
             INSERT INTO factura (
@@ -176,11 +354,13 @@ def crear_factura_manual(payload: dict, conn=Depends(get_db)):
                 fecha_emision,
                 termino_pago,
                 moneda,
-                total
+                total,
+                pdf_status
             )
             VALUES (
                 'MANUAL',
-                %s, %s, %s, %s, %s, %s
+                %s, %s, %s, %s, %s, %s,
+                'PENDING'
             )
             RETURNING id
         """, (
@@ -214,7 +394,7 @@ def crear_factura_manual(payload: dict, conn=Depends(get_db)):
         ))
 
         # ====================================================
-        # GENERAR PDF
+        # DATOS PDF (se genera fuera del request, tras el commit)
         # ====================================================
         pdf_data = {
             "numero_factura": numero_factura,
@@ -230,17 +410,6 @@ def crear_factura_manual(payload: dict, conn=Depends(get_db)):
             "total": total
         }
 
-        pdf_path = generar_factura_manual_pdf(pdf_data)
-
-        # ====================================================
-        # ACTUALIZAR FACTURA CON PDF
-        # ====================================================
-        cur.execute("""
-            UPDATE factura
-            SET pdf_path = %s
-            WHERE id = %s
-        """, (pdf_path, factura_id))
-
         # ====================================================
         # INSERTAR EN TABLA INVOICING (MANUAL)
         # ====================================================
@@ -270,7 +439,7 @@ def crear_factura_manual(payload: dict, conn=Depends(get_db)):
                 %s,
                 %s,
                 'EMITIDA',
-                %s,
+                NULL,
                 NOW()
             )
         """, (
@@ -280,8 +449,7 @@ def crear_factura_manual(payload: dict, conn=Depends(get_db)):
             servicio["cliente"],
             fecha_factura,
             payload.get("moneda", "USD"),
-            total,
-            pdf_path
+            total
         ))
 
 
@@ -307,11 +475,17 @@ def crear_factura_manual(payload: dict, conn=Depends(get_db)):
 
         conn.commit()
 
+        # ====================================================
+        # GENERAR PDF EN EL POOL (pdf_path se llena al terminar)
+        # ====================================================
+        _encolar_pdf_factura(factura_id, pdf_data)
+
         return {
             "status": "ok",
             "factura_id": factura_id,
             "numero_factura": numero_factura,
-            "pdf_path": pdf_path
+            "pdf_path": None,
+            "pdf_status": "PENDING"
         }
 
     except HTTPException:
@@ -378,8 +552,15 @@ def crear_factura_electronica(
         # =====================================================
         # 3️⃣ PARSEAR XML (FE / FEE) → TOMAR NumeroConsecutivo
         # =====================================================
-        xml_bytes = file.file.read()
-        data_xml = parse_factura_electronica_from_bytes(xml_bytes)
+        # Una sola lectura del upload: parseo + hash + almacén
+        try:
+            data_xml, xml_attachment = parse_xml_upload(
+                cur, file, mapper=factura_from_comprobante
+            )
+        except AttachmentTooLarge as e:
+            raise HTTPException(413, str(e))
+        except ValueError as e:
+            raise HTTPException(400, f"XML inválido: {e}")
 
         # ✅ ESTE ES EL NÚMERO QUE DEBE QUEDAR EN SERVICIOS.factura
         numero_documento = (
@@ -461,6 +642,15 @@ def crear_factura_electronica(
         except Exception:
             pdf_path = None
 
+        if pdf_path:
+            pdf_path = store_file(
+                cur,
+                pdf_path,
+                filename=f"Factura_{numero_documento}.pdf",
+                mime_type="application/pdf",
+                move=True
+            )["storage_path"]
+
         # =====================================================
         # 7️⃣ INSERTAR EN INVOICING
         # =====================================================
@@ -483,7 +673,8 @@ def crear_factura_electronica(
                 buque_contenedor,
                 operacion,
                 periodo_operacion,
-                descripcion_servicio
+                descripcion_servicio,
+                xml_attachment_id
             )
             VALUES (
                 NULL,
@@ -503,6 +694,7 @@ def crear_factura_electronica(
                 %s,
                 %s,
                 %s,
+                %s,
                 %s
             )
             RETURNING id
@@ -520,7 +712,8 @@ def crear_factura_electronica(
             servicio["buque_contenedor"],
             servicio["operacion"],
             f"{servicio['fecha_inicio']} a {servicio['fecha_fin']}",
-            f"Factura electrónica ({tipo_xml}) cargada desde XML"
+            f"Factura electrónica ({tipo_xml}) cargada desde XML",
+            xml_attachment["id"]
         ))
 
         invoicing_id = cur.fetchone()["id"]
@@ -552,7 +745,8 @@ def crear_factura_electronica(
             "tipo_xml": tipo_xml,
             "numero_documento": numero_documento,  # ✅ NumeroConsecutivo
             "invoicing_id": invoicing_id,
-            "pdf_preview": pdf_path
+            "pdf_preview": pdf_path,
+            "xml_sha256": xml_attachment["sha256"]
         }
 
     except HTTPException:
@@ -623,15 +817,15 @@ def get_termino_pago_cliente(
         cur.close()
 
 # ============================================================
-# DESCARGAR PDF DE FACTURA
+# ESTADO DEL PDF DE FACTURA
 # ============================================================
-@router.get("/pdf/{factura_id}")
-def descargar_pdf_factura(factura_id: int, conn=Depends(get_db)):
+@router.get("/pdf/{factura_id}/status")
+def estado_pdf_factura(factura_id: int, conn=Depends(get_db)):
 
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     cur.execute("""
-        SELECT pdf_path
+        SELECT id, numero_factura, pdf_status, pdf_path, pdf_error
         FROM factura
         WHERE id = %s
     """, (factura_id,))
@@ -639,26 +833,115 @@ def descargar_pdf_factura(factura_id: int, conn=Depends(get_db)):
     row = cur.fetchone()
     cur.close()
 
-    if not row or not row.get("pdf_path"):
+    if not row:
+        raise HTTPException(status_code=404, detail="Factura no encontrada")
+
+    return {
+        "factura_id": row["id"],
+        "numero_factura": row["numero_factura"],
+        "pdf_status": row["pdf_status"] or ("READY" if row["pdf_path"] else None),
+        "pdf_path": row["pdf_path"],
+        "pdf_error": row["pdf_error"]
+    }
+
+
+# ============================================================
+# REINTENTAR PDF DE FACTURA (ERROR o PENDING huérfano)
+# ============================================================
+@router.post("/pdf/{factura_id}/render")
+def reintentar_pdf_factura(factura_id: int):
+    try:
+        ids = reencolar_pdfs_pendientes(factura_id, incluir_errores=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not ids:
         raise HTTPException(
-            status_code=404,
-            detail="PDF de la factura no encontrado"
+            status_code=409,
+            detail="El PDF ya existe o se está generando"
+        )
+
+    return {"factura_id": factura_id, "pdf_status": "PENDING"}
+
+
+# ============================================================
+# MÉTRICAS DEL POOL DE RENDER
+# ============================================================
+@router.get("/pdf-renderer/stats")
+def estadisticas_render_pdf():
+    return render_pool.stats()
+
+
+# ============================================================
+# DESCARGAR PDF DE FACTURA
+# ============================================================
+@router.get("/pdf/{factura_id}")
+def descargar_pdf_factura(factura_id: int, request: Request):
+    """
+    ETag fuerte (SHA-256 del adjunto o stat del archivo),
+    Last-Modified, 304 y Range. La ruta se cachea en memoria: una
+    previsualización repetida no abre conexión a la BD.
+    """
+
+    entry = _pdf_lookup.get(factura_id)
+
+    if entry is None:
+        conn = get_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute("""
+                SELECT f.pdf_path, f.pdf_status, a.original_name, a.sha256
+                FROM factura f
+                LEFT JOIN attachments a ON a.storage_path = f.pdf_path
+                WHERE f.id = %s
+            """, (factura_id,))
+            row = cur.fetchone()
+        finally:
+            cur.close()
+            conn.close()
+
+        if row and not row.get("pdf_path") and row.get("pdf_status") == "PENDING":
+            # Si quedó huérfano (reinicio / deploy) se vuelve a encolar
+            try:
+                reencolar_pdfs_pendientes(factura_id)
+            except Exception as e:
+                print("❌ Error re-encolando PDF de factura:", factura_id, e)
+            raise HTTPException(
+                status_code=409,
+                detail="El PDF de la factura se está generando"
+            )
+
+        if not row or not row.get("pdf_path"):
+            raise HTTPException(
+                status_code=404,
+                detail="PDF de la factura no encontrado"
+            )
+
+        pdf_path = row["pdf_path"]
+        entry = (
+            pdf_path,
+            row.get("original_name") or os.path.basename(pdf_path),
+            strong_etag(row["sha256"]) if row.get("sha256") else None
         )
+        _pdf_lookup.set(factura_id, entry)
 
-    pdf_path = row["pdf_path"]
+    pdf_path, filename, etag = entry
 
-    if not os.path.exists(pdf_path):
+    try:
+        return conditional_file_response(
+            request,
+            pdf_path,
+            media_type="application/pdf",
+            filename=filename,
+            etag=etag
+        )
+    except FileNotFoundError:
+        _pdf_lookup.invalidate(factura_id)
         raise HTTPException(
             status_code=404,
             detail="El archivo PDF no existe en el servidor"
         )
 
-    return FileResponse(
-        pdf_path,
-        media_type="application/pdf",
-        filename=os.path.basename(pdf_path)
-    )
-
 # ============================================================
 # OBTENER FACTURA POR ID
 # ============================================================
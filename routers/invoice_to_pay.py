@@ -8,14 +8,32 @@ from fastapi import (
     File,
     Form
 )
-from psycopg2.extras import RealDictCursor
-from datetime import date, datetime
-from typing import Optional
+from psycopg2.extras import RealDictCursor, execute_values
+from datetime import date
+from typing import Optional, List
 import os
-import shutil
+import zipfile
 
 from database import get_db
 from rbac_service import has_permission
+from services.columnar import (
+    DEFAULT_ROW_SHAPE,
+    RowShape,
+    fetch_columnar,
+    shaped
+)
+from services.search import contains_clause, contains_pattern
+from services.xml.supplier_documents import (
+    obligation_from_comprobante,
+    parse_supplier_file
+)
+from services.xml.upload import parse_xml_upload
+from services.xml import parse_pool
+from services.attachments import (
+    AttachmentTooLarge,
+    store_bytes,
+    store_stream
+)
 
 
 router = APIRouter(
@@ -111,8 +129,12 @@ def search_invoice_to_pay(
     issue_date_to: Optional[date] = Query(None),
     payment_date_from: Optional[date] = Query(None),
     payment_date_to: Optional[date] = Query(None),
+    shape: RowShape = Query(DEFAULT_ROW_SHAPE),
     conn=Depends(get_db)
 ):
+    """
+    shape: records ({data: [...]}) | columnar ({columns, rows})
+    """
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     # 🔁 Sync servicios → Invoice To Pay
@@ -151,8 +173,8 @@ def search_invoice_to_pay(
     # FILTRO BENEFICIARIO
     # =================
     if payee:
-        filters.append("payee_name ILIKE %s")
-        params.append(f"%{payee}%")
+        filters.append(contains_clause("payee_name", "%s"))
+        params.append(contains_pattern(payee))
 
     # ================================
     # FILTROS POR RANGOS DE FECHA
@@ -212,15 +234,14 @@ def search_invoice_to_pay(
     """
 
     try:
-        cur.execute(sql, params)
-        rows = cur.fetchall()
+        columns, rows = fetch_columnar(conn, sql, params)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"InvoiceToPay search error: {str(e)}"
         )
 
-    return {"data": rows}
+    return shaped(columns, rows, shape)
 
 
 # ============================================================
@@ -468,130 +489,35 @@ def upload_invoice_xml(
     file: UploadFile = File(...),
     conn=Depends(get_db)
 ):
-    from xml.etree import ElementTree as ET
-    from datetime import datetime, date, timedelta
-    import os
-    import shutil
-
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     # ============================================================
-    # GUARDAR ARCHIVO
-    # ============================================================
-    os.makedirs("storage/invoice_to_pay/xml", exist_ok=True)
-
-    ts = int(datetime.now().timestamp())
-    safe_name = file.filename.replace(" ", "_")
-    filepath = f"storage/invoice_to_pay/xml/{ts}_{safe_name}"
-
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    # ============================================================
-    # PARSE XML (TOLERANTE)
+    # GUARDAR + PARSEAR (UNA SOLA LECTURA DEL UPLOAD)
     # ============================================================
     try:
-        tree = ET.parse(filepath)
-        root = tree.getroot()
-
-        # Namespace dinámico
-        if "}" in root.tag:
-            ns_uri = root.tag.split("}")[0].strip("{")
-            ns = {"fe": ns_uri}
-            p = "fe:"
-        else:
-            ns = {}
-            p = ""
-
-        def find_text(paths, default=None):
-            for path in paths:
-                node = root.find(path, ns)
-                if node is not None and node.text:
-                    return node.text.strip()
-            return default
-
-        # ------------------------------------------------------------
-        # TIPO DOCUMENTO
-        # ------------------------------------------------------------
-        is_credit_note = root.find(f".//{p}NotaCreditoElectronica", ns) is not None \
-                         or "NotaCredito" in root.tag
-
-        obligation_type = (
-            "SUPPLIER_CREDIT_NOTE" if is_credit_note else "SUPPLIER_INVOICE"
+        ob, attachment = parse_xml_upload(
+            cur, file, mapper=obligation_from_comprobante
         )
-
-        # ------------------------------------------------------------
-        # CLAVE
-        # ------------------------------------------------------------
-        clave = find_text([
-            f".//{p}Clave",
-            ".//Clave"
-        ])
-        if not clave:
-            raise ValueError("XML sin Clave")
-
-        # ------------------------------------------------------------
-        # FECHA EMISIÓN
-        # ------------------------------------------------------------
-        fecha_raw = find_text([
-            f".//{p}FechaEmision",
-            ".//FechaEmision"
-        ])
-        if not fecha_raw:
-            raise ValueError("XML sin FechaEmision")
-
-        issue_date = date.fromisoformat(fecha_raw.split("T")[0])
-
-        # ------------------------------------------------------------
-        # EMISOR
-        # ------------------------------------------------------------
-        emisor = find_text([
-            f".//{p}Emisor/{p}Nombre",
-            f".//{p}Nombre"
-        ], "PROVEEDOR DESCONOCIDO")
-
-        # ------------------------------------------------------------
-        # MONEDA
-        # ------------------------------------------------------------
-        moneda = find_text([
-            f".//{p}CodigoMoneda",
-            ".//CodigoMoneda"
-        ], "CRC")
-
-        # ------------------------------------------------------------
-        # TOTAL (FACTURA / NC)
-        # ------------------------------------------------------------
-        total_raw = find_text([
-            f".//{p}TotalComprobante",
-            f".//{p}MontoTotal",
-            ".//TotalComprobante"
-        ])
-
-        if not total_raw:
-            raise ValueError("XML sin TotalComprobante")
-
-        total = float(total_raw)
-
-        if is_credit_note:
-            total = total * -1  # NC = negativo
-
-        # ------------------------------------------------------------
-        # PLAZO
-        # ------------------------------------------------------------
-        plazo_raw = find_text([
-            f".//{p}PlazoCredito",
-            ".//PlazoCredito"
-        ])
-
-        term_days = int(plazo_raw) if plazo_raw and plazo_raw.isdigit() else 30
-        due_date = issue_date + timedelta(days=term_days)
-
+    except AttachmentTooLarge as e:
+        conn.rollback()
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
+        conn.rollback()
         raise HTTPException(
             status_code=400,
             detail=f"Error parsing XML: {str(e)}"
         )
 
+    filepath = attachment["storage_path"]
+
+    emisor = ob["supplier"]
+    obligation_type = ob["obligation_type"]
+    clave = ob["reference"]
+    issue_date = ob["issue_date"]
+    due_date = ob["due_date"]
+    moneda = ob["currency"]
+    total = ob["total"]
+
     # ============================================================
     # INSERTAR payment_obligations
     # ============================================================
@@ -671,6 +597,278 @@ def upload_invoice_xml(
     }
 
 
+# ============================================================
+# 📥 UPLOAD XML MASIVO (ZIP O VARIOS ARCHIVOS)
+# ============================================================
+BULK_XML_MAX_FILES = 2000
+BULK_XML_MAX_FILE_BYTES = 5 * 1024 * 1024
+BULK_XML_MAX_TOTAL_BYTES = 100 * 1024 * 1024
+
+
+def _collect_bulk_xml(files: List[UploadFile]) -> tuple:
+    """
+    Expande ZIPs y devuelve ([(nombre, bytes)], [reporte de errores]).
+    Los nombres pueden repetirse (dos factura.xml): el resto del
+    flujo identifica cada XML por su posición en la lista.
+    Los ZIP se leen desde el archivo temporal del upload, sin copiarlos
+    a memoria; solo los XML extraídos cuentan para
+    BULK_XML_MAX_TOTAL_BYTES.
+    """
+    items = []
+    report = []
+    total_bytes = 0
+
+    def too_large(name):
+        report.append({
+            "file": name,
+            "status": "ERROR",
+            "error": "Archivo demasiado grande"
+        })
+
+    def reserve(size):
+        nonlocal total_bytes
+        if len(items) >= BULK_XML_MAX_FILES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Máximo {BULK_XML_MAX_FILES} XML por carga"
+            )
+        total_bytes += size
+        if total_bytes > BULK_XML_MAX_TOTAL_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=(
+                    "La carga supera "
+                    f"{BULK_XML_MAX_TOTAL_BYTES // (1024 * 1024)} MB de XML"
+                )
+            )
+
+    for f in files:
+        name = f.filename or "archivo"
+        lower = name.lower()
+
+        if lower.endswith(".zip"):
+            try:
+                zf = zipfile.ZipFile(f.file)
+            except zipfile.BadZipFile:
+                report.append({
+                    "file": name,
+                    "status": "ERROR",
+                    "error": "ZIP inválido"
+                })
+                continue
+
+            with zf:
+                for info in zf.infolist():
+                    member = info.filename
+                    if (
+                        info.is_dir()
+                        or not member.lower().endswith(".xml")
+                        or member.startswith("__MACOSX/")
+                    ):
+                        continue
+                    if info.file_size > BULK_XML_MAX_FILE_BYTES:
+                        too_large(f"{name}/{member}")
+                        continue
+                    reserve(info.file_size)
+                    data = zf.read(info)
+                    items.append((f"{name}/{member}", data))
+
+        elif lower.endswith(".xml"):
+            data = f.file.read(BULK_XML_MAX_FILE_BYTES + 1)
+            if len(data) > BULK_XML_MAX_FILE_BYTES:
+                too_large(name)
+                continue
+            reserve(len(data))
+            items.append((name, data))
+
+        else:
+            report.append({
+                "file": name,
+                "status": "ERROR",
+                "error": "Solo se aceptan .xml o .zip"
+            })
+
+    return items, report
+
+
+@router.post("/upload/xml/bulk")
+def upload_invoice_xml_bulk(
+    files: List[UploadFile] = File(...),
+    conn=Depends(get_db)
+):
+    """
+    Carga masiva de FE/NC de proveedor.
+
+    1️⃣ Expande ZIPs y parsea todos los XML en el pool de procesos
+    2️⃣ Descarta Claves repetidas en la carga y ya existentes
+       (una sola consulta)
+    3️⃣ Inserta todas las obligaciones nuevas en un solo INSERT
+    Devuelve un reporte por archivo.
+    """
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+
+    items, report = _collect_bulk_xml(files)
+
+    # ============================================================
+    # 1️⃣ PARSE (POOL)
+    # ============================================================
+    parsed = parse_pool.parse_many(parse_supplier_file, items)
+    for idx, r in enumerate(parsed):
+        r["index"] = idx
+
+    # ============================================================
+    # 2️⃣ DEDUPE POR CLAVE
+    # ============================================================
+    candidates = []
+    seen = set()
+
+    for r in parsed:
+        if "error" in r:
+            report.append({
+                "file": r["file"],
+                "status": "ERROR",
+                "error": r["error"]
+            })
+            continue
+
+        ref = r["data"]["reference"]
+        if ref in seen:
+            report.append({
+                "file": r["file"],
+                "status": "DUPLICATE",
+                "reference": ref,
+                "error": "Clave repetida en la carga"
+            })
+            continue
+
+        seen.add(ref)
+        candidates.append(r)
+
+    try:
+        existing = set()
+        if candidates:
+            cur.execute("""
+                SELECT reference
+                FROM payment_obligations
+                WHERE reference = ANY(%s)
+            """, ([r["data"]["reference"] for r in candidates],))
+            existing = {row["reference"] for row in cur.fetchall()}
+
+        to_insert = []
+        for r in candidates:
+            if r["data"]["reference"] in existing:
+                report.append({
+                    "file": r["file"],
+                    "status": "DUPLICATE",
+                    "reference": r["data"]["reference"],
+                    "error": "Clave ya registrada"
+                })
+            else:
+                to_insert.append(r)
+
+        # ========================================================
+        # 3️⃣ GUARDAR XML + INSERT MULTI-FILA
+        # ========================================================
+        inserted = {}
+        if to_insert:
+            rows = []
+            for r in to_insert:
+                d = r["data"]
+                filepath = store_bytes(
+                    cur,
+                    items[r["index"]][1],
+                    os.path.basename(r["file"]),
+                    "application/xml"
+                )["storage_path"]
+
+                rows.append((
+                    d["supplier"],
+                    d["obligation_type"],
+                    d["reference"],
+                    d["issue_date"],
+                    d["due_date"],
+                    d["currency"],
+                    d["total"],
+                    d["total"],
+                    filepath,
+                    f"Documento cargado por XML ({d['reference']})"
+                ))
+
+            result = execute_values(cur, """
+                INSERT INTO payment_obligations (
+                    record_type,
+                    payee_type,
+                    payee_id,
+                    payee_name,
+                    obligation_type,
+                    reference,
+                    issue_date,
+                    due_date,
+                    country,
+                    currency,
+                    total,
+                    balance,
+                    status,
+                    origin,
+                    file_xml,
+                    active,
+                    notes,
+                    created_at,
+                    updated_at
+                )
+                VALUES %s
+                RETURNING id, reference
+            """, rows, template="""(
+                'OBLIGATION', 'SUPPLIER', NULL,
+                %s, %s, %s, %s, %s,
+                'Costa Rica',
+                %s, %s, %s,
+                'PENDING', 'UPLOAD',
+                %s, TRUE, %s,
+                NOW(), NOW()
+            )""", page_size=500, fetch=True)
+
+            inserted = {row["reference"]: row["id"] for row in result}
+
+        conn.commit()
+
+    except HTTPException:
+        conn.rollback()
+        raise
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"DB insert error: {str(e)}"
+        )
+
+    for r in to_insert:
+        d = r["data"]
+        report.append({
+            "file": r["file"],
+            "status": "INSERTED",
+            "id": inserted.get(d["reference"]),
+            "reference": d["reference"],
+            "type": d["obligation_type"],
+            "supplier": d["supplier"],
+            "total": d["total"],
+            "currency": d["currency"]
+        })
+
+    summary = {"INSERTED": 0, "DUPLICATE": 0, "ERROR": 0}
+    for r in report:
+        summary[r["status"]] += 1
+
+    return {
+        "message": "Carga masiva procesada",
+        "files": len(report),
+        "inserted": summary["INSERTED"],
+        "duplicates": summary["DUPLICATE"],
+        "errors": summary["ERROR"],
+        "results": report
+    }
+
+
 # ============================================================
 # 📥 UPLOAD PDF (ADJUNTO) con issue_date y due_date
 # ============================================================
@@ -694,14 +892,10 @@ def upload_invoice_pdf(
     issue_val = issue_date or date.today()
     due_val = due_date or issue_val
 
-    os.makedirs("storage/invoice_to_pay/pdf", exist_ok=True)
-    timestamp = int(datetime.now().timestamp())
-    filename = f"pdf_{timestamp}_{file.filename}"
-    filepath = os.path.join("storage/invoice_to_pay/pdf", filename)
-
     try:
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        filepath = store_stream(
+            cur, file.file, file.filename, "application/pdf"
+        )["storage_path"]
 
         cur.execute("""
             INSERT INTO payment_obligations (
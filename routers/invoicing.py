@@ -16,6 +16,7 @@ import requests
 
 from database import get_db
 from rbac_service import has_permission
+from services.numbering import next_number
 
 from services.xml.electronic_documents_parser import (
     parse_electronic_document
@@ -24,6 +25,9 @@ from services.xml.electronic_documents_parser import (
 from services.xml.electronic_documents_parser import (
     parse_electronic_document_from_bytes
 )
+from services.xml.factura_electronica_parser import factura_from_comprobante
+from services.xml.upload import parse_xml_upload
+from services.attachments import AttachmentTooLarge
 
 
 
@@ -145,23 +149,9 @@ def emitir_factura_anticipada(payload: dict, conn=Depends(get_db)):
 
             # ====================================================
             # NUMERACIÓN CORRECTA
-            # → SOLO FACTURAS MANUALES
-            # → SI NO HAY REGISTROS → 2201
+            # → SOLO FACTURAS MANUALES (serie FACTURA_MANUAL)
             # ====================================================
-            cur.execute("""
-                SELECT COALESCE(
-                    MAX(numero_documento::int),
-                    2200
-                ) AS ultimo
-                FROM invoicing
-                WHERE
-                    tipo_documento = 'FACTURA'
-                    AND tipo_factura = 'MANUAL'
-                    AND numero_documento ~ '^[0-9]+$'
-            """)
-
-            ultimo = cur.fetchone()["ultimo"]
-            numero_factura = int(ultimo) + 1
+            numero_factura = next_number(cur, "FACTURA_MANUAL")
 
             # ====================================================
             # GENERAR PDF (SNAPSHOT COMPLETO)
@@ -264,7 +254,7 @@ def emitir_factura_anticipada(payload: dict, conn=Depends(get_db)):
             if not xml_path:
                 raise HTTPException(400, "xml_path requerido")
 
-            from services.factura_electronica_parser import parse_factura_electronica
+            from services.xml.factura_electronica_parser import parse_factura_electronica
             data = parse_factura_electronica(xml_path)
 
             cur.execute("""
@@ -402,15 +392,7 @@ def emitir_nota_credito(
             moneda = payload.get("moneda", "USD")
 
             # ================= NÚMERO NC =================
-            cur.execute("""
-                SELECT COALESCE(
-                    MAX(numero_documento::int),
-                    9000
-                ) AS ultimo
-                FROM invoicing
-                WHERE tipo_documento = 'NOTA_CREDITO'
-            """)
-            numero_nc = int(cur.fetchone()["ultimo"]) + 1
+            numero_nc = next_number(cur, "NOTA_CREDITO")
 
             fecha_emision = date.today()
 
@@ -618,17 +600,15 @@ def emitir_factura_anticipada_xml(
         if not file.filename.lower().endswith(".xml"):
             raise HTTPException(400, "El archivo debe ser XML")
 
-        # 2️⃣ Leer bytes
-        xml_bytes = file.file.read()
-        if not xml_bytes:
-            raise HTTPException(400, "Archivo XML vacío")
-
-        # 3️⃣ Parsear XML (RUTA REAL)
-        from services.xml.factura_electronica_parser import (
-            parse_factura_electronica_from_bytes
-        )
-
-        data = parse_factura_electronica_from_bytes(xml_bytes)
+        # 2️⃣ + 3️⃣ Leer y parsear en una sola pasada (hash + almacén)
+        try:
+            data, xml_attachment = parse_xml_upload(
+                cur, file, mapper=factura_from_comprobante
+            )
+        except AttachmentTooLarge as e:
+            raise HTTPException(413, str(e))
+        except ValueError as e:
+            raise HTTPException(400, f"XML inválido: {e}")
 
         # 4️⃣ Validar campos
         for field in ("numero_factura", "fecha_emision", "moneda", "total"):
@@ -664,7 +644,8 @@ def emitir_factura_anticipada_xml(
                 estado,
                 pdf_path,
                 created_at,
-                descripcion_servicio
+                descripcion_servicio,
+                xml_attachment_id
             )
             VALUES (
                 NULL,
@@ -679,7 +660,8 @@ def emitir_factura_anticipada_xml(
                 'EMITIDA',
                 %s,
                 NOW(),
-                'Factura electrónica cargada desde XML'
+                'Factura electrónica cargada desde XML',
+                %s
             )
             RETURNING id
         """, (
@@ -689,7 +671,8 @@ def emitir_factura_anticipada_xml(
             data["fecha_emision"],
             data["moneda"],
             float(data["total"]),
-            pdf_path
+            pdf_path,
+            xml_attachment["id"]
         ))
 
         factura_id = cur.fetchone()["id"]
@@ -699,7 +682,8 @@ def emitir_factura_anticipada_xml(
             "status": "ok",
             "factura_id": factura_id,
             "numero_documento": data["numero_factura"],
-            "pdf_path": pdf_path
+            "pdf_path": pdf_path,
+            "xml_sha256": xml_attachment["sha256"]
         }
 
     except HTTPException:
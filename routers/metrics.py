@@ -0,0 +1,48 @@
+# ============================================================
+# ROUTER: Métricas en formato texto de Prometheus
+# ============================================================
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services import geography
+from services.metrics import gauge_lines, http_metrics
+from services.pdf import render_pool
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _runtime_lines() -> list:
+    pool = render_pool.stats()
+    lines = gauge_lines(
+        "render_pool_queue_depth",
+        "PDFs enviados al pool y aún sin terminar.",
+        {(): pool["queue_depth"]}
+    )
+    lines += gauge_lines(
+        "render_pool_jobs",
+        "PDFs procesados por el pool, por resultado.",
+        {
+            (("result", "completed"),): pool["completed"],
+            (("result", "failed"),): pool["failed"],
+        }
+    )
+
+    caches = [geography.normalized.stats(), geography.flat.stats()]
+    lines += gauge_lines(
+        "geography_cache_reloads",
+        "Recargas del cache de geografía desde la BD.",
+        {(("source", c["source"]),): c["reloads"] for c in caches}
+    )
+    return lines
+
+
+# ============================================================
+# GET /metrics
+# ============================================================
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    body = http_metrics.render() + "\n".join(_runtime_lines()) + "\n"
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
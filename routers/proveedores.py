@@ -2,6 +2,14 @@ from fastapi import APIRouter, HTTPException
 import database
 from fastapi import APIRouter, HTTPException, Depends, Header
 from rbac_service import has_permission
+from psycopg2.extras import RealDictCursor
+from services.json_response import FastJSONResponse
+from services.pagination import (
+    CountStrategy,
+    DEFAULT_COUNT_STRATEGY,
+    count_total,
+    keyset_page
+)
 
 
 
@@ -98,50 +106,67 @@ def get_ultimo_proveedor():
 # LISTAR PROVEEDORES — PAGINADO
 # ============================================================
 @router.get("/")
-def get_proveedores(page: int = 1, page_size: int = 50):
-    offset = (page - 1) * page_size
+def get_proveedores(
+    after: str | None = None,
+    page: int = 1,
+    page_size: int = 50,
+    count: CountStrategy = DEFAULT_COUNT_STRATEGY
+):
+    """
+    after: codigo de la última fila recibida (next_cursor).
+    Sin after se usa page (OFFSET), por compatibilidad.
+    count: exact | estimated | cached | none (ver services/pagination.py)
+    """
+    conn = database.get_conn()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        rows, has_more, next_cursor = keyset_page(
+            cur,
+            """
+            SELECT
+                codigo AS "Codigo",
+                nombre AS "Nombre",
+                apellidos AS "Apellidos",
+                nombrecomercial AS "NombreComercial",
+                cedula_vat AS "Cedula",
+                pais AS "Pais",
+                provincia AS "Provincia",
+                canton AS "Canton",
+                distrito AS "Distrito",
+                direccionexacta AS "DireccionExacta",
+                prefijo AS "Prefijo",
+                telefono AS "Telefono",
+                correo AS "Correo",
+                terminospago AS "TerminosPago",
+                banco AS "Banco",
+                cuenta_iban AS "CuentaIBAN",
+                swiftcode AS "SwiftCode",
+                uid AS "UID",
+                direccionbanco AS "DireccionBanco",
+                tipoproveeduria AS "TipoProveeduria",
+                comentarios AS "Comentarios"
+            FROM proveedor
+            """,
+            key="codigo",
+            page_size=page_size,
+            after=after,
+            cursor_field="Codigo",
+            offset=(page - 1) * page_size
+        )
+
+        total = count_total(cur, count, "proveedor")
+    finally:
+        cur.close()
+        conn.close()
+
+    return FastJSONResponse({
+        "total": total,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "count_strategy": count,
+        "data": rows
+    })
 
-    rows = database.sql(f"""
-        SELECT codigo, nombre, apellidos, nombrecomercial,
-               cedula_vat, pais, provincia, canton, distrito,
-               direccionexacta, prefijo, telefono, correo,
-               terminospago, banco, cuenta_iban, swiftcode,
-               uid, direccionbanco, tipoproveeduria, comentarios
-        FROM proveedor
-        ORDER BY codigo ASC
-        LIMIT {page_size} OFFSET {offset}
-    """, fetch=True)
-
-    total = database.sql("SELECT COUNT(*) FROM proveedor", fetch=True)[0][0]
-
-    data = [
-        {
-            "Codigo": r[0],
-            "Nombre": r[1],
-            "Apellidos": r[2],
-            "NombreComercial": r[3],
-            "Cedula": r[4],
-            "Pais": r[5],
-            "Provincia": r[6],
-            "Canton": r[7],
-            "Distrito": r[8],
-            "DireccionExacta": r[9],
-            "Prefijo": r[10],
-            "Telefono": r[11],
-            "Correo": r[12],
-            "TerminosPago": r[13],
-            "Banco": r[14],
-            "CuentaIBAN": r[15],
-            "SwiftCode": r[16],
-            "UID": r[17],
-            "DireccionBanco": r[18],
-            "TipoProveeduria": r[19],
-            "Comentarios": r[20]
-        }
-        for r in rows
-    ]
-
-    return {"data": data, "total": total}
 
 # ============================================================
 # OBTENER UN PROVEEDOR POR CÓDIGO
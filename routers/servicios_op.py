@@ -2,6 +2,16 @@ from fastapi import APIRouter, HTTPException, Depends, Header
 from pydantic import BaseModel
 from datetime import datetime
 import database
+from services.numbering import next_number
+from psycopg2.extras import RealDictCursor
+from services.json_response import FastJSONResponse
+from services.pagination import (
+    CountStrategy,
+    DEFAULT_COUNT_STRATEGY,
+    count_total,
+    keyset_page,
+    where_sql
+)
 
 from rbac_service import has_permission
 
@@ -83,48 +93,86 @@ def add_servicio(data: ServicioCreate):
 
 
 # ============================================================
-# LISTAR — PAGINADO
+# LISTAR — PAGINADO (KEYSET POR consec)
 # ============================================================
 @router.get("/")
-def listar_servicios(page: int = 1, page_size: int = 50):
-    offset = (page - 1) * page_size
-
-    rows = database.sql(f"""
-        SELECT
-            consec, tipo, estado, num_informe,
-            buque_contenedor, cliente, contacto, detalle,
-            continente, pais, puerto,
-            operacion, surveyor, honorarios, costo_operativo,
-            fecha_inicio, hora_inicio,
-            fecha_fin, hora_fin, demoras, duracion,
-            factura, valor_factura, fecha_factura,
-            terminos_pago, fecha_vencimiento, dias_vencido,
-            razon_cancelacion, comentario_cancelacion
-        FROM servicios
-        ORDER BY consec DESC
-        LIMIT {page_size} OFFSET {offset}
-    """, fetch=True)
-
-    total = database.sql("SELECT COUNT(*) FROM servicios", fetch=True)[0][0]
-
-    columnas = [
-        "consec", "tipo", "estado", "num_informe",
-        "buque_contenedor", "cliente", "contacto", "detalle",
-        "continente", "pais", "puerto",
-        "operacion", "surveyor", "honorarios", "costo_operativo",
-        "fecha_inicio", "hora_inicio",
-        "fecha_fin", "hora_fin", "demoras", "duracion",
-        "factura", "valor_factura", "fecha_factura",
-        "terminos_pago", "fecha_vencimiento", "dias_vencido",
-        "razon_cancelacion", "comentario_cancelacion"
-    ]
+def listar_servicios(
+    after: int | None = None,
+    page: int = 1,
+    page_size: int = 50,
+    estado: str | None = None,
+    cliente: str | None = None,
+    surveyor: str | None = None,
+    fecha_desde: str | None = None,
+    fecha_hasta: str | None = None,
+    count: CountStrategy = DEFAULT_COUNT_STRATEGY
+):
+    """
+    after: consec de la última fila recibida (next_cursor).
+    Sin after se usa page (OFFSET), por compatibilidad.
+    fecha_desde / fecha_hasta filtran fecha_inicio (YYYY-MM-DD).
+    count: exact | estimated | cached | none (ver services/pagination.py)
+    """
+    conditions = []
+    params = []
+
+    if estado:
+        conditions.append("estado = %s")
+        params.append(estado)
+    if cliente:
+        conditions.append("cliente = %s")
+        params.append(cliente)
+    if surveyor:
+        conditions.append("surveyor = %s")
+        params.append(surveyor)
+    if fecha_desde:
+        conditions.append("fecha_inicio >= %s")
+        params.append(fecha_desde)
+    if fecha_hasta:
+        conditions.append("fecha_inicio <= %s")
+        params.append(fecha_hasta)
+
+    conn = database.get_conn()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        rows, has_more, next_cursor = keyset_page(
+            cur,
+            """
+            SELECT
+                consec, tipo, estado, num_informe,
+                buque_contenedor, cliente, contacto, detalle,
+                continente, pais, puerto,
+                operacion, surveyor, honorarios, costo_operativo,
+                fecha_inicio, hora_inicio,
+                fecha_fin, hora_fin, demoras, duracion,
+                factura, valor_factura, fecha_factura,
+                terminos_pago, fecha_vencimiento, dias_vencido,
+                razon_cancelacion, comentario_cancelacion
+            FROM servicios
+            """,
+            key="consec",
+            page_size=page_size,
+            after=after,
+            descending=True,
+            conditions=conditions,
+            params=params,
+            offset=(page - 1) * page_size
+        )
 
-    data = []
-    for r in rows:
-        item = {c: ("" if r[i] is None else str(r[i])) for i, c in enumerate(columnas)}
-        data.append(item)
+        total = count_total(
+            cur, count, "servicios", where_sql(conditions), params
+        )
+    finally:
+        cur.close()
+        conn.close()
 
-    return {"total": total, "data": data}
+    return FastJSONResponse({
+        "total": total,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "count_strategy": count,
+        "data": rows
+    })
 
 
 # ============================================================
@@ -369,23 +417,26 @@ def cerrar_operacion(consec: int, data: dict):
 # ============================================================
 @router.put("/generar_informe/{consec}")
 def generar_informe(consec: int):
+    conn = database.get_conn()
+    cur = conn.cursor()
+
     try:
         # --------------------------------------------------
-        # 1. Obtener fecha de inicio
+        # 1. Obtener fecha de inicio (lock del servicio)
         # --------------------------------------------------
-        row = database.sql(
-            "SELECT fecha_inicio FROM servicios WHERE consec = %s",
-            (consec,),
-            fetch=True
+        cur.execute(
+            "SELECT fecha_inicio FROM servicios WHERE consec = %s FOR UPDATE",
+            (consec,)
         )
+        row = cur.fetchone()
 
-        if not row or not row[0][0]:
+        if not row or not row[0]:
             raise HTTPException(
                 status_code=400,
                 detail="Servicio sin fecha de inicio"
             )
 
-        fecha_inicio = row[0][0]
+        fecha_inicio = row[0]
 
         if isinstance(fecha_inicio, str):
             fecha_dt = datetime.strptime(fecha_inicio[:10], "%Y-%m-%d")
@@ -396,33 +447,16 @@ def generar_informe(consec: int):
         year = fecha_dt.strftime("%Y")
 
         # --------------------------------------------------
-        # 2. Obtener último consecutivo
-        #    BASE = 2128 si no hay informes aún
+        # 2. Siguiente consecutivo (serie INFORME, gapless)
         # --------------------------------------------------
-        max_row = database.sql(
-            """
-            SELECT COALESCE(
-                MAX(
-                    NULLIF(split_part(num_informe, '-', 1), '')::int
-                ),
-                2128
-            )
-            FROM servicios
-            WHERE num_informe IS NOT NULL
-              AND num_informe <> ''
-            """,
-            fetch=True
-        )
-
-        ultimo = int(max_row[0][0])
-        nuevo = ultimo + 1
+        nuevo = next_number(cur, "INFORME")
 
         num_informe = f"{nuevo}-{ddmm}-{year}"
 
         # --------------------------------------------------
-        # 3. Actualizar servicio
+        # 3. Actualizar servicio (misma transacción)
         # --------------------------------------------------
-        database.sql(
+        cur.execute(
             """
             UPDATE servicios
             SET num_informe = %s,
@@ -432,13 +466,19 @@ def generar_informe(consec: int):
             (num_informe, consec)
         )
 
+        conn.commit()
+
         return {
             "status": "ok",
             "num_informe": num_informe
         }
 
     except HTTPException:
+        conn.rollback()
         raise
     except Exception as e:
+        conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
-
+    finally:
+        cur.close()
+        conn.close()
@@ -2,6 +2,14 @@ from fastapi import APIRouter, HTTPException
 import database
 from fastapi import APIRouter, HTTPException, Depends, Header
 from rbac_service import has_permission
+from psycopg2.extras import RealDictCursor
+from services.json_response import FastJSONResponse
+from services.pagination import (
+    CountStrategy,
+    DEFAULT_COUNT_STRATEGY,
+    count_total,
+    keyset_page
+)
 
 router = APIRouter(prefix="/surveyores", tags=["Surveyores"])
 
@@ -102,55 +110,49 @@ def get_ultimo_surveyor():
 # LISTAR SURVEYORS — PAGINADO
 # ============================================================
 @router.get("/")
-def get_surveyores(page: int = 1, page_size: int = 50):
-    offset = (page - 1) * page_size
+def get_surveyores(
+    after: str | None = None,
+    page: int = 1,
+    page_size: int = 50,
+    count: CountStrategy = DEFAULT_COUNT_STRATEGY
+):
+    """
+    after: codigo de la última fila recibida (next_cursor).
+    Sin after se usa page (OFFSET), por compatibilidad.
+    count: exact | estimated | cached | none (ver services/pagination.py)
+    """
+    conn = database.get_conn()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        rows, has_more, next_cursor = keyset_page(
+            cur,
+            """
+            SELECT
+                codigo, nombre, apellidos, estado_civil, genero, nacionalidad,
+                prefijo, telefono, provincia, canton, distrito, direccion,
+                jornada, operacion, honorario, pago, banco, cuenta_iban,
+                moneda, swift, uid, enfermedades, contacto_emergencia,
+                telefono_emergencia, puerto
+            FROM surveyor
+            """,
+            key="codigo",
+            page_size=page_size,
+            after=after,
+            offset=(page - 1) * page_size
+        )
 
-    rows = database.sql(f"""
-        SELECT
-            codigo,nombre,apellidos,estado_civil,genero,nacionalidad,
-            prefijo,telefono,provincia,canton,distrito,direccion,
-            jornada,operacion,honorario,pago,banco,cuenta_iban,
-            moneda,swift,uid,enfermedades,contacto_emergencia,
-            telefono_emergencia,puerto
-        FROM surveyor
-        ORDER BY codigo ASC
-        LIMIT {page_size} OFFSET {offset}
-    """, fetch=True)
-
-    total = database.sql("SELECT COUNT(*) FROM surveyor", fetch=True)[0][0]
-
-    data = [
-        {
-            "codigo": r[0],
-            "nombre": r[1],
-            "apellidos": r[2],
-            "estado_civil": r[3],
-            "genero": r[4],
-            "nacionalidad": r[5],
-            "prefijo": r[6],
-            "telefono": r[7],
-            "provincia": r[8],
-            "canton": r[9],
-            "distrito": r[10],
-            "direccion": r[11],
-            "jornada": r[12],
-            "operacion": r[13],
-            "honorario": r[14],
-            "pago": r[15],
-            "banco": r[16],
-            "cuenta_iban": r[17],
-            "moneda": r[18],
-            "swift": r[19],
-            "uid": r[20],
-            "enfermedades": r[21],
-            "contacto_emergencia": r[22],
-            "telefono_emergencia": r[23],
-            "puerto": r[24],
-        }
-        for r in rows
-    ]
-
-    return {"total": total, "data": data}
+        total = count_total(cur, count, "surveyor")
+    finally:
+        cur.close()
+        conn.close()
+
+    return FastJSONResponse({
+        "total": total,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "count_strategy": count,
+        "data": rows
+    })
 
 
 # ============================================================
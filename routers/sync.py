@@ -0,0 +1,61 @@
+# ============================================================
+# ROUTER: Sync incremental de maestros para el cliente de escritorio
+# ============================================================
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from psycopg2.extensions import ISOLATION_LEVEL_REPEATABLE_READ
+
+import database
+from services.json_response import FastJSONResponse
+from services.master_data import MASTER_TABLES, master_data_changes
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+# ============================================================
+# GET /sync/master-data?since=<version>&tables=clientes,proveedores
+# ============================================================
+@router.get("/master-data")
+def sync_master_data(
+    since: int = Query(0, ge=0),
+    tables: Optional[str] = Query(
+        None,
+        description="Lista separada por comas; por defecto todos: "
+                    + ", ".join(MASTER_TABLES)
+    )
+):
+    """
+    since=0 → carga completa. Luego enviar la "version" recibida:
+    solo vuelven filas insertadas / actualizadas (upserts) y códigos
+    borrados (deleted) desde entonces.
+    """
+    names = list(MASTER_TABLES)
+    if tables:
+        names = [t.strip() for t in tables.split(",") if t.strip()]
+        invalid = [t for t in names if t not in MASTER_TABLES]
+        if invalid:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tablas no soportadas: {', '.join(invalid)}"
+            )
+
+    conn = database.get_conn()
+    try:
+        conn.set_session(
+            isolation_level=ISOLATION_LEVEL_REPEATABLE_READ,
+            readonly=True
+        )
+        data = master_data_changes(conn, since, names)
+        conn.commit()
+    except HTTPException:
+        conn.rollback()
+        raise
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        conn.close()
+
+    return FastJSONResponse(data)
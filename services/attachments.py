@@ -0,0 +1,297 @@
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+
+from psycopg2.extras import RealDictCursor
+
+
+# ============================================================
+# ALMACÉN DE ADJUNTOS (CONTENT-ADDRESSED)
+# ============================================================
+# Cada archivo se guarda una sola vez bajo su SHA-256:
+#   storage/attachments/ab/cd/abcd…
+# El hash se calcula mientras se copia el upload a un temporal del
+# mismo filesystem; al terminar se hace os.replace atómico (o se
+# descarta el temporal si el contenido ya existía). La tabla
+# attachments registra tamaño, mime y nombre original.
+#
+# El archivo se publica antes del commit: si la transacción hace
+# rollback queda un blob sin fila. sweep_orphans() los borra
+# (python -m services.attachments, p.ej. en un cron diario).
+
+ATTACHMENTS_DIR = "storage/attachments"
+ATTACHMENTS_TMP_DIR = os.path.join(ATTACHMENTS_DIR, ".tmp")
+COPY_CHUNK_SIZE = 1024 * 1024
+
+DEFAULT_MIME_TYPE = "application/octet-stream"
+
+# Un blob sin fila más nuevo que esto puede ser de una transacción
+# todavía abierta: no se toca
+ORPHAN_MIN_AGE_SECONDS = 24 * 3600
+ORPHAN_SWEEP_BATCH = 1000
+
+
+class AttachmentTooLarge(ValueError):
+    pass
+
+
+def guess_mime_type(filename: str) -> str:
+    mime, _ = mimetypes.guess_type(filename or "")
+    return mime or DEFAULT_MIME_TYPE
+
+
+def path_for(sha256: str) -> str:
+    return os.path.join(ATTACHMENTS_DIR, sha256[:2], sha256[2:4], sha256)
+
+
+def _temp_file():
+    os.makedirs(ATTACHMENTS_TMP_DIR, exist_ok=True)
+    return tempfile.NamedTemporaryFile(
+        dir=ATTACHMENTS_TMP_DIR, prefix="up-", delete=False
+    )
+
+
+def _publish(tmp_path: str, sha256: str) -> tuple:
+    """
+    Mueve el temporal a su ruta final. Devuelve (ruta, deduplicado).
+    """
+    path = path_for(sha256)
+
+    if os.path.exists(path):
+        os.remove(tmp_path)
+        return path, True
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    return path, False
+
+
+def _register(cur, sha256, size, mime_type, filename, path, deduplicated):
+    with cur.connection.cursor(cursor_factory=RealDictCursor) as c:
+        c.execute("""
+            INSERT INTO attachments (
+                sha256,
+                size_bytes,
+                mime_type,
+                original_name,
+                storage_path
+            )
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (sha256) DO UPDATE
+            SET last_used_at = NOW()
+            RETURNING id, sha256, size_bytes, mime_type,
+                      original_name, storage_path
+        """, (sha256, size, mime_type, filename, path))
+        row = dict(c.fetchone())
+
+    row["deduplicated"] = deduplicated
+    return row
+
+
+# ============================================================
+# API
+# ============================================================
+def store_stream(
+    cur,
+    fileobj,
+    filename: str,
+    mime_type: str = None,
+    max_bytes: int = None,
+    sink=None
+) -> dict:
+    """
+    Copia un stream binario (p.ej. UploadFile.file) al almacén,
+    calculando el SHA-256 en la misma pasada.
+
+    sink (opcional): objeto con feed(chunk) / close() que recibe
+    los mismos chunks (p.ej. un parser incremental). Si falla, el
+    archivo no se publica.
+    AttachmentTooLarge si supera max_bytes.
+    """
+    h = hashlib.sha256()
+    size = 0
+
+    tmp = _temp_file()
+    try:
+        with tmp:
+            while True:
+                chunk = fileobj.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise AttachmentTooLarge(
+                        f"Archivo supera el máximo de {max_bytes} bytes"
+                    )
+                h.update(chunk)
+                tmp.write(chunk)
+                if sink is not None:
+                    sink.feed(chunk)
+
+        if sink is not None:
+            sink.close()
+
+        sha256 = h.hexdigest()
+        path, dedup = _publish(tmp.name, sha256)
+    except Exception:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
+
+    return _register(
+        cur, sha256, size,
+        mime_type or guess_mime_type(filename),
+        filename, path, dedup
+    )
+
+
+def store_bytes(cur, data: bytes, filename: str, mime_type: str = None) -> dict:
+    """
+    Igual que store_stream para contenido ya en memoria.
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = path_for(sha256)
+    dedup = os.path.exists(path)
+
+    if not dedup:
+        tmp = _temp_file()
+        with tmp:
+            tmp.write(data)
+        path, dedup = _publish(tmp.name, sha256)
+
+    return _register(
+        cur, sha256, len(data),
+        mime_type or guess_mime_type(filename),
+        filename, path, dedup
+    )
+
+
+def store_file(
+    cur,
+    src_path: str,
+    filename: str = None,
+    mime_type: str = None,
+    move: bool = False
+) -> dict:
+    """
+    Registra un archivo ya generado en disco (p.ej. un PDF).
+
+    move=True  → el original desaparece (se mueve al almacén).
+    move=False → el original se conserva y se COPIA. Nunca hard link:
+                 el original suele re-generarse en la misma ruta
+                 (open('wb') trunca en sitio) y reescribiría el blob
+                 sin que cambie su sha256.
+    """
+    filename = filename or os.path.basename(src_path)
+
+    if not move:
+        with open(src_path, "rb") as f:
+            return store_stream(cur, f, filename, mime_type)
+
+    h = hashlib.sha256()
+    with open(src_path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b""):
+            h.update(chunk)
+
+    sha256 = h.hexdigest()
+    size = os.path.getsize(src_path)
+    path = path_for(sha256)
+    dedup = os.path.exists(path)
+
+    if dedup:
+        os.remove(src_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(src_path, path)
+        except OSError:
+            shutil.move(src_path, path)
+
+    return _register(
+        cur, sha256, size,
+        mime_type or guess_mime_type(filename),
+        filename, path, dedup
+    )
+
+
+def get_attachment(cur, sha256: str):
+    with cur.connection.cursor(cursor_factory=RealDictCursor) as c:
+        c.execute("""
+            SELECT id, sha256, size_bytes, mime_type,
+                   original_name, storage_path, created_at
+            FROM attachments
+            WHERE sha256 = %s
+        """, (sha256,))
+        return c.fetchone()
+
+
+# ============================================================
+# LIMPIEZA DE BLOBS HUÉRFANOS (rollback tras publicar)
+# ============================================================
+def _old_files(base: str, cutoff: float):
+    for root, _dirs, files in os.walk(base):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    yield name, path
+            except FileNotFoundError:
+                continue
+
+
+def sweep_orphans(cur, min_age_seconds: int = ORPHAN_MIN_AGE_SECONDS) -> int:
+    """
+    Borra blobs sin fila en attachments y temporales abandonados,
+    ambos más viejos que min_age_seconds. Devuelve cuántos borró.
+    """
+    cutoff = time.time() - min_age_seconds
+    removed = 0
+
+    for _name, path in _old_files(ATTACHMENTS_TMP_DIR, cutoff):
+        os.remove(path)
+        removed += 1
+
+    def flush(batch):
+        cur.execute(
+            "SELECT sha256 FROM attachments WHERE sha256 = ANY(%s)",
+            (list(batch),)
+        )
+        known = {row[0] for row in cur.fetchall()}
+        count = 0
+        for sha256, path in batch.items():
+            if sha256 not in known:
+                try:
+                    os.remove(path)
+                    count += 1
+                except FileNotFoundError:
+                    pass
+        return count
+
+    batch = {}
+    tmp_dir = os.path.abspath(ATTACHMENTS_TMP_DIR)
+    for name, path in _old_files(ATTACHMENTS_DIR, cutoff):
+        if os.path.abspath(path).startswith(tmp_dir + os.sep):
+            continue
+        batch[name] = path
+        if len(batch) >= ORPHAN_SWEEP_BATCH:
+            removed += flush(batch)
+            batch = {}
+    if batch:
+        removed += flush(batch)
+
+    return removed
+
+
+if __name__ == "__main__":
+    from database import get_conn
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            print(f"Blobs huérfanos borrados: {sweep_orphans(cur)}")
+        conn.rollback()
+    finally:
+        conn.close()
@@ -0,0 +1,280 @@
+import asyncio
+from typing import Literal
+
+from psycopg2.extensions import ISOLATION_LEVEL_REPEATABLE_READ
+from psycopg2.extras import RealDictCursor
+from starlette.concurrency import run_in_threadpool
+
+import database
+
+
+# ============================================================
+# CHANGE FEED DE GRILLAS TRANSACCIONALES
+# ============================================================
+# Lee change_feed (migrations/012). Protocolo del cliente:
+#   1. since=0 → solo devuelve version (reset=True): el cliente hace
+#      su búsqueda completa y guarda esa version.
+#   2. since=<version> → cambios desde entonces, en orden de seq;
+#      aplicar por (table_name, row_key): I/U reemplaza la fila con
+#      row_data, D la quita. Guardar la nueva version.
+#   3. reset=True → hubo más de CHANGE_FEED_MAX_ROWS cambios o el
+#      historial ya se depuró: volver a la búsqueda completa.
+# Un mismo seq puede llegar dos veces; el cliente ignora los vistos.
+
+ChangeDomain = Literal["collections", "billing", "itp", "disputes"]
+
+CHANGE_FEED_MAX_ROWS = 1000
+
+
+def changes_since(conn, domain: str, since: int,
+                  limit: int = CHANGE_FEED_MAX_ROWS,
+                  include_txid: bool = False) -> dict:
+    """
+    conn debe estar en REPEATABLE READ (version y cambios salen del
+    mismo snapshot). include_txid agrega txid a cada cambio (uso
+    interno del poller).
+    """
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT
+                pg_snapshot_xmin(pg_current_snapshot())::text::bigint
+                    AS version,
+                (SELECT version
+                 FROM data_versions
+                 WHERE name = 'change_feed_pruned') AS pruned
+        """)
+        head = cur.fetchone()
+
+        result = {
+            "domain": domain,
+            "since": since,
+            "version": head["version"],
+            "reset": False,
+            "changes": []
+        }
+
+        if since <= 0 or (head["pruned"] and since < head["pruned"]):
+            result["reset"] = True
+            return result
+
+        cur.execute(f"""
+            SELECT seq, {"txid, " if include_txid else ""}table_name,
+                   row_key, op, row_data, changed_at
+            FROM change_feed
+            WHERE domain = %s
+              AND txid >= %s
+            ORDER BY seq
+            LIMIT %s
+        """, (domain, since, limit + 1))
+        rows = cur.fetchall()
+
+    if len(rows) > limit:
+        result["reset"] = True
+    else:
+        result["changes"] = rows
+
+    return result
+
+
+# ============================================================
+# POLLER COMPARTIDO PARA /changes/stream
+# ============================================================
+# Un poller por dominio y por proceso, con UNA conexión persistente,
+# consulta el feed cada CHANGE_STREAM_POLL_SECONDS mientras haya
+# suscriptores y reparte lo nuevo a la cola de cada stream: N grillas
+# abiertas no son N conexiones nuevas cada pocos segundos.
+#
+# La ventana txid >= version puede traer otra vez filas ya enviadas
+# (una transacción larga en cualquier parte de la BD retiene xmin).
+# El poller recuerda los seq de la ventana anterior y solo reparte
+# los que no estaban. No se filtra por seq > último: seq se asigna
+# al insertar, no al commit, y se perderían cambios.
+#
+# Cada stream se suscribe con la version de su lectura inicial. La
+# lectura siguiente del poller arranca en la menor version pendiente
+# (aunque el poller recién arranque o ya vaya más adelante) y el
+# suscriptor nuevo recibe todo lo de txid >= su version: lo que se
+# confirmó entre su lectura inicial y el snapshot del poller no se
+# pierde.
+
+CHANGE_STREAM_POLL_SECONDS = 3
+CHANGE_STREAM_QUEUE_MAX = 100
+
+
+class ChangeFeedPoller:
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.version = None
+        self.polls = 0
+        self._window = set()
+        self._subscribers = set()
+        self._pending = {}      # cola → version desde la que se suscribió
+        self._task = None
+        self._conn = None
+
+    # --------------------------------------------------------
+    # Lectura (en el threadpool)
+    # --------------------------------------------------------
+    def _connection(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = database.get_conn()
+            self._conn.set_session(
+                isolation_level=ISOLATION_LEVEL_REPEATABLE_READ,
+                readonly=True
+            )
+        return self._conn
+
+    def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    def _poll(self, floor):
+        since = self.version
+        if floor is not None and (since is None or floor < since):
+            since = floor
+
+        conn = self._connection()
+        try:
+            data = changes_since(
+                conn, self.domain, since or 0, include_txid=True
+            )
+            conn.commit()
+        except Exception:
+            self._close()
+            raise
+
+        self.polls += 1
+        previous, window = self.version, self._window
+        self.version = data["version"]
+
+        if data["reset"]:
+            self._window = set()
+            return {"event": "reset", "version": data["version"]}
+
+        rows = data["changes"]
+        self._window = {r["seq"] for r in rows}
+        return {
+            "event": "changes",
+            "version": data["version"],
+            "rows": rows,
+            "previous": previous,
+            "window": window,
+        }
+
+    # --------------------------------------------------------
+    # Suscripción (en el event loop)
+    # --------------------------------------------------------
+    def subscribe(self, since: int) -> asyncio.Queue:
+        """
+        since = version de la lectura inicial del stream.
+        """
+        queue = asyncio.Queue(maxsize=CHANGE_STREAM_QUEUE_MAX)
+        self._subscribers.add(queue)
+        self._pending[queue] = since
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        self._pending.pop(queue, None)
+
+    def _put(self, queue: asyncio.Queue, message: dict):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Cliente lento: se descarta lo pendiente y recarga
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({
+                "event": "reset", "version": message["version"]
+            })
+
+    def _dispatch(self, result: dict, pending: dict):
+        if result["event"] == "reset":
+            for queue in list(self._subscribers):
+                if queue not in self._pending:
+                    self._put(queue, result)
+            return
+
+        version = result["version"]
+        previous = result["previous"]
+
+        # Lo nuevo para quienes ya estaban: fuera de la ventana
+        # anterior y dentro del rango que cubría la lectura previa
+        nuevos = [
+            r for r in result["rows"]
+            if previous is not None
+            and r["txid"] >= previous
+            and r["seq"] not in result["window"]
+        ]
+
+        for queue in list(self._subscribers):
+            if queue in self._pending:
+                # Suscrito durante la lectura: entra en la próxima
+                continue
+            if queue in pending:
+                rows = [r for r in result["rows"]
+                        if r["txid"] >= pending[queue]]
+            else:
+                rows = nuevos
+            if rows:
+                self._put(queue, {
+                    "event": "changes",
+                    "version": version,
+                    "changes": [_without_txid(r) for r in rows],
+                })
+
+    async def _run(self):
+        try:
+            while self._subscribers:
+                pending, self._pending = self._pending, {}
+                floor = min(pending.values()) if pending else None
+
+                try:
+                    result = await run_in_threadpool(self._poll, floor)
+                except Exception as e:
+                    print(f"❌ Error leyendo change_feed ({self.domain}):", e)
+                    # Los suscriptores nuevos esperan a la próxima lectura
+                    for queue, since in pending.items():
+                        if queue in self._subscribers:
+                            self._pending.setdefault(queue, since)
+                    result = None
+
+                if result:
+                    self._dispatch(result, pending)
+
+                await asyncio.sleep(CHANGE_STREAM_POLL_SECONDS)
+        finally:
+            # Sin await antes de soltar _task: un subscribe() que llegue
+            # ahora arranca un poller nuevo con su propia conexión
+            conn, self._conn = self._conn, None
+            self._task = None
+            self.version = None
+            self._window = set()
+            if conn is not None:
+                await run_in_threadpool(conn.close)
+
+    def stats(self) -> dict:
+        return {
+            "domain": self.domain,
+            "subscribers": len(self._subscribers),
+            "version": self.version,
+            "polls": self.polls,
+        }
+
+
+def _without_txid(row: dict) -> dict:
+    return {k: v for k, v in row.items() if k != "txid"}
+
+
+_pollers = {}
+
+
+def poller_for(domain: str) -> ChangeFeedPoller:
+    poller = _pollers.get(domain)
+    if poller is None:
+        poller = _pollers[domain] = ChangeFeedPoller(domain)
+    return poller
@@ -0,0 +1,50 @@
+from typing import Literal
+
+from services.json_response import FastJSONResponse
+
+
+# ============================================================
+# LECTURAS GRANDES EN FORMATO COLUMNAR
+# ============================================================
+# RealDictCursor crea un RealDictRow (OrderedDict) por fila, que
+# repite las claves y pesa varias veces más que la tupla que
+# entrega psycopg2. Para listados grandes se lee con el cursor
+# normal (columnas + tuplas) y el endpoint elige la forma (?shape=):
+#   records  → [{"col": valor, ...}, ...]   (forma de siempre)
+#   columnar → {"columns": [...], "rows": [[...], ...]}
+#              las grillas Tkinter lo cargan directo, sin repetir
+#              nombres de columna en cada fila.
+
+RowShape = Literal["records", "columnar"]
+
+DEFAULT_ROW_SHAPE = "records"
+
+
+def fetch_columnar(conn, sql: str, params=None) -> tuple:
+    """
+    Ejecuta sql con un cursor de tuplas. Devuelve (columnas, filas).
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        columns = [d[0] for d in cur.description]
+        return columns, cur.fetchall()
+
+
+def as_records(columns: list, rows: list) -> list:
+    return [dict(zip(columns, r)) for r in rows]
+
+
+def shaped(columns: list, rows: list, shape: str, key: str = "data", **extra):
+    """
+    Respuesta JSON con las filas en la forma pedida.
+
+    records  → {**extra, key: [dict, ...]}  (key=None → la lista sola)
+    columnar → {**extra, "columns": [...], "rows": [[...], ...]}
+    """
+    if shape == "columnar":
+        return FastJSONResponse({**extra, "columns": columns, "rows": rows})
+
+    records = as_records(columns, rows)
+    if key is None:
+        return FastJSONResponse(records)
+    return FastJSONResponse({**extra, key: records})
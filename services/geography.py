@@ -0,0 +1,163 @@
+import hashlib
+import threading
+import time
+import unicodedata
+
+import database
+
+
+# ============================================================
+# CACHE EN MEMORIA: CONTINENTES → PAÍSES → PUERTOS
+# ============================================================
+# Datos de referencia que casi nunca cambian: se cargan una vez por
+# proceso en un índice por nombre normalizado (sin acentos, sin
+# mayúsculas: mismo criterio que unaccent(x) ILIKE unaccent(%s)).
+# Cada GEOGRAPHY_VERSION_CHECK_SECONDS se lee data_versions
+# ('geography', migrations/010) y se recarga solo si la versión
+# cambió. El ETag de las respuestas es el hash del contenido.
+#
+# Dos fuentes (mismas tablas que ya usaban los endpoints):
+#   normalized → continente / pais / puerto     (/continentes …)
+#   flat       → continentes_paises_puertos     (/cpp/…)
+
+GEOGRAPHY_VERSION_NAME = "geography"
+GEOGRAPHY_VERSION_CHECK_SECONDS = 30
+GEOGRAPHY_CACHE_CONTROL = "private, max-age=300"
+
+SOURCE_SQL = {
+    "normalized": """
+        SELECT c.nombre, pa.nombre, pu.nombre
+        FROM continente c
+        LEFT JOIN pais pa   ON pa.continente_id = c.id
+        LEFT JOIN puerto pu ON pu.pais_id = pa.id
+    """,
+    "flat": """
+        SELECT continente, pais, puerto
+        FROM continentes_paises_puertos
+    """,
+}
+
+
+def fold(name: str) -> str:
+    """
+    Clave de búsqueda: sin acentos y casefold ("Perú" → "peru").
+    """
+    decomposed = unicodedata.normalize("NFKD", name.strip())
+    return "".join(
+        ch for ch in decomposed if not unicodedata.combining(ch)
+    ).casefold()
+
+
+def _clean(value):
+    return value if value else None
+
+
+class GeographyIndex:
+    """
+    Índice construido desde filas (continente, pais, puerto); no se
+    modifica después de creado.
+    """
+
+    def __init__(self, rows, version=None):
+        continentes = set()
+        paises = {}
+        puertos = {}
+        puertos_all = set()
+
+        for continente, pais, puerto in rows:
+            continente, pais, puerto = (
+                _clean(continente), _clean(pais), _clean(puerto)
+            )
+            if continente:
+                continentes.add(continente)
+                if pais:
+                    paises.setdefault(fold(continente), set()).add(pais)
+            if puerto:
+                puertos_all.add(puerto)
+                if pais:
+                    puertos.setdefault(fold(pais), set()).add(puerto)
+
+        # Orden alfabético sin acentos (≈ ORDER BY nombre de la BD)
+        self.version = version
+        self.continentes = sorted(continentes, key=fold)
+        self.paises = {k: sorted(v, key=fold) for k, v in paises.items()}
+        self.puertos = {k: sorted(v, key=fold) for k, v in puertos.items()}
+        self.puertos_all = sorted(puertos_all, key=fold)
+
+        contenido = repr((
+            self.continentes,
+            sorted(self.paises.items()),
+            sorted(self.puertos.items()),
+            self.puertos_all,
+        ))
+        self.etag = f'"geo-{hashlib.sha1(contenido.encode()).hexdigest()[:20]}"'
+
+    def paises_de(self, continente: str) -> list:
+        return self.paises.get(fold(continente), [])
+
+    def puertos_de(self, pais: str) -> list:
+        return self.puertos.get(fold(pais), [])
+
+
+class GeographyCache:
+
+    def __init__(self, source: str):
+        self.source = source
+        self._index = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def _fresh(self) -> bool:
+        return (
+            self._index is not None
+            and time.monotonic() - self._checked_at
+            < GEOGRAPHY_VERSION_CHECK_SECONDS
+        )
+
+    def get(self) -> GeographyIndex:
+        if self._fresh():
+            return self._index
+
+        with self._lock:
+            if self._fresh():
+                return self._index
+
+            conn = database.get_conn()
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    "SELECT version FROM data_versions WHERE name = %s",
+                    (GEOGRAPHY_VERSION_NAME,)
+                )
+                row = cur.fetchone()
+                version = row[0] if row else None
+
+                if (
+                    self._index is None
+                    or version is None
+                    or version != self._index.version
+                ):
+                    cur.execute(SOURCE_SQL[self.source])
+                    self._index = GeographyIndex(cur.fetchall(), version)
+                    self.reloads += 1
+            finally:
+                cur.close()
+                conn.close()
+
+            self._checked_at = time.monotonic()
+            return self._index
+
+    def stats(self) -> dict:
+        index = self._index
+        return {
+            "source": self.source,
+            "version": index.version if index else None,
+            "reloads": self.reloads,
+            "continentes": len(index.continentes) if index else 0,
+            "puertos": len(index.puertos_all) if index else 0,
+        }
+
+
+normalized = GeographyCache("normalized")
+flat = GeographyCache("flat")
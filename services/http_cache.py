@@ -0,0 +1,127 @@
+import hashlib
+import os
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+from services.json_response import FastJSONResponse
+
+
+# ============================================================
+# RESPUESTAS CONDICIONALES (ETag / 304 / Range)
+# ============================================================
+# FileResponse de Starlette ya atiende Range / If-Range (206/416);
+# aquí se agrega If-None-Match / If-Modified-Since → 304.
+
+DEFAULT_CACHE_CONTROL = "private, max-age=0, must-revalidate"
+
+
+def strong_etag(value: str) -> str:
+    """
+    ETag fuerte a partir de un identificador de contenido.
+    """
+    return f'"{value}"'
+
+
+def file_etag(path: str, stat_result=None) -> str:
+    """
+    ETag fuerte derivado de (inode, mtime_ns, size) del archivo.
+    Barato: no lee el contenido.
+    """
+    st = stat_result or os.stat(path)
+    base = f"{st.st_ino}-{st.st_mtime_ns}-{st.st_size}"
+    return strong_etag(hashlib.sha1(base.encode()).hexdigest())
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [t.strip() for t in header.split(",")]
+    # Comparación débil para If-None-Match (RFC 9110 §13.1.2)
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (c[2:] if c.startswith("W/") else c) == bare
+        for c in candidates
+    )
+
+
+def is_not_modified(request: Request, etag: str, mtime: float = None) -> bool:
+    """
+    True si el cliente ya tiene esta versión (If-None-Match tiene
+    prioridad sobre If-Modified-Since).
+    """
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        return _etag_matches(inm, etag)
+
+    ims = request.headers.get("if-modified-since")
+    if ims and mtime is not None:
+        try:
+            since = parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= int(since)
+
+    return False
+
+
+def not_modified_response(etag: str, headers: dict = None) -> Response:
+    h = {"ETag": etag, "Cache-Control": DEFAULT_CACHE_CONTROL}
+    h.update(headers or {})
+    return Response(status_code=304, headers=h)
+
+
+def conditional_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    filename: str = None,
+    etag: str = None,
+    cache_control: str = DEFAULT_CACHE_CONTROL,
+    content_disposition_type: str = "attachment"
+) -> Response:
+    """
+    Sirve un archivo con ETag fuerte, Last-Modified, 304 y Range.
+    Si no se pasa etag se deriva del stat del archivo.
+    """
+    st = os.stat(path)
+    etag = etag or file_etag(path, st)
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+    }
+
+    if is_not_modified(request, etag, st.st_mtime):
+        return not_modified_response(etag, headers)
+
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=filename,
+        headers=headers,
+        stat_result=st,
+        content_disposition_type=content_disposition_type
+    )
+
+
+def conditional_json_response(
+    request: Request,
+    content,
+    etag: str,
+    cache_control: str = DEFAULT_CACHE_CONTROL
+) -> Response:
+    """
+    JSON con ETag y Cache-Control; 304 sin cuerpo si el cliente ya
+    tiene esa versión (If-None-Match).
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, headers)
+
+    return FastJSONResponse(content, headers=headers)
@@ -0,0 +1,66 @@
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # requirements.txt lo incluye; stdlib como respaldo
+    orjson = None
+
+
+# ============================================================
+# RESPUESTA JSON RÁPIDA (Decimal / fechas nativos)
+# ============================================================
+# Si un endpoint devuelve un dict, FastAPI lo pasa completo por
+# jsonable_encoder (recorre cada valor en Python) antes de
+# serializar. Devolviendo FastJSONResponse(content) se salta ese
+# paso: las filas de RealDictCursor se serializan tal cual y solo
+# los tipos que JSON no conoce pasan por _default:
+#   Decimal   → float (igual que el float() manual que se usaba)
+#   date / datetime / time → ISO 8601 (orjson los hace en C)
+#   timedelta → segundos (como jsonable_encoder)
+#   UUID      → str
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS
+        )
+
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa Decimal, date y datetime sin pasar
+    por jsonable_encoder. El endpoint debe devolver la instancia
+    (return FastJSONResponse({...})), no el dict.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,137 @@
+from psycopg2.extras import RealDictCursor
+
+
+# ============================================================
+# DELTA SYNC DE MAESTROS
+# ============================================================
+# Ver migrations/011_master_data_sync.sql. Cada fila maestra tiene
+# change_version (id de la transacción que la escribió) y los
+# DELETE quedan en master_data_deletions. El cliente guarda la
+# "version" devuelta y la envía como ?since= en el siguiente sync;
+# since=0 trae todo (carga inicial).
+#
+# Las columnas / claves son las mismas de los listados de cada
+# maestro, para que el cliente pueda usar el mismo cache.
+
+MASTER_TABLES = {
+    "clientes": ("cliente", """
+        codigo,
+        nombrejuridico,
+        nombrecomercial,
+        pais,
+        correo,
+        telefono,
+        cedulajuridicavat,
+        actividad_economica,
+        comentarios,
+        provincia,
+        canton,
+        distrito,
+        direccionexacta,
+        fecha_pago,
+        prefijo,
+        contacto_principal,
+        contacto_secundario
+    """),
+    "proveedores": ("proveedor", """
+        codigo AS "Codigo",
+        nombre AS "Nombre",
+        apellidos AS "Apellidos",
+        nombrecomercial AS "NombreComercial",
+        cedula_vat AS "Cedula",
+        pais AS "Pais",
+        provincia AS "Provincia",
+        canton AS "Canton",
+        distrito AS "Distrito",
+        direccionexacta AS "DireccionExacta",
+        prefijo AS "Prefijo",
+        telefono AS "Telefono",
+        correo AS "Correo",
+        terminospago AS "TerminosPago",
+        banco AS "Banco",
+        cuenta_iban AS "CuentaIBAN",
+        swiftcode AS "SwiftCode",
+        uid AS "UID",
+        direccionbanco AS "DireccionBanco",
+        tipoproveeduria AS "TipoProveeduria",
+        comentarios AS "Comentarios"
+    """),
+    "surveyores": ("surveyor", """
+        codigo, nombre, apellidos, estado_civil, genero, nacionalidad,
+        prefijo, telefono, provincia, canton, distrito, direccion,
+        jornada, operacion, honorario, pago, banco, cuenta_iban,
+        moneda, swift, uid, enfermedades, contacto_emergencia,
+        telefono_emergencia, puerto
+    """),
+    "empleados": ("empleados", """
+        codigo, nombre, apellidos, estado_civil, genero, nacionalidad,
+        prefijo, telefono, provincia, canton, distrito, direccion,
+        jornada, salario, pago, banco, cuenta_iban, moneda,
+        enfermedades, contacto_emergencia, telefono_emergencia,
+        activo1, marca1, serial1,
+        activo2, marca2, serial2,
+        activo3, marca3, serial3,
+        fecharegistro
+    """),
+    "servicios_md": ("serviciosmd", """
+        codigo,
+        codigoprod AS codigo_prod,
+        nombre,
+        costo
+    """),
+}
+
+
+def master_data_changes(conn, since: int, names: list) -> dict:
+    """
+    Cambios de los maestros `names` con change_version >= since.
+
+    Devuelve {"since", "version", "full", "tables": {nombre: {
+    "upserts": [...], "deleted": [codigo, ...]}}}.
+    Aplicar primero deleted y luego upserts.
+
+    conn debe estar en REPEATABLE READ: todas las lecturas y la
+    versión devuelta salen del mismo snapshot.
+    """
+    full = since <= 0
+    tables = {}
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint
+                   AS version
+        """)
+        version = cur.fetchone()["version"]
+
+        for name in names:
+            table, columns = MASTER_TABLES[name]
+
+            if full:
+                cur.execute(f"SELECT {columns} FROM {table} ORDER BY codigo")
+                upserts = cur.fetchall()
+                deleted = []
+            else:
+                cur.execute(f"""
+                    SELECT {columns}
+                    FROM {table}
+                    WHERE change_version >= %s
+                    ORDER BY change_version, codigo
+                """, (since,))
+                upserts = cur.fetchall()
+
+                cur.execute("""
+                    SELECT DISTINCT codigo
+                    FROM master_data_deletions
+                    WHERE table_name = %s
+                      AND change_version >= %s
+                """, (table, since))
+                deleted = [r["codigo"] for r in cur.fetchall()]
+
+            tables[name] = {"upserts": upserts, "deleted": deleted}
+
+    return {
+        "since": since,
+        "version": version,
+        "full": full,
+        "tables": tables
+    }
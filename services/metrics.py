@@ -0,0 +1,221 @@
+import threading
+import time
+from bisect import bisect_left
+
+
+# ============================================================
+# MÉTRICAS HTTP (FORMATO TEXTO DE PROMETHEUS)
+# ============================================================
+# Middleware ASGI puro (no BaseHTTPMiddleware) para no bufferear
+# streams como /changes/stream. Las series se agrupan por la plantilla
+# de la ruta ("/collections/{numero_documento}"), no por el path real,
+# para que la cardinalidad quede acotada a los endpoints existentes.
+# Por proceso: con varios workers cada uno expone sus propios valores.
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class _Histogram:
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class HTTPMetrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {}      # (method, route) → _Histogram
+        self._size = {}         # (method, route) → _Histogram
+        self._status = {}       # (method, route, status) → int
+        self._in_flight = {}    # method → int
+        self.started_at = time.time()
+
+    # --------------------------------------------------------
+    # Registro
+    # --------------------------------------------------------
+    def begin(self, method):
+        with self._lock:
+            self._in_flight[method] = self._in_flight.get(method, 0) + 1
+
+    def end(self, key, status, seconds, size):
+        with self._lock:
+            self._in_flight[key[0]] -= 1
+
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = _Histogram(LATENCY_BUCKETS)
+                self._size[key] = _Histogram(SIZE_BUCKETS)
+            latency.observe(seconds)
+            self._size[key].observe(size)
+
+            status_key = key + (status,)
+            self._status[status_key] = self._status.get(status_key, 0) + 1
+
+    # --------------------------------------------------------
+    # Exposición
+    # --------------------------------------------------------
+    def render(self) -> str:
+        with self._lock:
+            latency = {k: _snapshot(h) for k, h in self._latency.items()}
+            size = {k: _snapshot(h) for k, h in self._size.items()}
+            status = dict(self._status)
+            in_flight = dict(self._in_flight)
+
+        lines = []
+
+        _histogram_lines(
+            lines, "http_request_duration_seconds",
+            "Latencia de las requests HTTP por ruta.",
+            latency, LATENCY_BUCKETS
+        )
+        _histogram_lines(
+            lines, "http_response_size_bytes",
+            "Tamaño del cuerpo de la respuesta por ruta.",
+            size, SIZE_BUCKETS
+        )
+
+        lines.append(
+            "# HELP http_requests_total Requests HTTP por ruta y status."
+        )
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, code), value in sorted(status.items()):
+            lines.append(
+                f"http_requests_total{_labels(method, route, status=code)}"
+                f" {value}"
+            )
+
+        lines.append(
+            "# HELP http_requests_in_flight Requests en curso por método."
+        )
+        lines.append("# TYPE http_requests_in_flight gauge")
+        for method, value in sorted(in_flight.items()):
+            lines.append(
+                f'http_requests_in_flight{{method="{_escape(method)}"}}'
+                f" {value}"
+            )
+
+        lines.append(
+            "# HELP process_start_time_seconds Inicio del proceso (epoch)."
+        )
+        lines.append("# TYPE process_start_time_seconds gauge")
+        lines.append(f"process_start_time_seconds {self.started_at:.3f}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _snapshot(h):
+    return list(h.counts), h.total, h.count
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _labels(method, route, **extra) -> str:
+    pairs = [("method", method), ("route", route)] + list(extra.items())
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_le(bound) -> str:
+    return f"{bound:g}" if isinstance(bound, float) else str(bound)
+
+
+def _histogram_lines(lines, name, help_text, series, buckets):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+
+    for (method, route), (counts, total, count) in sorted(series.items()):
+        cumulative = 0
+        for bound, n in zip(buckets, counts):
+            cumulative += n
+            labels = _labels(method, route, le=_format_le(bound))
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _labels(method, route, le="+Inf")
+        lines.append(f"{name}_bucket{labels} {count}")
+        lines.append(
+            f"{name}_sum{_labels(method, route)} {round(total, 6)}"
+        )
+        lines.append(f"{name}_count{_labels(method, route)} {count}")
+
+
+def gauge_lines(name: str, help_text: str, samples: dict) -> list:
+    """
+    Líneas de un gauge; samples = {(("label", valor), ...): número}.
+    Para exponer stats() de caches / pools junto a las métricas HTTP.
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples.items():
+        text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+        lines.append(f"{name}{{{text}}} {value}" if text
+                     else f"{name} {value}")
+    return lines
+
+
+http_metrics = HTTPMetrics()
+
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+class MetricsMiddleware:
+    """
+    La ruta se conoce recién después del routing (scope["route"]):
+    latencia, tamaño y status se registran al terminar la respuesta;
+    las requests en curso se cuentan solo por método.
+    """
+
+    def __init__(self, app, metrics: HTTPMetrics = http_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = time.perf_counter()
+        state = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["size"] += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.begin(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            self.metrics.end(
+                (method, template),
+                str(state["status"]),
+                time.perf_counter() - started,
+                state["size"]
+            )
@@ -0,0 +1,86 @@
+from psycopg2 import sql
+
+
+# ============================================================
+# SERIES DE NUMERACIÓN
+# ============================================================
+# gapless  → contador en document_counters. El UPDATE bloquea solo
+#            la fila de la serie hasta el commit/rollback de la
+#            transacción que consume el número: sin huecos.
+# sequence → secuencia de PostgreSQL. Sin locks, puede dejar huecos
+#            (uso interno: códigos de batch de cierre).
+#
+# "start" es el primer número si la fila de la serie aún no existe;
+# migrations/002_document_counters.sql la siembra desde los datos.
+
+SERIES = {
+    "FACTURA_MANUAL": {"mode": "gapless", "start": 2201},
+    "NOTA_CREDITO": {"mode": "gapless", "start": 9001},
+    "INFORME": {"mode": "gapless", "start": 2129},
+    "CLOSING_BATCH": {"mode": "sequence", "sequence": "closing_batch_code_seq"},
+}
+
+
+def _series_config(series: str) -> dict:
+    config = SERIES.get(series)
+    if not config:
+        raise ValueError(f"Serie de numeración desconocida: {series}")
+    return config
+
+
+def _first_value(row):
+    return row["first_value"] if isinstance(row, dict) else row[0]
+
+
+def allocate_numbers(cur, series: str, count: int = 1) -> list:
+    """
+    Reserva `count` números de la serie dentro de la transacción
+    del cursor recibido.
+
+    En modo gapless el bloque es contiguo y la fila del contador
+    queda bloqueada hasta que la transacción termine; si se hace
+    rollback los números vuelven a estar disponibles.
+    """
+
+    if count < 1:
+        raise ValueError("count debe ser >= 1")
+
+    config = _series_config(series)
+
+    if config["mode"] == "sequence":
+        cur.execute(
+            sql.SQL(
+                "SELECT nextval({}) AS first_value FROM generate_series(1, %s)"
+            ).format(sql.Literal(config["sequence"])),
+            (count,)
+        )
+        return [int(_first_value(r)) for r in cur.fetchall()]
+
+    cur.execute("""
+        UPDATE document_counters
+        SET next_value = next_value + %s,
+            updated_at = NOW()
+        WHERE series = %s
+        RETURNING next_value - %s AS first_value
+    """, (count, series, count))
+
+    row = cur.fetchone()
+
+    if not row:
+        # Primera vez: crear la fila y reintentar el UPDATE
+        cur.execute("""
+            INSERT INTO document_counters (series, next_value, updated_at)
+            VALUES (%s, %s, NOW())
+            ON CONFLICT (series) DO NOTHING
+        """, (series, config["start"]))
+        return allocate_numbers(cur, series, count)
+
+    first = int(_first_value(row))
+    return list(range(first, first + count))
+
+
+def next_number(cur, series: str) -> int:
+    """
+    Siguiente número de la serie (ver allocate_numbers).
+    """
+    return allocate_numbers(cur, series, 1)[0]
@@ -0,0 +1,144 @@
+from typing import Literal
+
+from services.lookup_cache import TTLCache
+
+
+# ============================================================
+# TOTALES PARA LISTADOS PAGINADOS
+# ============================================================
+# Un COUNT(*) exacto con los mismos filtros duplica el costo de
+# cada página. Estrategias (parámetro ?count=):
+#   exact     → COUNT(*) en cada request
+#   estimated → filas estimadas por el planner (EXPLAIN), sin scan
+#   cached    → COUNT(*) exacto cacheado por (query, filtros) con TTL
+#               corto: solo la primera página de una búsqueda paga
+#   none      → sin total; solo has_more
+# has_more se calcula siempre pidiendo page_size + 1 filas.
+
+CountStrategy = Literal["exact", "estimated", "cached", "none"]
+
+DEFAULT_COUNT_STRATEGY = "cached"
+COUNT_CACHE_SIZE = 1024
+COUNT_CACHE_TTL_SECONDS = 30
+
+_count_cache = TTLCache(COUNT_CACHE_SIZE, COUNT_CACHE_TTL_SECONDS)
+
+
+def _scalar(row):
+    if isinstance(row, dict):
+        return next(iter(row.values()))
+    return row[0]
+
+
+def _cache_key(sql: str, params) -> tuple:
+    if isinstance(params, dict):
+        return sql, repr(sorted(params.items()))
+    return sql, repr(params)
+
+
+def count_total(
+    cur,
+    strategy: str,
+    from_sql: str,
+    where_sql: str = "",
+    params=None
+):
+    """
+    Total de filas de  FROM <from_sql> <where_sql>  según strategy.
+    Devuelve None con strategy="none".
+    """
+    if strategy == "none":
+        return None
+
+    body = f"FROM {from_sql} {where_sql}"
+
+    if strategy == "estimated":
+        cur.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 {body}", params)
+        plan = _scalar(cur.fetchone())
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    sql = f"SELECT COUNT(*) {body}"
+
+    if strategy == "cached":
+        key = _cache_key(sql, params)
+        total = _count_cache.get(key)
+        if total is None:
+            cur.execute(sql, params)
+            total = _scalar(cur.fetchone())
+            _count_cache.set(key, total)
+        return total
+
+    cur.execute(sql, params)
+    return _scalar(cur.fetchone())
+
+
+def split_page(rows: list, page_size: int) -> tuple:
+    """
+    rows se pidió con LIMIT page_size + 1 → (filas, has_more).
+    """
+    if len(rows) > page_size:
+        return rows[:page_size], True
+    return rows, False
+
+
+# ============================================================
+# KEYSET (CURSOR) PAGINATION
+# ============================================================
+# OFFSET n obliga a Postgres a leer y descartar n filas: la página
+# 500 cuesta 500 veces la primera. Con keyset el cliente devuelve
+# la clave de la última fila recibida (?after=next_cursor) y la
+# consulta arranca directo en el índice:
+#   WHERE <filtros> AND key > %s ORDER BY key LIMIT page_size + 1
+# ?page sigue funcionando (OFFSET) cuando no se envía ?after.
+
+def where_sql(conditions: list) -> str:
+    return ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+
+def keyset_page(
+    cur,
+    select_sql: str,
+    key: str,
+    page_size: int,
+    after=None,
+    descending: bool = False,
+    conditions: list = None,
+    params: list = None,
+    offset: int = 0,
+    cursor_field: str = None
+) -> tuple:
+    """
+    Ejecuta  <select_sql> WHERE <conditions> [AND key >/< after]
+             ORDER BY key LIMIT page_size + 1 [OFFSET offset]
+
+    select_sql es "SELECT … FROM tabla" sin WHERE/ORDER.
+    cursor_field: nombre de la clave en la fila (si la columna va
+    con alias); por defecto key. Con cursor de tupla usa la posición 0.
+
+    Devuelve (filas, has_more, next_cursor).
+    """
+    conditions = list(conditions or [])
+    params = list(params or [])
+
+    if after is not None:
+        conditions.append(f"{key} {'<' if descending else '>'} %s")
+        params.append(after)
+        offset = 0
+
+    cur.execute(
+        f"""
+        {select_sql}
+        {where_sql(conditions)}
+        ORDER BY {key} {'DESC' if descending else 'ASC'}
+        LIMIT %s OFFSET %s
+        """,
+        params + [page_size + 1, offset]
+    )
+    rows, has_more = split_page(cur.fetchall(), page_size)
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = last[cursor_field or key] if isinstance(last, dict) else last[0]
+
+    return rows, has_more, next_cursor
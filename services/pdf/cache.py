@@ -0,0 +1,130 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+
+# ============================================================
+# CACHE DE PDFs EN DISCO (CONTENT-ADDRESSED + LRU)
+# ============================================================
+# Cada PDF se guarda como <key>.pdf, donde key es un hash de todo
+# lo que determina su contenido. La escritura es atómica
+# (archivo temporal + os.replace) y el directorio se mantiene por
+# debajo de max_bytes expulsando los archivos menos usados. La
+# recencia se lleva en atime (se "toca" en cada hit); mtime queda
+# fijo porque es el Last-Modified que usa conditional_file_response.
+# Un archivo usado hace menos de EVICT_GRACE_SECONDS no se expulsa:
+# puede ser la ruta que un request está por servir.
+
+EVICT_GRACE_SECONDS = 60
+
+
+class PdfDiskCache:
+
+    def __init__(self, base_dir: str, max_bytes: int):
+        self.base_dir = base_dir
+        self.max_bytes = max_bytes
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        h = hashlib.sha256()
+        for p in parts:
+            h.update(str(p).encode("utf-8"))
+            h.update(b"\x1f")
+        return h.hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.base_dir, f"{key}.pdf")
+
+    def get(self, key: str):
+        """
+        Ruta del PDF cacheado o None. Un hit refresca su posición LRU.
+        """
+        path = self.path_for(key)
+        try:
+            st = os.stat(path)
+            os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def get_or_render(self, key: str, render) -> str:
+        """
+        Devuelve el PDF de `key`; si no existe lo genera con
+        render(tmp_path). Descargas concurrentes del mismo key
+        generan el PDF una sola vez.
+        """
+        path = self.get(key)
+        if path:
+            return path
+
+        lock = self._key_lock(key)
+        with lock:
+            path = self.get(key)
+            if path:
+                return path
+
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.base_dir, prefix=".tmp-", suffix=".pdf"
+            )
+            os.close(fd)
+
+            try:
+                render(tmp_path)
+                os.replace(tmp_path, self.path_for(key))
+                self.get(key)
+            except Exception:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+            finally:
+                with self._locks_guard:
+                    self._locks.pop(key, None)
+
+        self.evict()
+        return self.path_for(key)
+
+    def evict(self):
+        """
+        Expulsa los PDFs menos usados hasta quedar bajo max_bytes.
+        """
+        entries = []
+        total = 0
+        recent = time.time() - EVICT_GRACE_SECONDS
+
+        with os.scandir(self.base_dir) as it:
+            for e in it:
+                if not e.name.endswith(".pdf") or e.name.startswith(".tmp-"):
+                    continue
+                try:
+                    st = e.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_atime, st.st_size, e.path))
+                total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for used_at, size, path in entries:
+            if total <= self.max_bytes or used_at >= recent:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,62 @@
+import os
+import uuid
+
+from services.pdf.factura_manual_pdf import generar_factura_manual_pdf, BASE_DIR
+from services.pdf.factura_preview_pdf import generar_factura_preview_pdf
+
+
+# ============================================================
+# RE-GENERAR PDF DE UN DOCUMENTO DE INVOICING
+# ============================================================
+def generar_pdf_documento(doc: dict) -> str:
+    """
+    Regenera el PDF de una fila de invoicing a la que le falta.
+
+    MANUAL → mismo layout de la factura manual.
+    Otros (ELECTRONICA) → preview NO fiscal: solo para el ZIP, nunca
+    se registra como el PDF del documento.
+    Debe ser picklable: se ejecuta en el pool de render. Cada render
+    escribe en una ruta única (exportaciones concurrentes no se pisan).
+    """
+    unico = uuid.uuid4().hex
+
+    if (doc.get("tipo_factura") or "").upper() == "MANUAL":
+        descripcion = doc.get("descripcion_servicio") or ""
+        if doc.get("tipo_documento") == "NOTA_CREDITO":
+            descripcion = f"NOTA DE CRÉDITO\n{descripcion}"
+
+        return generar_factura_manual_pdf({
+            "numero_factura": doc.get("numero_documento"),
+            "fecha_factura": doc.get("fecha_emision"),
+            "cliente": doc.get("nombre_cliente"),
+            "buque": doc.get("buque_contenedor"),
+            "operacion": doc.get("operacion"),
+            "num_informe": doc.get("num_informe"),
+            "periodo": doc.get("periodo_operacion"),
+            "descripcion": descripcion,
+            "moneda": doc.get("moneda"),
+            "termino_pago": doc.get("termino_pago"),
+            "total": doc.get("total")
+        }, output_path=os.path.join(
+            BASE_DIR,
+            f"Documento_{doc.get('tipo_documento')}_{unico}.pdf"
+        ))
+
+    output_path = os.path.join(
+        BASE_DIR,
+        f"Preview_{doc.get('tipo_documento')}_{unico}.pdf"
+    )
+
+    return generar_factura_preview_pdf(
+        {
+            "numero_documento": doc.get("numero_documento"),
+            "fecha_emision": doc.get("fecha_emision"),
+            "cliente": doc.get("nombre_cliente"),
+            "buque_contenedor": doc.get("buque_contenedor"),
+            "operacion": doc.get("operacion"),
+            "periodo": doc.get("periodo_operacion"),
+            "moneda": doc.get("moneda"),
+            "total": doc.get("total")
+        },
+        output_path=output_path
+    )
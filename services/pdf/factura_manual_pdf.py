@@ -1,4 +1,6 @@
+import io
 import os
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.colors import HexColor, black
@@ -12,14 +14,107 @@ from datetime import datetime
 BASE_DIR = "/tmp/pdf"
 os.makedirs(BASE_DIR, exist_ok=True)
 
+# Streams comprimidos en binario, sin envoltura ASCII85: PDFs ~20%
+# más pequeños y sin el encoder A85 (Python puro) en cada save().
+rl_config.useA85 = 0
+
 COLOR_PRINCIPAL = HexColor("#1F4E79")
 COLOR_GRIS = HexColor("#F2F2F2")
 
 
+# ============================================================
+# PLANTILLA ESTÁTICA PRE-RENDERIZADA
+# ============================================================
+# Encabezado del emisor, datos bancarios y footer son iguales en
+# todas las facturas. Sus operadores PDF se generan una sola vez por
+# proceso y cada factura los inserta tal cual (addLiteral); solo se
+# dibujan los datos propios de la factura.
+
+EMISOR_NOMBRE = "MSL MARINE SURVEYORS & LOGISTICS GROUP SRL"
+EMISOR_CEDULA = "Cédula Jurídica: 3-102-920372"
+EMISOR_CONTACTO = "Correo: info@mslmarine.com | Tel: +506 4052-8382"
+
+BANCO_LINEAS = (
+    "Banco: Banco Nacional de Costa Rica",
+    "IBAN: CR49015201308000025850",
+    "SWIFT: BNCRCRSJ",
+)
+
+FOOTER_TEXTO = "Este documento corresponde a una factura manual generada por ERP-SOM"
+
+# Base del bloque bancario: mismos desplazamientos que el cuerpo
+# (cliente, términos, descripción, total, banco).
+BANCO_Y = A4[1] - 5 * cm - 2.2 * cm - 4.2 * cm - 2.2 * cm - 3.2 * cm
+
+# Orden fijo de registro de fuentes: garantiza que los nombres
+# internos (/F1, /F2, ...) del código pre-renderizado coincidan.
+PLANTILLA_FUENTES = ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique")
+
+_plantilla_cache = None
+
+
+def _registrar_fuentes(c):
+    for fuente in PLANTILLA_FUENTES:
+        c.setFont(fuente, 9)
+
+
+def _dibujar_plantilla(c, width, height):
+    """
+    Elementos estáticos de la factura (sin datos por factura).
+    """
+
+    # ENCABEZADO – EMISOR
+    c.setFillColor(COLOR_PRINCIPAL)
+    c.rect(1.5 * cm, height - 3.5 * cm, width - 3 * cm, 2.5 * cm, fill=0)
+
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(2 * cm, height - 2.2 * cm, EMISOR_NOMBRE)
+
+    c.setFont("Helvetica", 9)
+    c.drawString(2 * cm, height - 2.9 * cm, EMISOR_CEDULA)
+    c.drawString(2 * cm, height - 3.4 * cm, EMISOR_CONTACTO)
+
+    # DATOS BANCARIOS
+    y = BANCO_Y
+
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(2 * cm, y + 1.8 * cm, "Datos bancarios")
+
+    c.setFont("Helvetica", 9)
+    c.drawString(2 * cm, y + 1.2 * cm, BANCO_LINEAS[0])
+    c.drawString(2 * cm, y + 0.6 * cm, BANCO_LINEAS[1])
+    c.drawString(2 * cm, y, BANCO_LINEAS[2])
+
+    # FOOTER
+    c.setFont("Helvetica-Oblique", 8)
+    c.drawCentredString(width / 2, 1.2 * cm, FOOTER_TEXTO)
+
+
+def _plantilla_compilada() -> str:
+    """
+    Operadores PDF de la plantilla (q ... Q), generados una vez.
+    """
+    global _plantilla_cache
+
+    if _plantilla_cache is None:
+        width, height = A4
+        scratch = canvas.Canvas(io.BytesIO(), pagesize=A4)
+        _registrar_fuentes(scratch)
+
+        inicio = len(scratch._code)
+        scratch.saveState()
+        _dibujar_plantilla(scratch, width, height)
+        scratch.restoreState()
+
+        _plantilla_cache = "\n".join(scratch._code[inicio:])
+
+    return _plantilla_cache
+
+
 # ============================================================
 # FUNCIÓN PRINCIPAL
 # ============================================================
-def generar_factura_manual_pdf(data: dict) -> str:
+def generar_factura_manual_pdf(data: dict, output_path: str = None) -> str:
     """
     data = {
         numero_factura,
@@ -34,6 +129,9 @@ def generar_factura_manual_pdf(data: dict) -> str:
         termino_pago,
         total
     }
+    output_path: ruta de salida; por defecto BASE_DIR/Factura_<n>.pdf.
+    Los renders en paralelo (pool) pasan una ruta única para no
+    pisarse entre sí.
     """
 
     # ==================== HELPERS SEGUROS ====================
@@ -64,27 +162,16 @@ def generar_factura_manual_pdf(data: dict) -> str:
 
     # ==================== ARCHIVO ====================
     nombre_pdf = f"Factura_{numero_factura}.pdf"
-    ruta_pdf = os.path.join(BASE_DIR, nombre_pdf)
+    ruta_pdf = output_path or os.path.join(BASE_DIR, nombre_pdf)
 
     c = canvas.Canvas(ruta_pdf, pagesize=A4)
     width, height = A4
 
     # ========================================================
-    # ENCABEZADO – EMISOR
+    # PLANTILLA ESTÁTICA (emisor, banco, footer)
     # ========================================================
-    c.setFillColor(COLOR_PRINCIPAL)
-    c.rect(1.5 * cm, height - 3.5 * cm, width - 3 * cm, 2.5 * cm, fill=0)
-
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(
-        2 * cm,
-        height - 2.2 * cm,
-        "MSL MARINE SURVEYORS & LOGISTICS GROUP SRL"
-    )
-
-    c.setFont("Helvetica", 9)
-    c.drawString(2 * cm, height - 2.9 * cm, "Cédula Jurídica: 3-102-920372")
-    c.drawString(2 * cm, height - 3.4 * cm, "Correo: info@mslmarine.com | Tel: +506 4052-8382")
+    _registrar_fuentes(c)
+    c.addLiteral(_plantilla_compilada())
 
     # ========================================================
     # CLIENTE + FACTURA
@@ -158,29 +245,6 @@ def generar_factura_manual_pdf(data: dict) -> str:
         f"TOTAL {moneda} {total:,.2f}"
     )
 
-    # ========================================================
-    # DATOS BANCARIOS
-    # ========================================================
-    y -= 3.2 * cm
-
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(2 * cm, y + 1.8 * cm, "Datos bancarios")
-
-    c.setFont("Helvetica", 9)
-    c.drawString(2 * cm, y + 1.2 * cm, "Banco: Banco Nacional de Costa Rica")
-    c.drawString(2 * cm, y + 0.6 * cm, "IBAN: CR49015201308000025850")
-    c.drawString(2 * cm, y, "SWIFT: BNCRCRSJ")
-
-    # ========================================================
-    # FOOTER
-    # ========================================================
-    c.setFont("Helvetica-Oblique", 8)
-    c.drawCentredString(
-        width / 2,
-        1.2 * cm,
-        "Este documento corresponde a una factura manual generada por ERP-SOM"
-    )
-
     c.showPage()
     c.save()
 
@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+# ============================================================
+# POOL DE RENDER DE PDFs (FUERA DEL REQUEST)
+# ============================================================
+# ReportLab es CPU-bound: los PDFs se generan en procesos aparte
+# para no bloquear el event loop ni mantener transacciones abiertas.
+# on_done / on_error corren en un pool de hilos propio del proceso
+# API: suelen abrir conexión y escribir en la BD, y no deben frenar
+# el hilo del ProcessPoolExecutor que entrega los resultados.
+
+RENDER_POOL_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+RENDER_CALLBACK_WORKERS = 2
+
+_executor = None
+_callbacks = None
+_executor_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "render_seconds_total": 0.0,
+    "callback_errors": 0,
+}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=RENDER_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def _get_callbacks() -> ThreadPoolExecutor:
+    global _callbacks
+    with _executor_lock:
+        if _callbacks is None:
+            _callbacks = ThreadPoolExecutor(
+                max_workers=RENDER_CALLBACK_WORKERS,
+                thread_name_prefix="render-callback"
+            )
+        return _callbacks
+
+
+def _run_callbacks(fut, on_done, on_error):
+    """
+    Corre en el pool de callbacks. Si on_done falla (p. ej. la BD no
+    responde) se reporta por on_error, para que el documento no quede
+    pendiente para siempre.
+    """
+    try:
+        result, seconds = fut.result()
+    except Exception as e:
+        with _stats_lock:
+            _stats["failed"] += 1
+        _notify_error(on_error, e)
+        return
+
+    with _stats_lock:
+        _stats["completed"] += 1
+        _stats["render_seconds_total"] += seconds
+
+    if on_done:
+        try:
+            on_done(result)
+        except Exception as cb_err:
+            with _stats_lock:
+                _stats["callback_errors"] += 1
+            _notify_error(on_error, cb_err)
+
+
+def _notify_error(on_error, error):
+    if not on_error:
+        print("❌ Error en render de PDF:", error)
+        return
+    try:
+        on_error(error)
+    except Exception as cb_err:
+        with _stats_lock:
+            _stats["callback_errors"] += 1
+        print("❌ Error registrando fallo de render:", error, "→", cb_err)
+
+
+def _timed_render(render_fn, *args):
+    """
+    Corre en el proceso worker: devuelve (resultado, segundos).
+    """
+    t0 = time.perf_counter()
+    result = render_fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def submit(render_fn, *args, on_done=None, on_error=None):
+    """
+    Encola render_fn(*args) en el pool.
+
+    render_fn debe ser una función de módulo (picklable).
+    on_done(resultado) / on_error(exc) se ejecutan al terminar.
+    """
+    with _stats_lock:
+        _stats["submitted"] += 1
+
+    future = _get_executor().submit(_timed_render, render_fn, *args)
+
+    def _callback(fut):
+        try:
+            _get_callbacks().submit(_run_callbacks, fut, on_done, on_error)
+        except RuntimeError:
+            # Intérprete / pool de callbacks cerrándose: correr aquí
+            _run_callbacks(fut, on_done, on_error)
+
+    future.add_done_callback(_callback)
+    return future
+
+
+def stats() -> dict:
+    """
+    Throughput y profundidad de cola del pool.
+    """
+    with _stats_lock:
+        s = dict(_stats)
+
+    finished = s["completed"] + s["failed"]
+    s["queue_depth"] = s["submitted"] - finished
+    s["workers"] = RENDER_POOL_WORKERS
+    s["avg_render_seconds"] = (
+        s["render_seconds_total"] / s["completed"] if s["completed"] else 0.0
+    )
+    return s
+
+
+def shutdown():
+    """
+    Primero los renders (sus callbacks se encolan al terminar), luego
+    el pool de callbacks.
+    """
+    global _executor, _callbacks
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=False)
+
+    with _executor_lock:
+        callbacks, _callbacks = _callbacks, None
+    if callbacks is not None:
+        callbacks.shutdown(wait=True)
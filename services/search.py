@@ -0,0 +1,43 @@
+# ============================================================
+# BÚSQUEDA "CONTIENE" SOBRE COLUMNAS *_search (pg_trgm)
+# ============================================================
+# Las columnas <col>_search (migrations/005_search_trgm.sql) guardan
+# lower(f_unaccent(col)) y tienen índice GIN trigram. El término se
+# normaliza en SQL con la misma función; al ser IMMUTABLE sobre un
+# literal, Postgres la evalúa al planificar y puede usar el índice.
+
+SEARCH_NORMALIZE_SQL = "lower(f_unaccent({}))"
+
+
+def contains_pattern(term: str) -> str:
+    """
+    Patrón LIKE '%term%' con los comodines del usuario escapados.
+    """
+    term = (term or "").strip()
+    term = (
+        term.replace("\\", "\\\\")
+            .replace("%", "\\%")
+            .replace("_", "\\_")
+    )
+    return f"%{term}%"
+
+
+def contains_clause(column: str, placeholder: str) -> str:
+    """
+    Condición SQL: <column>_search LIKE lower(f_unaccent(<placeholder>)).
+    placeholder es "%s" o "%(nombre)s" según el estilo del query.
+    """
+    return (
+        f"{column}_search LIKE "
+        f"{SEARCH_NORMALIZE_SQL.format(placeholder)}"
+    )
+
+
+def without_search_columns(row):
+    """
+    Copia de la fila sin las columnas generadas *_search, para
+    endpoints que devuelven SELECT * tal cual.
+    """
+    if row is None:
+        return None
+    return {k: v for k, v in row.items() if not k.endswith("_search")}
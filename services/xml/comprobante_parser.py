@@ -0,0 +1,210 @@
+import xml.etree.ElementTree as ET
+
+
+# ============================================================
+# PARSER ÚNICO DE COMPROBANTES ELECTRÓNICOS (HACIENDA CR)
+# ============================================================
+# Una sola pasada incremental (XMLPullParser, solo eventos "end",
+# alimentable por chunks mientras llega el upload): encabezado y
+# LineaDetalle se extraen al cerrar cada elemento, comparando solo
+# el nombre local del tag (sin namespace). Los contenedores se
+# vacían al cerrarse, así que la memoria no crece con el número de
+# líneas. Para cada campo vale la PRIMERA aparición en el documento
+# (mismo criterio que root.find(".//{*}Tag")).
+
+TIPOS_POR_RAIZ = (
+    ("facturaelectronicaexportacion", "FEE"),
+    ("facturaelectronica", "FE"),
+    ("notacreditoelectronicaexportacion", "NCE"),
+    ("notacreditoelectronica", "NC"),
+    ("notadebitoelectronica", "ND"),
+    ("tiqueteelectronico", "TE"),
+)
+
+CAMPOS_ENCABEZADO = {
+    "Clave": "clave",
+    "NumeroConsecutivo": "numero_consecutivo",
+    "FechaEmision": "fecha_emision",
+    "CondicionVenta": "condicion_venta",
+    "PlazoCredito": "plazo_credito",
+    "CodigoMoneda": "codigo_moneda",
+    "TotalComprobante": "total_comprobante",
+    "MontoTotal": "monto_total",
+    "Nombre": "nombre",
+}
+
+# Se vacían al cerrarse (sus campos ya fueron leídos)
+CONTENEDORES = {
+    "LineaDetalle",
+    "DetalleServicio",
+    "Emisor",
+    "Receptor",
+    "OtrosCargos",
+    "ResumenFactura",
+    "InformacionReferencia",
+    "Otros",
+    "Signature",
+}
+
+CAMPOS_LINEA = {
+    "Detalle": "descripcion",
+    "Cantidad": "cantidad",
+    "PrecioUnitario": "precio_unitario",
+    "Monto": "impuesto",
+    "MontoTotalLinea": "total_linea",
+}
+
+
+def _local(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _texto(el):
+    return None if el.text is None else el.text.strip()
+
+
+def to_float(value, default=0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def tipo_por_raiz(tag: str):
+    tag = tag.lower()
+    for marca, tipo in TIPOS_POR_RAIZ:
+        if marca in tag:
+            return tipo
+    return None
+
+
+# ============================================================
+# PARSER INCREMENTAL
+# ============================================================
+class ComprobanteParser:
+    """
+    Parser incremental: feed(chunk) a medida que llegan los bytes
+    y close() al final, que devuelve el mismo dict que
+    parse_comprobante(). Permite parsear mientras se sube el archivo.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("end",))
+        self._data = {v: None for v in CAMPOS_ENCABEZADO.values()}
+        self._data["emisor_nombre"] = None
+        self._detalles = []
+        self._vistos = set()
+        self._locales = {}
+        self._ultimo = None
+
+    def feed(self, chunk: bytes):
+        try:
+            self._parser.feed(chunk)
+        except ET.ParseError as e:
+            raise ValueError(f"No se pudo leer XML: {e}")
+        self._consumir()
+
+    def close(self) -> dict:
+        try:
+            self._parser.close()
+        except ET.ParseError as e:
+            raise ValueError(f"No se pudo leer XML: {e}")
+        self._consumir()
+
+        # El último "end" es la raíz
+        if self._ultimo is None:
+            raise ValueError("No se pudo leer XML: documento vacío")
+
+        data = self._data
+        data["raiz"] = _local(self._ultimo.tag)
+        data["tipo"] = tipo_por_raiz(data["raiz"])
+        if data["tipo"] is None:
+            raise ValueError(
+                f"Documento electrónico no soportado: {data['raiz']}"
+            )
+
+        data["detalles"] = self._detalles
+        return data
+
+    def _consumir(self):
+        data = self._data
+        vistos = self._vistos
+        locales = self._locales
+        el = None
+
+        for _, el in self._parser.read_events():
+
+            tag = el.tag
+            nombre = locales.get(tag)
+            if nombre is None:
+                nombre = locales[tag] = _local(tag)
+
+            if nombre in CAMPOS_ENCABEZADO:
+                if nombre not in vistos:
+                    vistos.add(nombre)
+                    data[CAMPOS_ENCABEZADO[nombre]] = _texto(el)
+                continue
+
+            if nombre not in CONTENEDORES:
+                continue
+
+            if nombre == "LineaDetalle":
+                linea = {}
+                for sub in el.iter():
+                    campo = locales.get(sub.tag) or _local(sub.tag)
+                    if campo in CAMPOS_LINEA and campo not in linea:
+                        linea[campo] = _texto(sub)
+
+                self._detalles.append({
+                    "descripcion": linea.get("Detalle") or "",
+                    "cantidad": to_float(linea.get("Cantidad")),
+                    "precio_unitario": to_float(linea.get("PrecioUnitario")),
+                    "impuesto": to_float(linea.get("Monto")),
+                    "total_linea": to_float(linea.get("MontoTotalLinea"))
+                })
+
+            elif nombre == "Emisor" and data["emisor_nombre"] is None:
+                for sub in el:
+                    if _local(sub.tag) == "Nombre":
+                        data["emisor_nombre"] = _texto(sub)
+                        break
+
+            el.clear()
+
+        if el is not None:
+            self._ultimo = el
+
+
+# ============================================================
+# PARSE
+# ============================================================
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def parse_comprobante(source) -> dict:
+    """
+    Parsea un comprobante desde path, bytes o archivo binario.
+
+    Devuelve:
+      tipo, raiz, clave, numero_consecutivo, fecha_emision (texto),
+      condicion_venta, plazo_credito, codigo_moneda,
+      total_comprobante, monto_total (texto), emisor_nombre,
+      nombre (primer <Nombre> del documento) y detalles
+      [{descripcion, cantidad, precio_unitario, impuesto, total_linea}].
+
+    ValueError si el XML no se puede leer o la raíz no es un
+    comprobante soportado.
+    """
+    parser = ComprobanteParser()
+
+    if isinstance(source, (bytes, bytearray)):
+        parser.feed(source)
+        return parser.close()
+
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return parse_comprobante(f)
+
+    for chunk in iter(lambda: source.read(READ_CHUNK_SIZE), b""):
+        parser.feed(chunk)
+    return parser.close()
@@ -1,68 +1,35 @@
-import xml.etree.ElementTree as ET
-from io import BytesIO
 from datetime import datetime
 
+from services.xml.comprobante_parser import parse_comprobante, to_float
+
+
+# FE | FEE | NC | NCE
+TIPOS_SOPORTADOS = ("FE", "FEE", "NC", "NCE")
+
 
 # ============================================================
 # PARSER DESDE PATH
 # ============================================================
 def parse_electronic_document(xml_path: str) -> dict:
-    try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-    except Exception as e:
-        raise ValueError(f"No se pudo leer XML: {e}")
-
-    return _parse_root(root)
+    return document_from_comprobante(parse_comprobante(xml_path))
 
 
 # ============================================================
 # PARSER DESDE BYTES (UploadFile)
 # ============================================================
 def parse_electronic_document_from_bytes(xml_bytes: bytes) -> dict:
-    try:
-        tree = ET.parse(BytesIO(xml_bytes))
-        root = tree.getroot()
-    except Exception as e:
-        raise ValueError(f"No se pudo leer XML: {e}")
-
-    return _parse_root(root)
+    return document_from_comprobante(parse_comprobante(xml_bytes))
 
 
 # ============================================================
-# CORE PARSER – FE | FEE | NC | NCE
+# MAPEO – FE | FEE | NC | NCE
 # ============================================================
-def _parse_root(root) -> dict:
-
-    tag = root.tag.lower()
+def document_from_comprobante(c: dict) -> dict:
 
-    if "facturaelectronicaexportacion" in tag:
-        tipo = "FEE"
-    elif "facturaelectronica" in tag:
-        tipo = "FE"
-    elif "notacreditoelectronicaexportacion" in tag:
-        tipo = "NCE"
-    elif "notacreditoelectronica" in tag:
-        tipo = "NC"
-    else:
+    if c["tipo"] not in TIPOS_SOPORTADOS:
         raise ValueError("Documento electrónico no soportado")
 
-    # --------------------------------------------------------
-    # Helpers SIN namespace
-    # --------------------------------------------------------
-    def get_text(tag_name, default=None):
-        el = root.find(f".//{{*}}{tag_name}")
-        if el is None or el.text is None:
-            return default
-        return el.text.strip()
-
-    def get_float(tag_name, default=0.0):
-        try:
-            return float(get_text(tag_name))
-        except (TypeError, ValueError):
-            return default
-
-    fecha_raw = get_text("FechaEmision")
+    fecha_raw = c["fecha_emision"]
     fecha_emision = None
     if fecha_raw:
         try:
@@ -72,37 +39,13 @@ def _parse_root(root) -> dict:
         except Exception:
             fecha_emision = fecha_raw[:10]
 
-    data = {
-        "tipo_documento": tipo,
-        "clave_electronica": get_text("Clave"),
-        "numero_documento": get_text("NumeroConsecutivo"),
+    return {
+        "tipo_documento": c["tipo"],
+        "clave_electronica": c["clave"],
+        "numero_documento": c["numero_consecutivo"],
         "fecha_emision": fecha_emision,
-        "termino_pago": get_text("PlazoCredito") or get_text("CondicionVenta"),
-        "moneda": get_text("CodigoMoneda", "CRC"),
-        "total": get_float("TotalComprobante"),
-        "detalles": []
+        "termino_pago": c["plazo_credito"] or c["condicion_venta"],
+        "moneda": c["codigo_moneda"] or "CRC",
+        "total": to_float(c["total_comprobante"]),
+        "detalles": c["detalles"]
     }
-
-    for linea in root.findall(".//{*}LineaDetalle"):
-
-        def lt(tag, default=None):
-            el = linea.find(f".//{{*}}{tag}")
-            if el is None or el.text is None:
-                return default
-            return el.text.strip()
-
-        def lf(tag, default=0.0):
-            try:
-                return float(lt(tag))
-            except (TypeError, ValueError):
-                return default
-
-        data["detalles"].append({
-            "descripcion": lt("Detalle", ""),
-            "cantidad": lf("Cantidad"),
-            "precio_unitario": lf("PrecioUnitario"),
-            "impuesto": lf("Monto"),
-            "total_linea": lf("MontoTotalLinea")
-        })
-
-    return data
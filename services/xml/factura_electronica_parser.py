@@ -1,104 +1,37 @@
-import xml.etree.ElementTree as ET
-from io import BytesIO
+from services.xml.comprobante_parser import parse_comprobante, to_float
 
 
 # ============================================================
 # PARSER DESDE PATH
 # ============================================================
 def parse_factura_electronica(xml_path: str) -> dict:
-    try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-    except Exception as e:
-        raise ValueError(f"No se pudo leer el XML desde path: {e}")
-
-    return _parse_root(root)
+    return factura_from_comprobante(parse_comprobante(xml_path))
 
 
 # ============================================================
 # PARSER DESDE BYTES
 # ============================================================
 def parse_factura_electronica_from_bytes(xml_bytes: bytes) -> dict:
-    try:
-        tree = ET.parse(BytesIO(xml_bytes))
-        root = tree.getroot()
-    except Exception as e:
-        raise ValueError(f"No se pudo leer el XML desde bytes: {e}")
-
-    return _parse_root(root)
+    return factura_from_comprobante(parse_comprobante(xml_bytes))
 
 
 # ============================================================
-# LÓGICA ÚNICA – FE + FEE (SIN NAMESPACE FRÁGIL)
+# MAPEO – FE + FEE
 # ============================================================
-def _parse_root(root) -> dict:
+def factura_from_comprobante(c: dict) -> dict:
 
-    # --------------------------------------------------------
-    # Tipo documento
-    # --------------------------------------------------------
-    tag = root.tag.lower()
-    if "facturaelectronicaexportacion" in tag:
-        tipo_xml = "FEE"
-    elif "facturaelectronica" in tag:
-        tipo_xml = "FE"
-    else:
+    if c["tipo"] not in ("FE", "FEE"):
         raise ValueError("XML no es FE ni FEE")
 
-    # --------------------------------------------------------
-    # Helpers robustos (ignoran namespace)
-    # --------------------------------------------------------
-    def get_text(tag_name, default=None):
-        el = root.find(f".//{{*}}{tag_name}")
-        if el is None or el.text is None:
-            return default
-        return el.text.strip()
-
-    def get_float(tag_name, default=0.0):
-        try:
-            return float(get_text(tag_name))
-        except (TypeError, ValueError):
-            return default
-
-    # --------------------------------------------------------
-    # Campos principales (FE + FEE)
-    # --------------------------------------------------------
-    fecha_raw = get_text("FechaEmision")
-    fecha_emision = fecha_raw[:10] if fecha_raw else None
-
-    data = {
-        "tipo_xml": tipo_xml,
-        "clave_electronica": get_text("Clave"),
-        "numero_factura": get_text("NumeroConsecutivo"),
-        "fecha_emision": fecha_emision,
-        "termino_pago": get_text("PlazoCredito") or get_text("CondicionVenta"),
-        "moneda": get_text("CodigoMoneda", default="CRC"),
-        "total": get_float("TotalComprobante"),
-        "detalles": []
+    fecha_raw = c["fecha_emision"]
+
+    return {
+        "tipo_xml": c["tipo"],
+        "clave_electronica": c["clave"],
+        "numero_factura": c["numero_consecutivo"],
+        "fecha_emision": fecha_raw[:10] if fecha_raw else None,
+        "termino_pago": c["plazo_credito"] or c["condicion_venta"],
+        "moneda": c["codigo_moneda"] or "CRC",
+        "total": to_float(c["total_comprobante"]),
+        "detalles": c["detalles"]
     }
-
-    # --------------------------------------------------------
-    # Detalle líneas (opcional, robusto)
-    # --------------------------------------------------------
-    for linea in root.findall(".//{*}LineaDetalle"):
-
-        def line_text(tag_name, default=None):
-            el = linea.find(f".//{{*}}{tag_name}")
-            if el is None or el.text is None:
-                return default
-            return el.text.strip()
-
-        def line_float(tag_name, default=0.0):
-            try:
-                return float(line_text(tag_name))
-            except (TypeError, ValueError):
-                return default
-
-        data["detalles"].append({
-            "descripcion": line_text("Detalle", ""),
-            "cantidad": line_float("Cantidad", 0),
-            "precio_unitario": line_float("PrecioUnitario", 0),
-            "impuesto": line_float("Monto", 0),
-            "total_linea": line_float("MontoTotalLinea", 0)
-        })
-
-    return data
@@ -0,0 +1,54 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from services.pdf.render_pool import RENDER_POOL_WORKERS
+
+
+# ============================================================
+# POOL DE PARSEO DE XML (CARGAS MASIVAS)
+# ============================================================
+# Mismo esquema que el pool de render: procesos "spawn" creados
+# la primera vez que se usan. Lotes chicos se parsean en el
+# proceso actual (no vale la pena el costo de IPC).
+
+PARSE_POOL_WORKERS = RENDER_POOL_WORKERS
+PARSE_INLINE_MAX = 8
+PARSE_CHUNK_SIZE = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=PARSE_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def parse_many(parse_fn, items: list) -> list:
+    """
+    parse_fn(*item) para cada item, en orden.
+    parse_fn debe ser una función de módulo (picklable).
+    """
+    if len(items) <= PARSE_INLINE_MAX:
+        return [parse_fn(*item) for item in items]
+
+    return list(_get_executor().map(
+        parse_fn,
+        *zip(*items),
+        chunksize=PARSE_CHUNK_SIZE
+    ))
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=False)
+            _executor = None
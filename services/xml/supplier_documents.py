@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+
+from services.xml.comprobante_parser import parse_comprobante
+
+
+# ============================================================
+# XML DE PROVEEDOR (FACTURA / NC) → OBLIGACIÓN DE PAGO
+# ============================================================
+
+DEFAULT_TERM_DAYS = 30
+
+
+def obligation_from_xml(source) -> dict:
+    """
+    Campos de payment_obligations a partir de un FE/NC de proveedor.
+    ValueError si el XML no se puede leer o le faltan datos.
+    """
+    return obligation_from_comprobante(parse_comprobante(source))
+
+
+def obligation_from_comprobante(doc: dict) -> dict:
+    """
+    Igual que obligation_from_xml sobre un comprobante ya parseado.
+    """
+
+    # ------------------------------------------------------------
+    # TIPO DOCUMENTO
+    # ------------------------------------------------------------
+    is_credit_note = "NotaCredito" in doc["raiz"]
+
+    obligation_type = (
+        "SUPPLIER_CREDIT_NOTE" if is_credit_note else "SUPPLIER_INVOICE"
+    )
+
+    # ------------------------------------------------------------
+    # CLAVE
+    # ------------------------------------------------------------
+    clave = doc["clave"]
+    if not clave:
+        raise ValueError("XML sin Clave")
+
+    # ------------------------------------------------------------
+    # FECHA EMISIÓN
+    # ------------------------------------------------------------
+    fecha_raw = doc["fecha_emision"]
+    if not fecha_raw:
+        raise ValueError("XML sin FechaEmision")
+
+    issue_date = date.fromisoformat(fecha_raw.split("T")[0])
+
+    # ------------------------------------------------------------
+    # TOTAL (FACTURA / NC)
+    # ------------------------------------------------------------
+    total_raw = doc["total_comprobante"] or doc["monto_total"]
+    if not total_raw:
+        raise ValueError("XML sin TotalComprobante")
+
+    total = float(total_raw)
+
+    if is_credit_note:
+        total = total * -1  # NC = negativo
+
+    # ------------------------------------------------------------
+    # PLAZO
+    # ------------------------------------------------------------
+    plazo_raw = doc["plazo_credito"]
+    term_days = (
+        int(plazo_raw) if plazo_raw and plazo_raw.isdigit()
+        else DEFAULT_TERM_DAYS
+    )
+
+    return {
+        "supplier": (
+            doc["emisor_nombre"]
+            or doc["nombre"]
+            or "PROVEEDOR DESCONOCIDO"
+        ),
+        "obligation_type": obligation_type,
+        "reference": clave,
+        "issue_date": issue_date,
+        "due_date": issue_date + timedelta(days=term_days),
+        "currency": doc["codigo_moneda"] or "CRC",
+        "total": total,
+    }
+
+
+def parse_supplier_file(name: str, xml_bytes: bytes) -> dict:
+    """
+    Versión para el pool de procesos: nunca lanza, devuelve
+    {"file", "data"} o {"file", "error"}.
+    """
+    try:
+        return {"file": name, "data": obligation_from_xml(xml_bytes)}
+    except Exception as e:
+        return {"file": name, "error": str(e)}
@@ -0,0 +1,55 @@
+from services.attachments import store_stream
+from services.xml.comprobante_parser import ComprobanteParser
+
+
+# ============================================================
+# UPLOAD XML: PARSEAR + HASH + GUARDAR EN UNA SOLA LECTURA
+# ============================================================
+# El upload se lee una vez por chunks: cada chunk va al parser
+# incremental, al SHA-256 y al archivo temporal del almacén. No se
+# carga el archivo completo en memoria ni se vuelve a leer de disco.
+# Si el XML (o el mapper) falla, el archivo no se publica.
+
+XML_UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+
+
+class _ComprobanteSink:
+
+    def __init__(self, mapper=None):
+        self.parser = ComprobanteParser()
+        self.mapper = mapper
+        self.resultado = None
+
+    def feed(self, chunk: bytes):
+        self.parser.feed(chunk)
+
+    def close(self):
+        doc = self.parser.close()
+        self.resultado = self.mapper(doc) if self.mapper else doc
+
+
+def parse_xml_upload(
+    cur,
+    upload,
+    mapper=None,
+    max_bytes: int = XML_UPLOAD_MAX_BYTES
+) -> tuple:
+    """
+    Devuelve (resultado, adjunto); resultado es el comprobante
+    parseado, o mapper(comprobante) si se pasa mapper.
+
+    ValueError si el XML es inválido; AttachmentTooLarge si supera
+    max_bytes.
+    """
+    sink = _ComprobanteSink(mapper)
+
+    attachment = store_stream(
+        cur,
+        upload.file,
+        upload.filename,
+        "application/xml",
+        max_bytes=max_bytes,
+        sink=sink
+    )
+
+    return sink.resultado, attachment